@@ -0,0 +1,102 @@
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from collections import defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from crawler.records import RoomRecord, AddressRecord, JibunRecord, RoadRecord, RoomBatch
+from crawler.analytics import RoomAnalytics, REGION_GU, REGION_DONG, DAYS_PER_MONTH, QUOTE_DAYS, MANWON
+
+# 방 N개의 수익성 분석 시간 비교
+#   loop      : RoomRecord마다 파이썬으로 계산하고 지역별로 모아서 백분위
+#   analytics : RoomBatch -> RoomAnalytics (numpy/pandas)
+#   python benchmarks/bench_analytics.py [-n 100000]
+REGIONS = {"강남구": ["대치동", "역삼동", "삼성동"], "마포구": ["서교동", "합정동", "망원동"],
+           "관악구": ["신림동", "봉천동"], "송파구": ["잠실동", "문정동", "가락동"]}
+
+
+def make_records(n: int, rng):
+    records = []
+    for i in range(n):
+        gu = rng.choice(list(REGIONS))
+        dong = rng.choice(REGIONS[gu])
+        address = AddressRecord(JibunRecord("서울", gu, dong, str(rng.randint(1, 999)), "0"),
+                                RoadRecord("서울", gu, "테스트로", str(rng.randint(1, 200)), ""),
+                                "테스트빌딩", rng.randint(1, 20), "06284",
+                                126.8 + rng.random() * 0.4, 37.4 + rng.random() * 0.3)
+        has_naver = rng.random() < 0.8
+        records.append(RoomRecord(
+            100000 + i, rng.randint(1000, 99999) if has_naver else None, "테스트룸", "오피스텔",
+            rng.randint(5, 15), None, address,
+            rng.randint(50, 200) * 10000, -rng.randint(0, 10) * 10000, rng.randint(5, 20) * 10000,
+            rng.randint(3, 8) * 10000, 30000,
+            rng.random() if rng.random() < 0.95 else -1,
+            rng.randint(100, 5000) if has_naver else None, rng.randint(30, 150) if has_naver else None,
+        ))
+    return records
+
+
+def percentile(values, p):
+    values = sorted(values)
+    # numpy/pandas의 기본(linear)과 같은 보간
+    position = (len(values) - 1) * p / 100
+    low = int(position)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (position - low)
+
+
+def analyze_loop(records):
+    # 방마다 파이썬으로 계산하는 기존 방식
+    spreads = defaultdict(list)
+    for record in records:
+        if record.rent is None or record.vacancy_rate is None or record.vacancy_rate < 0 \
+                or record.monthly_rent is None:
+            continue
+        fees = (record.management_fee or 0) + (record.cleaning_fee or 0) + (record.contract_fee or 0)
+        net = (1 - record.vacancy_rate) * (record.rent - abs(record.long_term_discount or 0) - fees) \
+            * DAYS_PER_MONTH / QUOTE_DAYS
+        spreads[record.address.jibun.region_2depth_name].append(net - record.monthly_rent * MANWON)
+    return {region: [percentile(values, p) for p in (10, 25, 50, 75, 90)] for region, values in spreads.items()}
+
+
+def timed(fn, repeat: int = 5):
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - started)
+    return result, statistics.median(times)
+
+
+def analyze(batch):
+    analytics = RoomAnalytics.from_batch(batch)
+    return analytics.by_region(REGION_GU), analytics.by_region(REGION_DONG)
+
+
+def bench(n: int):
+    records = make_records(n, random.Random(0))
+    batch = RoomBatch().extend(records)
+
+    loop, loop_time = timed(lambda: analyze_loop(records))
+    (by_gu, by_dong), analytics_time = timed(lambda: analyze(batch))
+
+    # 두 방식의 중앙값이 같아야 함
+    for region, values in loop.items():
+        assert abs(by_gu.loc[region, "spread_p50"] - values[2]) < 1e-6 * max(1, abs(values[2]))
+
+    print("방 {}개".format(n))
+    print("{:<12}{:>10.1f} ms  (구별 spread 백분위)".format("loop", loop_time * 1000))
+    print("{:<12}{:>10.1f} ms  (구별 + 동별 전체 지표){:>8.1f}x".format(
+        "analytics", analytics_time * 1000, loop_time / analytics_time))
+    print(by_gu.round(3).to_string())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", "--number", type=int, default=100000)
+    args = parser.parse_args()
+    bench(args.number)
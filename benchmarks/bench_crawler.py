@@ -0,0 +1,335 @@
+import argparse
+import asyncio
+import json
+import math
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# 가짜 서버(mock_server.py)를 상대로 크롤러 전체를 돌려서 성능을 측정
+#   python benchmarks/bench_crawler.py --rooms 300 --mode threads async --concurrency 16 64 \
+#       --latency 0 0.02 0.05 --output bench.json [--compare 이전결과.json]
+# 설정(mode, concurrency, latency)마다
+#   초당 방 수, 단계별 p50/p95/p99와 히스토그램, 경로별 요청 수와 바이트, 파싱 CPU 시간
+# 을 측정해서 json으로 저장. --compare로 이전 버전의 결과와 초당 방 수를 비교할 수 있음
+
+STAGES = ['detail', 'address', 'rent_fee', 'vacancy', 'land_price', 'room']
+
+# 히스토그램 구간의 상한 (ms)
+HISTOGRAM_BOUNDS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000]
+
+
+def percentile(sorted_values, p: float):
+    if not sorted_values:
+        return None
+    # nearest-rank
+    index = max(0, math.ceil(p / 100 * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+
+class StageTimer:
+    def __init__(self):
+        self.samples = {stage: [] for stage in STAGES}
+        self._lock = threading.Lock()
+
+    def add(self, stage: str, seconds: float):
+        with self._lock:
+            self.samples[stage].append(seconds)
+
+    def timed(self, stage: str, fn):
+        def run():
+            started = time.perf_counter()
+            try:
+                return fn()
+            finally:
+                self.add(stage, time.perf_counter() - started)
+        return run
+
+    def atimed(self, stage: str, fn):
+        async def run():
+            started = time.perf_counter()
+            try:
+                return await fn()
+            finally:
+                self.add(stage, time.perf_counter() - started)
+        return run
+
+    def summary(self):
+        result = {}
+        for stage, samples in self.samples.items():
+            values = sorted(value * 1000 for value in samples)
+            histogram = [0] * (len(HISTOGRAM_BOUNDS) + 1)
+            for value in values:
+                bucket = next((i for i, bound in enumerate(HISTOGRAM_BOUNDS) if value <= bound), len(HISTOGRAM_BOUNDS))
+                histogram[bucket] += 1
+            result[stage] = {
+                "count": len(values),
+                "p50_ms": percentile(values, 50),
+                "p95_ms": percentile(values, 95),
+                "p99_ms": percentile(values, 99),
+                "max_ms": values[-1] if values else None,
+                "histogram": dict(zip([str(bound) for bound in HISTOGRAM_BOUNDS] + ["inf"], histogram)),
+            }
+        return result
+
+
+class ParseTimer:
+    # 파서 backend를 감싸서 파싱에 쓴 CPU 시간(쓰레드 기준)을 셈
+    def __init__(self, backend):
+        self.backend = backend
+        self.name = backend.name
+        self.cpu = 0.0
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        method = getattr(self.backend, name)
+
+        def timed(*args, **kwargs):
+            started = time.thread_time()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                spent = time.thread_time() - started
+                with self._lock:
+                    self.cpu += spent
+                    self.calls += 1
+        return timed
+
+
+def wait_for_server(base: str, timeout: float = 10):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            urllib.request.urlopen(base + "/__stats", timeout=1).read()
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.1)
+
+
+def server_stats(base: str):
+    return json.loads(urllib.request.urlopen(base + "/__stats").read())
+
+
+def reset_server(base: str):
+    urllib.request.urlopen(urllib.request.Request(base + "/__reset", method="POST")).read()
+
+
+def start_server(port: int, latency: float, jitter: float, buildings: int):
+    import mock_server
+    process = multiprocessing.get_context("spawn").Process(
+        target=mock_server.serve, args=(port, latency, jitter, buildings), daemon=True)
+    process.start()
+    wait_for_server("http://127.0.0.1:{}".format(port))
+    return process
+
+
+def point_to(base: str):
+    # room과 async_room의 주소 상수를 가짜 서버로 바꿈
+    from crawler import room, async_room
+    for module in (room, async_room):
+        module.SAM_URL_PREFIX = base + "/room/detail/"
+        module.KAKAO_ADDRESS_URL = base + "/v2/local/search/address.json"
+        module.SAM_BOOKING_URL = base + "/webpc/booking/start"
+        module.SAM_SCHEDULE_URL = base + "/app/room/schedule"
+        module.NAVER_SEARCH_URL_PREFIX = base + "/search/result/"
+        module.NAVER_COMPLEX_URL_PREFIX = base + "/complexes/"
+
+
+def reset_crawler(concurrency: int):
+    # 캐시를 비우고, 가짜 서버에는 요청 속도 제한을 두지 않음
+    from crawler import room, vacancy
+    from crawler.http_scheduler import SCHEDULER, HostPolicy
+    for cache in (room.GEOCODE_CACHE, room.NAVER_ID_CACHE, room.NAVER_COMPLEX_CACHE, vacancy.SCHEDULE_CACHE):
+        cache.clear()
+    SCHEDULER.policies = dict(SCHEDULER.policies)
+    SCHEDULER.policies['127.0.0.1'] = HostPolicy(rate=1e9, burst=10 ** 9, concurrency=max(64, concurrency * 4),
+                                                 max_concurrency=max(64, concurrency * 4))
+    SCHEDULER.hosts.clear()
+
+
+def run_threads(ids, concurrency: int, timer: StageTimer):
+    from crawler import room
+    from crawler.stages import imap_unordered
+
+    class TimedRoom(room.Room):
+        def stages(self, duration=28, exact=False, tolerance=room.ROOM_SIZE_TOLERANCE):
+            return {name: (deps, timer.timed(name, fn))
+                    for name, (deps, fn) in super().stages(duration, exact, tolerance).items()}
+
+    def build(rid):
+        started = time.perf_counter()
+        try:
+            TimedRoom(rid)
+            return True
+        except Exception as e:
+            print("❌ 처리 중 오류 발생:", rid, repr(e))
+            return False
+        finally:
+            timer.add('room', time.perf_counter() - started)
+
+    with ThreadPoolExecutor(concurrency) as executor:
+        return sum(imap_unordered(executor, build, ids))
+
+
+def run_async(ids, concurrency: int, timer: StageTimer):
+    from crawler import async_room
+
+    class TimedCrawler(async_room.AsyncRoomCrawler):
+        def stages(self, room):
+            return {name: (deps, timer.atimed(name, fn)) for name, (deps, fn) in super().stages(room).items()}
+
+        async def fetch_room(self, samsam_id):
+            started = time.perf_counter()
+            try:
+                return await super().fetch_room(samsam_id)
+            finally:
+                timer.add('room', time.perf_counter() - started)
+
+    async def main():
+        async with TimedCrawler(concurrency=concurrency, limit_per_host=concurrency) as crawler:
+            return len(await crawler.crawl(ids))
+
+    return asyncio.run(main())
+
+
+MODES = {'threads': run_threads, 'async': run_async}
+
+
+def run_one(base: str, mode: str, concurrency: int, latency: float, rooms: int):
+    from crawler import parsers
+
+    reset_crawler(concurrency)
+    reset_server(base)
+    timer = StageTimer()
+    parse_timer = ParseTimer(parsers.get_backend())
+    parsers._backend = parse_timer
+
+    ids = range(1, rooms + 1)
+    started = time.perf_counter()
+    cpu_started = time.process_time()
+    succeeded = MODES[mode](ids, concurrency, timer)
+    elapsed = time.perf_counter() - started
+    cpu = time.process_time() - cpu_started
+    parsers._backend = parse_timer.backend
+
+    stats = server_stats(base)
+    return {
+        "mode": mode,
+        "concurrency": concurrency,
+        "latency": latency,
+        "rooms": rooms,
+        "succeeded": succeeded,
+        "elapsed_s": elapsed,
+        "rooms_per_s": succeeded / elapsed if elapsed else None,
+        "cpu_s": cpu,
+        "parse_cpu_s": parse_timer.cpu,
+        "parse_calls": parse_timer.calls,
+        "parser": parse_timer.name,
+        "requests": stats["requests"],
+        "bytes": stats["bytes"],
+        "bytes_total": sum(stats["bytes"].values()),
+        "stages": timer.summary(),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_run(result: dict):
+    print("{mode:<8} 동시 {concurrency:<4} 지연 {latency:<6} : {rooms_per_s:8.1f} 방/초, "
+          "CPU {cpu_s:.2f}s (파싱 {parse_cpu_s:.2f}s), {bytes_total} bytes".format(**result))
+    for stage in STAGES:
+        summary = result["stages"][stage]
+        if summary["count"]:
+            print("    {:<11} p50 {:8.1f}ms  p95 {:8.1f}ms  p99 {:8.1f}ms".format(
+                stage, summary["p50_ms"], summary["p95_ms"], summary["p99_ms"]))
+
+
+def compare(previous: dict, current: dict):
+    def key(run):
+        return run["mode"], run["concurrency"], run["latency"], run["rooms"]
+
+    before = {key(run): run for run in previous["runs"]}
+    print("이전 결과({})와 비교".format(previous["meta"].get("commit")))
+    for run in current["runs"]:
+        old = before.get(key(run))
+        if old is None or not old["rooms_per_s"]:
+            continue
+        print("{:<8} 동시 {:<4} 지연 {:<6} : {:8.1f} -> {:8.1f} 방/초 ({:+.1%})".format(
+            run["mode"], run["concurrency"], run["latency"], old["rooms_per_s"], run["rooms_per_s"],
+            run["rooms_per_s"] / old["rooms_per_s"] - 1))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rooms", type=int, default=300)
+    parser.add_argument("--mode", nargs="+", choices=list(MODES), default=["threads", "async"])
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[16, 64])
+    parser.add_argument("--latency", nargs="+", type=float, default=[0.0, 0.02], help="응답 지연(초)")
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--buildings", type=int, default=50)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--output", default="bench_crawler.json")
+    parser.add_argument("--compare")
+    args = parser.parse_args()
+    output = os.path.abspath(args.output)
+
+    # 캐시와 크롤링 상태 파일이 실제 작업 디렉토리를 건드리지 않도록 임시 디렉토리에서 실행
+    os.chdir(tempfile.mkdtemp(prefix="bench_crawler_"))
+    base = "http://127.0.0.1:{}".format(args.port)
+    point_to(base)
+
+    result = {
+        "meta": {
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "buildings": args.buildings,
+            "jitter": args.jitter,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "runs": [],
+    }
+    for latency in args.latency:
+        server = start_server(args.port, latency, args.jitter, args.buildings)
+        try:
+            for mode in args.mode:
+                for concurrency in args.concurrency:
+                    run = run_one(base, mode, concurrency, latency, args.rooms)
+                    result["runs"].append(run)
+                    print_run(run)
+        finally:
+            server.terminate()
+            server.join()
+
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    print("결과를 저장했습니다 :", output)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(json.load(f), result)
+
+
+if __name__ == "__main__":
+    main()
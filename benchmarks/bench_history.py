@@ -0,0 +1,77 @@
+import argparse
+import dataclasses
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_analytics import make_records
+from crawler.history import HistoryStore, DAY
+from crawler.records import RoomBatch
+
+# 방 N개를 매일 크롤링하고 그 중 일부만 값이 바뀔 때 HistoryStore의 크기와 조회 시간
+#   jsonl : 크롤링마다 모든 방을 jsonl로 저장했을 때의 크기 (크롤링 한 번의 크기 x 횟수로 추정)
+#   python benchmarks/bench_history.py [-n 10000] [--days 90] [--change 0.03]
+START = 1760000000
+
+
+def change(record, rng):
+    # 공실률은 자주, 가격은 가끔 바뀜
+    if rng.random() < 0.7:
+        return dataclasses.replace(record, vacancy_rate=rng.random())
+    return dataclasses.replace(record, rent=record.rent + rng.randint(-5, 5) * 10000,
+                               monthly_rent=record.monthly_rent and record.monthly_rent + rng.randint(-3, 3))
+
+
+def bench(n: int, days: int, rate: float):
+    rng = random.Random(0)
+    records = make_records(n, rng)
+    directory = tempfile.mkdtemp(prefix="bench_history_")
+    try:
+        append_time = 0
+        changed = 0
+        with HistoryStore(directory) as store:
+            for day in range(days):
+                if day:
+                    for i in rng.sample(range(n), int(n * rate)):
+                        records[i] = change(records[i], rng)
+                batch = RoomBatch().extend(records)
+                started = time.perf_counter()
+                changed += store.append(batch, START + day * DAY)
+                append_time += time.perf_counter() - started
+        append_time /= days
+
+        one_crawl = sum(len(json.dumps(dataclasses.asdict(record), ensure_ascii=False)) + 1 for record in records)
+        store = HistoryStore(directory)
+        end = START + (days - 1) * DAY
+
+        started = time.perf_counter()
+        trend = store.trend('vacancy_rate', region='마포구', days=90, end=end)
+        trend_time = time.perf_counter() - started
+        started = time.perf_counter()
+        history = store.changes(rids=[records[0].sam_id])
+        changes_time = time.perf_counter() - started
+
+        print("방 {}개 x {}일, 하루에 {:.0%} 변경 -> 바뀐 줄 {}개".format(n, days, rate, changed))
+        print("크기        history {:>8.1f} KB   jsonl(추정) {:>10.1f} KB   {:.0f}x".format(
+            store.size() / 1024, one_crawl * days / 1024, one_crawl * days / store.size()))
+        print("append      {:>8.1f} ms/크롤링".format(append_time * 1000))
+        print("trend       {:>8.1f} ms  (마포구 90일 공실률, 열기 포함하지 않음)".format(trend_time * 1000))
+        print("changes     {:>8.1f} ms  (방 하나의 이력 {}줄)".format(changes_time * 1000, len(history)))
+        print(trend.tail(3).round(3).to_string())
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", "--number", type=int, default=10000)
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--change", type=float, default=0.03)
+    args = parser.parse_args()
+    bench(args.number, args.days, args.change)
@@ -0,0 +1,72 @@
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from crawler import parsers
+
+# 저장해둔 HTML(benchmarks/fixtures)로 파서 backend별 속도 비교
+# 기준은 기존 방식(html.parser로 전체 트리)이고, 결과가 기준과 다르면 표시함
+#   python benchmarks/bench_parsers.py [-n 반복 횟수] [--backend lxml --backend bs4 ...]
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+BASELINE = 'html.parser'
+
+# (fixture 파일, 파싱 함수)
+CASES = [
+    ('detail.html', parsers.parse_room_detail),
+    ('contract.html', parsers.parse_contract_list),
+    ('naver_search.html', parsers.parse_naver_search),
+    ('naver_noresult.html', parsers.parse_naver_search),
+    ('naver_complex.html', parsers.parse_complex_articles),
+]
+
+
+def load_fixture(name: str):
+    with open(os.path.join(FIXTURE_DIR, name), encoding='utf-8') as f:
+        return f.read()
+
+
+def available_backends(names=None):
+    backends = {}
+    for name in names or parsers.BACKENDS:
+        try:
+            backends[name] = parsers.BACKENDS[name]()
+        except ImportError:
+            print("{} : 설치되지 않아 건너뜁니다.".format(name))
+    return backends
+
+
+def bench(number: int, names=None):
+    backends = available_backends(names)
+    if BASELINE not in backends:
+        backends = dict({BASELINE: parsers.BACKENDS[BASELINE]()}, **backends)
+
+    print("{:<22}{:<14}{:>12}{:>10}  {}".format("fixture", "backend", "ms/page", "speedup", "result"))
+    totals = {name: 0.0 for name in backends}
+    for fixture, parse in CASES:
+        text = load_fixture(fixture)
+        expected = parse(text, backends[BASELINE])
+        baseline_time = None
+        for name, backend in backends.items():
+            seconds = min(timeit.repeat(lambda: parse(text, backend), number=number, repeat=3)) / number
+            totals[name] += seconds
+            if name == BASELINE:
+                baseline_time = seconds
+            same = "ok" if parse(text, backend) == expected else "MISMATCH"
+            print("{:<22}{:<14}{:>12.3f}{:>9.1f}x  {}".format(fixture, name, seconds * 1000, baseline_time / seconds, same))
+
+    print()
+    print("방 하나를 파싱하는데 걸리는 시간 (모든 fixture 합)")
+    for name, seconds in totals.items():
+        print("{:<14}{:>10.3f} ms{:>9.1f}x".format(name, seconds * 1000, totals[BASELINE] / seconds))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", "--number", type=int, default=50)
+    parser.add_argument("--backend", action="append", choices=list(parsers.BACKENDS))
+    args = parser.parse_args()
+    bench(args.number, args.backend)
@@ -0,0 +1,98 @@
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import bench_crawler
+
+# 작업 큐(work_queue.py)를 worker 프로세스 여러 개가 나눠서 처리할 때의 처리량
+# 가짜 서버(mock_server.py)를 상대로 방 N개를 sqlite 큐에 넣고, worker 수를 바꿔가며 초당 방 수를 측정
+# 모든 방이 한 번씩만 기록됐는지도 확인
+#   python benchmarks/bench_queue.py --rooms 400 --workers 1 2 4 --threads 4 --latency 0.1
+# 가짜 서버는 프로세스 하나이므로 (코어 1개에서 초당 방 80개 정도) 그보다 낮은 처리량에서 비교해야 worker 수의 효과가 보임
+PORT = 8767
+
+
+def worker(base: str, queue_path: str, output: str, threads: int, ready, start):
+    bench_crawler.point_to(base)
+    bench_crawler.reset_crawler(threads)
+    from crawler.sink import JsonlSink
+    from crawler.work_queue import SqliteWorkQueue
+    from crawler.sam_search import process_from_queue
+    ready.release()
+    start.wait()
+    with SqliteWorkQueue(queue_path) as queue, JsonlSink(output) as sink:
+        process_from_queue(queue, sink=sink, max_workers=threads)
+
+
+def run(base: str, rooms: int, workers: int, threads: int):
+    from crawler.work_queue import SqliteWorkQueue, enqueue
+    directory = tempfile.mkdtemp(prefix="bench_queue_")
+    queue_path = os.path.join(directory, "queue.sqlite3")
+    with SqliteWorkQueue(queue_path) as queue:
+        enqueue(queue, (str(10000 + i) for i in range(rooms)))
+
+    # 모든 worker가 준비된 뒤에 같이 시작 (캐시 비우기가 다른 worker의 처리와 겹치지 않게)
+    bench_crawler.reset_crawler(threads)
+    context = multiprocessing.get_context("spawn")
+    ready, start = context.Semaphore(0), context.Event()
+    outputs = [os.path.join(directory, "rooms-{}.jsonl".format(i)) for i in range(workers)]
+    processes = [context.Process(target=worker, args=(base, queue_path, output, threads, ready, start))
+                 for output in outputs]
+    for process in processes:
+        process.start()
+    for _ in processes:
+        ready.acquire()
+
+    started = time.perf_counter()
+    start.set()
+    for process in processes:
+        process.join()
+    elapsed = time.perf_counter() - started
+
+    rids = []
+    for output in outputs:
+        with open(output, encoding='utf-8') as f:
+            rids += [json.loads(line)['sam_id'] for line in f if line.strip()]
+    with SqliteWorkQueue(queue_path) as queue:
+        stats = queue.stats()
+    return {'workers': workers, 'threads': threads, 'rooms': len(rids), 'unique': len(set(rids)),
+            'seconds': elapsed, 'rooms_per_second': len(rids) / elapsed, 'queue': stats}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rooms", type=int, default=400)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--threads", type=int, default=4, help="worker 프로세스마다 동시에 처리할 방의 수")
+    parser.add_argument("--latency", type=float, default=0.1)
+    parser.add_argument("--buildings", type=int, default=50)
+    args = parser.parse_args()
+
+    base = "http://127.0.0.1:{}".format(PORT)
+    server = bench_crawler.start_server(PORT, args.latency, 0.0, args.buildings)
+    bench_crawler.point_to(base)
+    try:
+        baseline = None
+        for workers in args.workers:
+            result = run(base, args.rooms, workers, args.threads)
+            baseline = baseline or result['rooms_per_second'] / workers
+            print("worker {:>2} x {:>2} threads : {:>7.1f} rooms/s ({:.2f}x / worker 1개 기준 {:.0f}%)  "
+                  "기록 {} (중복 없음 {})  {}".format(
+                      workers, args.threads, result['rooms_per_second'],
+                      result['rooms_per_second'] / baseline,
+                      100 * result['rooms_per_second'] / (baseline * workers),
+                      result['rooms'], result['rooms'] == result['unique'], result['queue']))
+    finally:
+        server.terminate()
+
+
+if __name__ == "__main__":
+    main()
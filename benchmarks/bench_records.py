@@ -0,0 +1,87 @@
+import argparse
+import gc
+import os
+import random
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from crawler.room import Room, Address, ROOM_CONTRACT_DATA_LIST
+from crawler.records import RoomRecord, RoomBatch
+
+# 방 N개를 메모리에 들고 있을 때의 크기 비교
+#   Room(크롤링 결과 그대로) / RoomRecord(slots) / RoomBatch(열 단위)
+#   python benchmarks/bench_records.py [-n 100000]
+REGIONS = [("서울", "강남구", "대치동", "테헤란로"), ("서울", "마포구", "서교동", "월드컵로"),
+           ("서울", "관악구", "신림동", "남부순환로"), ("서울", "송파구", "잠실동", "올림픽로")]
+BUILDINGS = ["신안메트로칸", "역삼아이파크", "마포한강푸르지오", "신림스타포레", "잠실리센츠"]
+
+
+def kakao_response(rng):
+    # 카카오 주소 검색 응답의 첫 번째 결과 (json으로 받은 것처럼 새 문자열을 만듦)
+    region_1, region_2, region_3, road = rng.choice(REGIONS)
+    main_no = str(rng.randint(1, 999))
+    return {
+        "meta": {"total_count": 1},
+        "documents": [{
+            "address": {"region_1depth_name": "".join(region_1), "region_2depth_name": "".join(region_2),
+                        "region_3depth_name": "".join(region_3), "main_address_no": main_no, "sub_address_no": str(rng.randint(0, 50))},
+            "road_address": {"region_1depth_name": "".join(region_1), "region_2depth_name": "".join(region_2),
+                             "road_name": "".join(road), "main_building_no": str(rng.randint(1, 200)), "sub_building_no": "",
+                             "zone_no": str(rng.randint(10000, 99999)), "building_name": "".join(rng.choice(BUILDINGS))},
+            "x": str(126.8 + rng.random() * 0.4),
+            "y": str(37.4 + rng.random() * 0.3),
+        }],
+    }
+
+
+def make_room(i, rng):
+    room = Room(str(100000 + i), fetch=False)
+    room.room_name = "테스트룸 {}".format(i)
+    room.room_type = "".join("오피스텔")
+    room.room_size_pyeong_sam = rng.randint(5, 15)
+    room.room_size_pyeong_naver = room.room_size_pyeong_sam
+    room.address_query = "서울특별시 강남구 대치동 943-24 신안메트로칸 {}층".format(rng.randint(1, 20))
+    room.address = Address(room.address_query, kakao_response(rng))
+    room.prices = {key: rng.randint(0, 200) * 10000 for key in ROOM_CONTRACT_DATA_LIST}
+    room.prices['장기계약 할인'] = "0"
+    room.vacancy_rate = rng.random()
+    room.naver_id = str(rng.randint(1000, 99999))
+    room.deposit = rng.randint(100, 5000)
+    room.monthly_rent = rng.randint(30, 150)
+    return room
+
+
+def measure(build):
+    # build()가 만든 객체가 차지하는 메모리 (byte)
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, after - before
+
+
+def bench(n: int):
+    rng = random.Random(0)
+    rooms, room_bytes = measure(lambda: [make_room(i, rng) for i in range(n)])
+    records, record_bytes = measure(lambda: [RoomRecord.from_room(room) for room in rooms])
+    batch, batch_bytes = measure(lambda: RoomBatch().extend(records))
+
+    # 변환해도 값은 같아야 함
+    assert records[0] == batch[0]
+    assert records[0].prices == {key: int(value) for key, value in rooms[0].prices.items()}
+
+    print("방 {}개".format(n))
+    for name, size in [("Room", room_bytes), ("RoomRecord", record_bytes), ("RoomBatch", batch_bytes)]:
+        print("{:<12}{:>10.1f} MB{:>10.0f} B/방{:>9.1f}x".format(name, size / 2 ** 20, size / n, room_bytes / size))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", "--number", type=int, default=100000)
+    args = parser.parse_args()
+    bench(args.number)
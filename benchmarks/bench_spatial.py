@@ -0,0 +1,74 @@
+import argparse
+import math
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from crawler.spatial import ComparableIndex, NAVER, METERS_PER_DEGREE_LAT, METERS_PER_DEGREE_LNG
+
+# 주변 매물 조회 시간 비교 (서울 크기의 영역에 단지 N개, 단지마다 매물 10개)
+#   scan : 모든 매물과 거리를 계산 (numpy)
+#   grid : ComparableIndex.nearest (반경 500m, +-1평, 5개)
+#   python benchmarks/bench_spatial.py [-n 20000] [-q 2000]
+WEST, EAST, SOUTH, NORTH = 126.76, 127.18, 37.43, 37.70
+
+
+def make_index(n: int, rng):
+    index = ComparableIndex()
+    for naver_id in range(n):
+        articles = [[rng.randint(5, 20), rng.randint(5, 50) * 100, rng.randint(40, 150)] for _ in range(10)]
+        index.add_complex(naver_id, rng.uniform(WEST, EAST), rng.uniform(SOUTH, NORTH), articles)
+    return index
+
+
+def scan(points, longitude, latitude, size, k=5, radius=500, tolerance=1):
+    import numpy as np
+    lng, lat, sizes = points
+    d = np.hypot((lng - longitude) * METERS_PER_DEGREE_LNG * math.cos(math.radians(latitude)),
+                 (lat - latitude) * METERS_PER_DEGREE_LAT)
+    d[(d > radius) | (np.abs(sizes - size) > tolerance)] = np.inf
+    order = np.argsort(d, kind='stable')[:k]
+    return [i for i in order if np.isfinite(d[i])]
+
+
+def bench(n: int, queries: int):
+    import numpy as np
+    rng = random.Random(0)
+    started = time.perf_counter()
+    index = make_index(n, rng)
+    build_time = time.perf_counter() - started
+
+    comparables = [comparable for cell in index.cells[NAVER].values()
+                   for group in cell.values() for comparable in group]
+    points = (np.array([c.longitude for c in comparables]), np.array([c.latitude for c in comparables]),
+              np.array([c.size for c in comparables]))
+    targets = [(rng.uniform(WEST, EAST), rng.uniform(SOUTH, NORTH), rng.randint(5, 20)) for _ in range(queries)]
+
+    started = time.perf_counter()
+    scanned = [scan(points, *target) for target in targets[:200]]
+    scan_time = (time.perf_counter() - started) / 200
+
+    started = time.perf_counter()
+    found = [index.nearest(lng, lat, size=size, tolerance=1) for lng, lat, size in targets]
+    grid_time = (time.perf_counter() - started) / queries
+
+    # 같은 매물을 찾아야 함 (거리가 같으면 순서가 다를 수 있으므로 개수만 비교)
+    for expected, result in zip(scanned, found):
+        assert len(expected) == len(result)
+
+    print("단지 {}개, 매물 {}개 ({})".format(n, len(index), index))
+    print("색인 만들기  {:>10.1f} ms".format(build_time * 1000))
+    print("{:<12}{:>10.1f} us/조회".format("scan", scan_time * 1e6))
+    print("{:<12}{:>10.1f} us/조회{:>8.0f}x".format("grid", grid_time * 1e6, scan_time / grid_time))
+    print("평균 {:.1f}개 찾음".format(sum(map(len, found)) / len(found)))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", "--number", type=int, default=20000)
+    parser.add_argument("-q", "--queries", type=int, default=2000)
+    args = parser.parse_args()
+    bench(args.number, args.queries)
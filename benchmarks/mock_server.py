@@ -0,0 +1,164 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import zlib
+from collections import defaultdict
+
+from aiohttp import web
+
+# 벤치마크용 가짜 33m2 / 카카오 / 네이버 서버
+# benchmarks/fixtures의 저장된 페이지를 방 번호에 맞게 조금씩 바꿔서 돌려줌
+# 응답마다 latency(+ 0 ~ jitter)초를 기다리고, 경로별 요청 수와 보낸 바이트 수를 셈
+#   python benchmarks/mock_server.py --port 8765 --latency 0.02
+#   GET /__stats : {"requests": {...}, "bytes": {...}}, POST /__reset : 통계 초기화
+# 지도/키워드 검색은 서울 영역에 흩어진 listings개의 방(rid 20000부터)을 돌려줌
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+BUILDING_PATTERN = re.compile(r"테스트(\d+)빌딩")
+WEST, EAST, SOUTH, NORTH = 126.76, 127.18, 37.43, 37.70
+KEYWORD_PAGE_SIZE = 15
+
+
+def _fixture(name: str):
+    with open(os.path.join(FIXTURE_DIR, name), encoding='utf-8') as f:
+        return f.read()
+
+
+def complex_position(complex_id: int):
+    # 가짜 네이버 단지의 (경도, 위도). 카카오 주소(건물 좌표)와는 조금 떨어져 있음
+    return round(127.07 + complex_id % 100 * 0.0001, 6), round(37.51 + complex_id % 100 * 0.0001, 6)
+
+
+class MockServer:
+    # buildings : 방들이 나눠서 들어있는 건물 수 (카카오/네이버 캐시 적중률이 달라짐)
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, buildings: int = 50, seed: int = 0,
+                 listings: int = 200):
+        self.latency = latency
+        self.jitter = jitter
+        self.buildings = buildings
+        self.random = random.Random(seed)
+        rng = random.Random(seed)
+        self.listings = [{"rid": 20000 + i, "lng": rng.uniform(WEST, EAST), "lat": rng.uniform(SOUTH, NORTH)}
+                         for i in range(listings)]
+        self.requests = defaultdict(int)
+        self.bytes = defaultdict(int)
+
+        self.detail = _fixture("detail.html")
+        self.contract = _fixture("contract.html")
+        self.naver_search = _fixture("naver_search.html")
+        self.naver_complex = _fixture("naver_complex.html")
+
+    async def respond(self, route: str, body: str, content_type: str = 'text/html'):
+        delay = self.latency + (self.random.uniform(0, self.jitter) if self.jitter else 0)
+        if delay:
+            await asyncio.sleep(delay)
+        data = body.encode('utf-8')
+        self.requests[route] += 1
+        self.bytes[route] += len(data)
+        return web.Response(body=data, content_type=content_type, charset='utf-8')
+
+    def building(self, rid: int):
+        return rid % self.buildings
+
+    async def handle_detail(self, request):
+        rid = int(request.match_info['rid'])
+        building = self.building(rid)
+        body = self.detail.replace("신안메트로칸 702호", "테스트룸 {}".format(rid)) \
+            .replace("대치동 943-24 신안메트로칸 7층", "대치동 {}-24 테스트{}빌딩 7층".format(900 + building, building))
+        return await self.respond('detail', body)
+
+    async def handle_booking(self, request):
+        return await self.respond('booking', self.contract)
+
+    async def handle_schedule(self, request):
+        data = await request.post()
+        rid, month = int(data['rid']), int(data['month'])
+        schedule_list = [{"date": "{}-{:02d}-{:02d}".format(data['year'], month, day),
+                          "status": "booking" if (rid + day) % 3 else "disable"}
+                         for day in range(1, 29) if (rid * 7 + day * month) % 5 == 0]
+        return await self.respond('schedule', json.dumps({"schedule_list": schedule_list}), 'application/json')
+
+    async def handle_kakao(self, request):
+        query = request.query['query']
+        # "... 대치동 9xx-24 테스트N빌딩 7층" 에서 건물 번호
+        match = BUILDING_PATTERN.search(query)
+        building = int(match.group(1)) if match else 0
+        document = {
+            "address": {"region_1depth_name": "서울", "region_2depth_name": "강남구", "region_3depth_name": "대치동",
+                        "main_address_no": str(900 + building), "sub_address_no": "24"},
+            "road_address": {"region_1depth_name": "서울", "region_2depth_name": "강남구", "road_name": "삼성로",
+                             "main_building_no": str(building), "sub_building_no": "",
+                             "zone_no": "06284", "building_name": "테스트{}빌딩".format(building)},
+            "x": str(127.06 + building * 0.0001), "y": str(37.50 + building * 0.0001),
+        }
+        body = json.dumps({"meta": {"total_count": 1}, "documents": [document]}, ensure_ascii=False)
+        return await self.respond('kakao', body, 'application/json')
+
+    async def handle_naver_search(self, request):
+        # 삼성로 항목의 단지 번호를 검색어마다 다르게
+        complex_id = 10000 + zlib.crc32(request.match_info['name'].encode('utf-8')) % 10000
+        body = self.naver_search.replace("/complexes/18352", "/complexes/{}".format(complex_id))
+        return await self.respond('naver_search', body)
+
+    async def handle_naver_complex(self, request):
+        # 단지 좌표를 페이지의 데이터 스크립트에 넣음 (단지 번호마다 다르게)
+        complex_id = int(request.match_info['id'])
+        position = '{{"complex":{{"complexNumber":{},"coordinates":{{"xCoordinate":{},"yCoordinate":{}}}}},"k":'.format(
+            complex_id, *complex_position(complex_id))
+        return await self.respond('naver_complex', self.naver_complex.replace('{"k":', position, 1))
+
+    async def handle_map_search(self, request):
+        # 영역 안의 방을 itemcount개까지
+        data = await request.post()
+        lngs = sorted((float(data['north_east_lng']), float(data['south_west_lng'])))
+        lats = sorted((float(data['north_east_lat']), float(data['south_west_lat'])))
+        found = [item for item in self.listings
+                 if lngs[0] <= item['lng'] <= lngs[1] and lats[0] <= item['lat'] <= lats[1]]
+        return await self.respond('map_search', json.dumps({"list": found[:int(data['itemcount'])]}), 'application/json')
+
+    async def handle_keyword_search(self, request):
+        # start_num부터 한 페이지 (매물 링크 앞에 다른 링크도 섞어둠), 끝나면 빈 응답
+        data = await request.post()
+        start = int(data['start_num'])
+        page = self.listings[start:start + KEYWORD_PAGE_SIZE]
+        body = "".join('<li><a class="share" data-href="/event/{}" href="/room/detail/{}">{}</a></li>'.format(
+            start + i, item['rid'], item['rid']) for i, item in enumerate(page))
+        return await self.respond('keyword_search', body)
+
+    async def handle_stats(self, request):
+        return web.json_response({"requests": self.requests, "bytes": self.bytes})
+
+    async def handle_reset(self, request):
+        self.requests.clear()
+        self.bytes.clear()
+        return web.json_response({})
+
+    def app(self):
+        app = web.Application()
+        app.router.add_get('/room/detail/{rid}', self.handle_detail)
+        app.router.add_post('/webpc/booking/start', self.handle_booking)
+        app.router.add_post('/app/room/schedule', self.handle_schedule)
+        app.router.add_get('/v2/local/search/address.json', self.handle_kakao)
+        app.router.add_get('/search/result/{name}', self.handle_naver_search)
+        app.router.add_get('/complexes/{id}', self.handle_naver_complex)
+        app.router.add_post('/app/room/search', self.handle_map_search)
+        app.router.add_post('/webmobile/search/list/more', self.handle_keyword_search)
+        app.router.add_get('/__stats', self.handle_stats)
+        app.router.add_post('/__reset', self.handle_reset)
+        return app
+
+
+def serve(port: int = 8765, latency: float = 0.0, jitter: float = 0.0, buildings: int = 50):
+    web.run_app(MockServer(latency, jitter, buildings).app(), host='127.0.0.1', port=port, print=None)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--buildings", type=int, default=50)
+    args = parser.parse_args()
+    serve(args.port, args.latency, args.jitter, args.buildings)
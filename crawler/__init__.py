@@ -0,0 +1,50 @@
+import importlib
+
+# 33m2 크롤러
+#   python -m crawler --help
+#
+# import crawler 만으로는 네트워크 요청이나 무거운 모듈(requests, aiohttp, 파서)을 불러오지 않음
+# 아래 이름은 처음 사용할 때 해당 모듈을 불러옴
+#   from crawler import Room, crawl, RoomFilter
+_EXPORTS = {
+    'Room': 'room',
+    'Address': 'room',
+    'prefetch_rooms': 'room',
+    'AsyncRoomCrawler': 'async_room',
+    'crawl_rooms': 'async_room',
+    'crawl': 'sam_search',
+    'sam_search_keyword': 'sam_search',
+    'sam_search_map': 'sam_search',
+    'sam_search_map_tiled': 'sam_search',
+    'RoomFilter': 'screening',
+    'Screening': 'screening',
+    'IncrementalCrawler': 'crawl_state',
+    'ParsePipeline': 'parse_pool',
+    'quote_matrix': 'quotes',
+    'QuoteMatrix': 'quotes',
+    'RoomAnalytics': 'analytics',
+    'ComparableIndex': 'spatial',
+    'COMPARABLES': 'spatial',
+    'open_queue': 'work_queue',
+    'QueueWorker': 'work_queue',
+    'HistoryStore': 'history',
+    'RoomRecord': 'records',
+    'RoomBatch': 'records',
+    'open_sink': 'sink',
+    'SCHEDULER': 'http_scheduler',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+    value = getattr(importlib.import_module("." + module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
@@ -0,0 +1,160 @@
+import numpy as np
+import pandas as pd
+
+from .records import RoomBatch, BATCH_COLUMNS
+
+# 크롤링한 방들의 수익성 분석 (numpy/pandas로 열 단위 계산, 방마다 파이썬 객체를 만들지 않음)
+# 33m2 단기 임대 수익과 네이버 부동산 장기 월세/보증금을 비교
+#
+#   occupancy       : 점유율 = 1 - 공실률 (공실률을 모르면(-1) NaN)
+#   short_term_net  : 한 달(365.25 / 12일) 기준 단기 임대 순수익(원)
+#                     = 점유율 x (임대료 - 장기계약 할인 - 관리비용 - 청소비용 - 계약 수수료) x 한 달 / 28일
+#   long_term_rent  : 네이버 부동산 월세(원)
+#   spread          : short_term_net - long_term_rent (원)
+#   spread_ratio    : spread / long_term_rent
+#   deposit_yield   : 보증금을 내고 장기 임대해서 단기로 빌려줄 때 보증금 대비 연 수익률 = 12 x spread / 보증금
+#
+#   analytics = RoomAnalytics.from_jsonl("rooms.jsonl")
+#   analytics.by_region()            # 구별 spread 백분위
+#   analytics.by_region(REGION_DONG) # 동별
+QUOTE_DAYS = 28
+DAYS_PER_MONTH = 365.25 / 12
+MANWON = 10000
+
+FEE_COLUMNS = ('management_fee', 'cleaning_fee', 'contract_fee')
+METRIC_COLUMNS = ('occupancy', 'short_term_net', 'long_term_rent', 'spread', 'spread_ratio', 'deposit_yield')
+
+REGION_GU = ('region_2depth_name',)
+REGION_DONG = ('region_2depth_name', 'region_3depth_name')
+PERCENTILES = (10, 25, 50, 75, 90)
+
+
+def _divide(numerator, denominator):
+    # 0이나 NaN으로 나누면 NaN
+    result = np.full_like(numerator, np.nan, dtype='f8')
+    np.divide(numerator, denominator, out=result, where=(denominator != 0) & ~np.isnan(denominator))
+    return result
+
+
+def compute_metrics(rent, long_term_discount, fees, vacancy_rate, monthly_rent, deposit):
+    # 모든 인자는 같은 길이의 float 배열 (원, 네이버 월세/보증금은 만원). fees는 배열들의 list
+    # 값이 없으면 NaN이고 결과도 NaN
+    occupancy = np.where(vacancy_rate >= 0, 1 - vacancy_rate, np.nan)
+    # 장기계약 할인은 "-50,000원"처럼 음수로 들어오므로 부호와 관계없이 뺌
+    per_contract = rent - np.abs(np.nan_to_num(long_term_discount))
+    for fee in fees:
+        per_contract = per_contract - np.nan_to_num(fee)
+    short_term_net = occupancy * per_contract * (DAYS_PER_MONTH / QUOTE_DAYS)
+
+    long_term_rent = monthly_rent * MANWON
+    spread = short_term_net - long_term_rent
+    return {
+        'occupancy': occupancy,
+        'short_term_net': short_term_net,
+        'long_term_rent': long_term_rent,
+        'spread': spread,
+        'spread_ratio': _divide(spread, long_term_rent),
+        'deposit_yield': _divide(12 * spread, deposit * MANWON),
+    }
+
+
+class RoomAnalytics:
+    # numbers : {열 이름: float 배열}, strings : {열 이름: str list} (RoomBatch의 열과 같은 이름)
+    # 문자열 열은 pandas 문자열로 바꾸지 않고, 지역별로 묶을 때 필요한 열만 정수 코드로 바꿈
+    def __init__(self, numbers: dict, strings: dict, fees=FEE_COLUMNS):
+        self.numbers = numbers
+        self.strings = strings
+        self.fees = tuple(fees)
+        self._metrics = None
+
+    @staticmethod
+    def from_batch(batch: RoomBatch, fees=FEE_COLUMNS):
+        # 숫자 열은 array('d')를 복사하지 않고 numpy 배열로 봄
+        numbers = {}
+        strings = {}
+        for name, kind in BATCH_COLUMNS:
+            column = batch.column(name)
+            if kind == 'd':
+                numbers[name] = np.frombuffer(column, dtype='f8') if len(column) else np.empty(0)
+            else:
+                strings[name] = column
+        return RoomAnalytics(numbers, strings, fees)
+
+    @staticmethod
+    def from_frame(frame: pd.DataFrame, fees=FEE_COLUMNS):
+        # RoomBatch.to_pandas()와 같은 열을 가진 DataFrame (예: parquet을 읽어서 평탄화한 것)
+        numbers = {}
+        strings = {}
+        for name, kind in BATCH_COLUMNS:
+            if kind == 'd':
+                numbers[name] = frame[name].to_numpy(dtype='f8', na_value=np.nan)
+            else:
+                strings[name] = frame[name].tolist()
+        return RoomAnalytics(numbers, strings, fees)
+
+    @staticmethod
+    def from_jsonl(path: str, fees=FEE_COLUMNS):
+        return RoomAnalytics.from_batch(RoomBatch.from_jsonl(path), fees)
+
+    @staticmethod
+    def from_rooms(rooms, fees=FEE_COLUMNS):
+        return RoomAnalytics.from_batch(RoomBatch.from_rooms(rooms), fees)
+
+    def metrics(self):
+        # {지표 이름: 배열} (한 번만 계산)
+        if self._metrics is None:
+            numbers = self.numbers
+            self._metrics = compute_metrics(
+                numbers['rent'], numbers['long_term_discount'], [numbers[name] for name in self.fees],
+                numbers['vacancy_rate'], numbers['monthly_rent'], numbers['deposit'])
+        return self._metrics
+
+    def to_pandas(self):
+        # 방마다 한 줄, 원래 열 + 지표 열
+        columns = dict(self.numbers)
+        columns.update(self.strings)
+        columns.update(self.metrics())
+        return pd.DataFrame({name: columns[name] for name in [name for name, _ in BATCH_COLUMNS] +
+                             list(METRIC_COLUMNS)})
+
+    def by_region(self, levels=REGION_GU, percentiles=PERCENTILES, metric: str = 'spread'):
+        # 지역별 방 수, 점유율/순수익 평균, metric의 백분위와 보증금 대비 수익률 중앙값
+        # 네이버 월세가 없는 방(spread를 계산할 수 없는 방)은 백분위에서, 주소가 없는 방은 결과에서 빠짐
+        levels = list(levels)
+        codes = {}
+        uniques = {}
+        for level in levels:
+            codes[level], uniques[level] = pd.factorize(np.array(self.strings[level], dtype=object))
+        has_region = np.logical_and.reduce([codes[level] >= 0 for level in levels])
+
+        frame = pd.DataFrame(dict(codes, **self.metrics()))[has_region]
+        groups = frame.groupby(levels, sort=False)
+        summary = groups.agg(
+            rooms=('occupancy', 'size'),
+            compared=(metric, 'count'),
+            occupancy=('occupancy', 'mean'),
+            short_term_net=('short_term_net', 'mean'),
+            deposit_yield=('deposit_yield', 'median'),
+        )
+        quantiles = groups[metric].quantile([p / 100 for p in percentiles]).unstack()
+        # 방이 하나도 없으면 unstack한 결과에 열이 없음
+        quantiles = quantiles.reindex(columns=[p / 100 for p in percentiles])
+        quantiles.columns = ["{}_p{}".format(metric, p) for p in percentiles]
+        summary = summary.join(quantiles)
+
+        # 정수 코드 -> 지역 이름
+        index = summary.index.to_frame(index=False)
+        names = [np.asarray(uniques[level], dtype=object)[index[level].to_numpy()] for level in levels]
+        if len(levels) == 1:
+            summary.index = pd.Index(names[0], name=levels[0])
+        else:
+            summary.index = pd.MultiIndex.from_arrays(names, names=levels)
+        return summary.sort_index()
+
+    def top(self, n: int = 20, metric: str = 'deposit_yield'):
+        # metric이 가장 큰 방 n개
+        order = np.argsort(-np.nan_to_num(self.metrics()[metric], nan=-np.inf), kind='stable')[:n]
+        return self.to_pandas().iloc[order]
+
+    def __len__(self):
+        return len(self.numbers['sam_id'])
@@ -0,0 +1,242 @@
+import asyncio
+import logging
+
+import aiohttp
+
+from .room import *
+from .stages import run_stages_async
+from .vacancy import aload_calendar
+from .http_scheduler import SCHEDULER, RequestScheduler
+from .instrumentation import failure, room_done
+
+# 한 번에 처리하는 방의 수와 호스트당 동시 연결 수
+DEFAULT_CONCURRENCY = 200
+DEFAULT_LIMIT_PER_HOST = 32
+
+
+async def _read_text(response):
+    return await response.text()
+
+
+async def _read_json(response):
+    if response.status != 200:
+        return None
+    return await response.json(content_type=None)
+
+
+class AsyncRoomCrawler:
+    # 하나의 aiohttp 세션(커넥션 풀)을 공유하면서 여러 방을 하나의 이벤트 루프에서 크롤링
+    # 결과는 Room(fetch=False)에 Room과 같은 필드로 채워서 반환
+    #
+    # async with AsyncRoomCrawler() as crawler:
+    #     rooms = await crawler.crawl(ids)
+    def __init__(self, concurrency: int = DEFAULT_CONCURRENCY,
+                 limit_per_host: int = DEFAULT_LIMIT_PER_HOST,
+                 duration: int = 28, exact: bool = False, tolerance: int = ROOM_SIZE_TOLERANCE,
+                 windows=(), timeout: float = 30, scheduler: RequestScheduler = SCHEDULER):
+        self.concurrency = concurrency
+        self.limit_per_host = limit_per_host
+        self.duration = duration
+        self.exact = exact
+        self.tolerance = tolerance
+        self.windows = windows # duration 외에 미리 불러올 공실률 기간들
+        self.timeout = timeout
+        self.session = None
+        self.scheduler = scheduler # 호스트별 요청 속도/동시 요청 수 제한과 재시도
+
+    async def __aenter__(self):
+        connector = aiohttp.TCPConnector(limit=self.concurrency, limit_per_host=self.limit_per_host)
+        self.session = aiohttp.ClientSession(connector=connector,
+                                             timeout=aiohttp.ClientTimeout(total=self.timeout))
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.session.close()
+        self.session = None
+
+    async def _get(self, url, **kwargs):
+        return await self.scheduler.arequest(self.session, "GET", url, _read_text, **kwargs)
+
+    async def _post(self, url, **kwargs):
+        status, text, _ = await self.scheduler.arequest(self.session, "POST", url, _read_text, **kwargs)
+        return status, text
+
+    async def _get_json(self, url, **kwargs):
+        status, json_data, _ = await self.scheduler.arequest(self.session, "GET", url, _read_json, **kwargs)
+        return status, json_data
+
+    async def _post_json(self, url, **kwargs):
+        status, json_data, _ = await self.scheduler.arequest(self.session, "POST", url, _read_json, **kwargs)
+        return status, json_data
+
+    async def updateDetail(self, room: Room):
+        # 1. 이름과 주소 찾기
+        status, text, _ = await self._get(room.url, headers=MOBILE_HEADERS)
+
+        if status != 200:
+            failure("detail_http_error", "33m2에서 응답을 받지 못했습니다. id : %s", room.sam_id)
+            return False
+
+        room.parseLand(text)
+
+    async def updateAddress(self, room: Room):
+        room.address = await self.address(room.address_query)
+
+    async def address(self, query: str):
+        if query is None:
+            return Address(None)
+
+        async def fetch():
+            headers, params = Address.requestArgs(query)
+            status, json_data = await self._get_json(KAKAO_ADDRESS_URL, headers=headers, params=params)
+            if status != 200:
+                failure("kakao_http_error", "카카오맵 API 요청 실패. 검색어 : %s", query)
+                return MISSING
+            return Address.compactResponse(json_data)
+
+        data = await GEOCODE_CACHE.aget_or_compute(normalize_address_query(query), fetch)
+        if data is MISSING:
+            return Address(None)
+        return Address(query, data)
+
+    async def updateRentFee(self, room: Room):
+        # 2. 가격 정보 가져오기
+        headers, data = room.rentFeeArgs()
+        _, text = await self._post(SAM_BOOKING_URL, headers=headers, data=data)
+        room.parseRentFee(text)
+
+    async def updateVacancyRate(self, room: Room):
+        room.vacancy_rate = -1 # 오류시
+
+        async def fetch_month(year, month):
+            headers, data = room.vacancyArgs(year, month)
+            status, json_data = await self._post_json(SAM_SCHEDULE_URL, headers=headers, data=data)
+
+            # 응답 오류
+            if status != 200:
+                failure("schedule_http_error", "33m2에서 %s 의 일정을 받지 못했습니다. Error: %s", room.sam_id, status)
+                return MISSING
+
+            return json_data["schedule_list"]
+
+        # 여러 기간을 계산할 수 있도록 가장 긴 기간만큼 불러옴
+        days = max((self.duration,) + tuple(self.windows))
+        room.vacancy_calendar = await aload_calendar(room.sam_id, days, fetch_month, room.vacancy_calendar)
+        room.vacancy_rate = room.vacancy_calendar.rate(self.duration)
+
+    async def updateLandPrice(self, room: Room):
+        if not await self.searchLandPrice(room) and not self.exact:
+            room.matchComparablePrice(self.tolerance)
+
+    async def searchLandPrice(self, room: Room):
+        room.naver_id = None
+        search_url = room.landPriceSearchUrl()
+        if search_url is None:
+            return
+
+        async def search():
+            status, text, url = await self._get(search_url, headers=MOBILE_HEADERS)
+
+            if status != 200:
+                failure("naver_search_http_error", "네이버 부동산에서 응답을 받지 못했습니다. 검색어 : %s", search_url[len(NAVER_SEARCH_URL_PREFIX):])
+                return MISSING
+
+            return room.parseNaverSearch(text, url)
+
+        naver_id = await NAVER_ID_CACHE.aget_or_compute(room.naverIdKey(), search)
+        if naver_id is MISSING or naver_id is None:
+            return
+        room.naver_id = naver_id
+
+        async def complex_articles():
+            status, text, _ = await self._get(room.naverComplexUrl(), headers=MOBILE_HEADERS)
+
+            if status != 200:
+                failure("naver_complex_http_error", "%s 에서 응답을 받지 못했습니다.", room.naverComplexUrl())
+                return MISSING
+
+            return ComplexIndex(*parse_complex_page(text))
+
+        index = await NAVER_COMPLEX_CACHE.aget_or_compute(room.naver_id, complex_articles)
+        if index is MISSING:
+            return
+
+        return room.matchLandPrice(index, self.exact, self.tolerance)
+
+    def stages(self, room: Room):
+        functions = {
+            'detail': lambda: self.updateDetail(room),
+            'address': lambda: self.updateAddress(room),
+            'rent_fee': lambda: self.updateRentFee(room),
+            'vacancy': lambda: self.updateVacancyRate(room),
+            'land_price': lambda: self.updateLandPrice(room),
+        }
+        return {name: (deps, functions[name]) for name, deps in ROOM_STAGES.items()}
+
+    async def fetch_room(self, samsam_id) -> Room:
+        # 예약/일정/상세 페이지를 동시에 요청하고, 카카오 -> 네이버는 상세 페이지 뒤에 이어서 요청
+        room = Room(samsam_id, self.duration, fetch=False)
+        await run_stages_async(self.stages(room))
+        return room
+
+    async def _fetch_room_safe(self, samsam_id):
+        try:
+            room = await self.fetch_room(samsam_id)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            failure("request_error", "❌ 요청 중 오류 발생: %s %s", samsam_id, e, level=logging.ERROR)
+        except Exception as e:
+            # Room과 마찬가지로 파싱 실패는 해당 방만 버림
+            failure("room_error", "❌ 처리 중 오류 발생: %s %r", samsam_id, e, level=logging.ERROR)
+        else:
+            room_done('ok')
+            return room
+        room_done('failed')
+        return None
+
+    async def iter_crawl(self, ids):
+        # 끝나는 순서대로 Room을 돌려줌 (실패한 방은 건너뜀)
+        # 동시에 concurrency개의 방만 처리하므로 ids가 아무리 많아도 메모리 사용량은 일정
+        ids = iter(ids)
+        pending = set()
+        try:
+            while True:
+                for id in ids:
+                    pending.add(asyncio.ensure_future(self._fetch_room_safe(id)))
+                    if len(pending) >= self.concurrency:
+                        break
+
+                if not pending:
+                    break
+
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    room = task.result()
+                    if room is not None:
+                        yield room
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def crawl(self, ids):
+        return [room async for room in self.iter_crawl(ids)]
+
+    async def crawl_to(self, ids, sink):
+        # 끝난 방을 바로 sink에 기록하고 기록한 방의 수를 반환
+        count = 0
+        async for room in self.iter_crawl(ids):
+            sink.write(room)
+            count += 1
+        sink.flush()
+        return count
+
+
+def crawl_rooms(ids, sink=None, **kwargs):
+    # 동기 코드에서 쓰기 위한 wrapper
+    # sink가 있으면 결과를 모으지 않고 sink에 기록한 방의 수를 반환
+    async def _run():
+        async with AsyncRoomCrawler(**kwargs) as crawler:
+            if sink is not None:
+                return await crawler.crawl_to(ids, sink)
+            return await crawler.crawl(ids)
+
+    return asyncio.run(_run())
@@ -0,0 +1,252 @@
+import asyncio
+import concurrent.futures
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# 여러 번의 실행 사이에 공유되는 로컬 캐시
+# 메모리 LRU를 먼저 보고, 없으면 SQLite 파일을 봄
+# 값은 json으로 저장하며 None도 저장할 수 있음(검색 결과 없음 같은 negative cache)
+CACHE_PATH = os.path.join(".cache", "crawler.sqlite3")
+
+MISSING = object()
+
+_connections = {}
+_connections_lock = threading.Lock()
+
+
+def _resolved(value):
+    future = concurrent.futures.Future()
+    future.set_result(value)
+    return future
+
+
+def _connect(path: str):
+    # 같은 파일을 쓰는 캐시끼리는 연결 하나를 공유
+    with _connections_lock:
+        if path not in _connections:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT, expires REAL NOT NULL, "
+                "PRIMARY KEY (namespace, key))"
+            )
+            _connections[path] = (connection, threading.Lock())
+        return _connections[path]
+
+
+class PersistentCache:
+    # namespace : 같은 파일 안에서 캐시를 구분하는 이름
+    # ttl : 값의 유효 시간(초), negative_ttl : None 값의 유효 시간(초)
+    # maxsize : 메모리 LRU에 들고 있을 최대 항목 수
+    # encode/decode : 메모리에는 객체로 두고 파일에는 json으로 저장할 때 변환 함수
+    def __init__(self, namespace: str, ttl: float, negative_ttl: float = None,
+                 maxsize: int = 4096, path: str = None, encode=None, decode=None):
+        self.namespace = namespace
+        self.encode = encode
+        self.decode = decode
+        self.ttl = ttl
+        self.negative_ttl = ttl if negative_ttl is None else negative_ttl
+        self.maxsize = maxsize
+        self.path = path
+        self.hits = 0
+        self.memory_hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self._ainflight = {}
+        self._finflight = {}
+        self._db = None
+
+    def _database(self):
+        if self._db is None:
+            self._db = _connect(self.path or CACHE_PATH)
+        return self._db
+
+    def get(self, key: str, default=MISSING):
+        value, source = self._lookup(key)
+        with self._lock:
+            if source is None:
+                self.misses += 1
+                return default
+            self.hits += 1
+            if source == "memory":
+                self.memory_hits += 1
+        return value
+
+    def _lookup(self, key: str):
+        # (값, 'memory' | 'disk' | None) 반환. 통계는 세지 않음
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._memory.move_to_end(key)
+                    return entry[1], "memory"
+                del self._memory[key]
+
+        connection, db_lock = self._database()
+        with db_lock:
+            row = connection.execute(
+                "SELECT value, expires FROM cache WHERE namespace = ? AND key = ?",
+                (self.namespace, key)
+            ).fetchone()
+
+        if row is None or row[1] <= now:
+            return MISSING, None
+
+        value = json.loads(row[0])
+        if value is not None and self.decode is not None:
+            value = self.decode(value)
+        with self._lock:
+            self._remember(key, row[1], value)
+        return value, "disk"
+
+    def set(self, key: str, value, ttl: float = None):
+        if ttl is None:
+            ttl = self.negative_ttl if value is None else self.ttl
+        expires = time.time() + ttl
+
+        with self._lock:
+            self._remember(key, expires, value)
+
+        if value is not None and self.encode is not None:
+            value = self.encode(value)
+
+        connection, db_lock = self._database()
+        with db_lock:
+            connection.execute(
+                "INSERT OR REPLACE INTO cache (namespace, key, value, expires) VALUES (?, ?, ?, ?)",
+                (self.namespace, key, json.dumps(value, ensure_ascii=False), expires)
+            )
+
+    def get_or_compute(self, key: str, compute):
+        # 같은 키를 여러 쓰레드가 동시에 찾으면 한 쓰레드만 compute를 실행하고 나머지는 결과를 기다림
+        # compute가 MISSING을 반환하면(요청 실패 등) 저장하지 않음
+        value = self.get(key)
+        if value is not MISSING:
+            return value
+
+        with self._lock:
+            key_lock = self._inflight.setdefault(key, threading.Lock())
+
+        with key_lock:
+            # 기다리는 동안 다른 쓰레드가 저장했을 수 있음
+            value, _ = self._lookup(key)
+            if value is MISSING:
+                value = compute()
+                if value is not MISSING:
+                    self.set(key, value)
+
+        with self._lock:
+            if self._inflight.get(key) is key_lock:
+                del self._inflight[key]
+        return value
+
+    async def aget_or_compute(self, key: str, compute):
+        # get_or_compute의 asyncio 버전. compute는 코루틴 함수
+        value = self.get(key)
+        if value is not MISSING:
+            return value
+
+        task = self._ainflight.get(key)
+        if task is None:
+            async def run():
+                value = await compute()
+                if value is not MISSING:
+                    self.set(key, value)
+                return value
+
+            task = asyncio.ensure_future(run())
+            self._ainflight[key] = task
+            task.add_done_callback(lambda _: self._ainflight.pop(key, None))
+        return await asyncio.shield(task)
+
+    def future_or_compute(self, key: str, compute):
+        # get_or_compute의 Future 버전. 값을 기다리는 동안 쓰레드를 막지 않음
+        # compute는 값 또는 값을 갖는 Future를 반환 (예: 프로세스 풀에 넘긴 파싱, parse_pool.py)
+        # 같은 키를 계산 중이면 그 Future를 같이 받음
+        value = self.get(key)
+        if value is not MISSING:
+            return _resolved(value)
+
+        with self._lock:
+            future = self._finflight.get(key)
+            if future is not None:
+                return future
+            future = self._finflight[key] = concurrent.futures.Future()
+
+        def finish(done):
+            # done : compute가 반환한 Future. 저장한 뒤에 in-flight에서 빼야 그 사이의 요청이 다시 계산하지 않음
+            try:
+                value = done.result()
+                if value is not MISSING:
+                    self.set(key, value)
+            except BaseException as e:
+                self._finflight.pop(key, None)
+                future.set_exception(e)
+                return
+            self._finflight.pop(key, None)
+            future.set_result(value)
+
+        try:
+            result = compute()
+        except BaseException as e:
+            self._finflight.pop(key, None)
+            future.set_exception(e)
+            return future
+
+        if not isinstance(result, concurrent.futures.Future):
+            result = _resolved(result)
+        result.add_done_callback(finish)
+        return future
+
+    def delete(self, key: str):
+        with self._lock:
+            self._memory.pop(key, None)
+        connection, db_lock = self._database()
+        with db_lock:
+            connection.execute("DELETE FROM cache WHERE namespace = ? AND key = ?", (self.namespace, key))
+
+    def purge_expired(self):
+        connection, db_lock = self._database()
+        with db_lock:
+            connection.execute("DELETE FROM cache WHERE namespace = ? AND expires <= ?", (self.namespace, time.time()))
+
+    def clear(self):
+        # 이 namespace의 모든 값과 통계를 지움 (벤치마크 등에서 빈 캐시로 시작할 때)
+        with self._lock:
+            self._memory.clear()
+            self.hits = self.memory_hits = self.misses = 0
+        connection, db_lock = self._database()
+        with db_lock:
+            connection.execute("DELETE FROM cache WHERE namespace = ?", (self.namespace,))
+
+    def _remember(self, key, expires, value):
+        self._memory[key] = (expires, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.maxsize:
+            self._memory.popitem(last=False)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "namespace": self.namespace,
+            "hits": self.hits,
+            "memory_hits": self.memory_hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+    def __str__(self):
+        stats = self.stats()
+        return "{} 캐시 : 적중 {}회 (메모리 {}회), 실패 {}회, 적중률 {:.1%}".format(
+            stats["namespace"], stats["hits"], stats["memory_hits"], stats["misses"], stats["hit_rate"])
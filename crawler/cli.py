@@ -0,0 +1,401 @@
+import argparse
+import logging
+import os
+import sys
+
+# python -m crawler <명령> ...
+#   search-map     : 지도 영역 안의 방 id를 한 줄에 하나씩 출력
+#   search-keyword : 키워드로 검색한 방 id를 한 줄에 하나씩 출력
+#   crawl          : 방 id(인자, --ids-file 또는 표준입력)나 지도 영역(--bbox)의 방을 크롤링해서 저장
+#   refresh        : 같은 run에서 끝난 방은 건너뛰고, 오래된 단계만 다시 요청해서 저장
+#   quote          : 방 x 시작일 x 주 예약 견적을 한 줄에 하나씩 저장
+#   analyze        : 크롤링 결과(.jsonl)의 지역별 단기/장기 임대 수익 비교
+#   nearby         : 크롤링 결과(.jsonl)에서 좌표 주변의 방과 네이버 매물 조회
+#   enqueue        : (coordinator) 검색한 방 id를 작업 큐에 넣음
+#   work           : (worker) 작업 큐에서 방을 빌려 크롤링해서 저장. 서버마다 여러 개 실행 가능
+#   history        : 가격/공실률 이력(--history로 쌓은 것)의 지역별 추이나 방 하나의 변경 이력
+#
+#   python -m crawler search-map 126.9401 37.5611 126.9340 37.5538 | python -m crawler crawl -o rooms.jsonl
+#
+# 진단 메시지는 표준에러로, 결과(id 목록)는 표준출력으로 나감
+# 명령을 고르기 전에는 requests, aiohttp, 파서 등을 불러오지 않으므로 --help 등은 바로 끝남
+BBOX_HELP = "north_east_lng north_east_lat south_west_lng south_west_lat"
+QUEUE_DEFAULT = os.environ.get("CRAWLER_QUEUE", os.path.join(".cache", "queue.sqlite3"))
+QUEUE_HELP = "작업 큐 (sqlite 파일 경로 또는 redis://host:port/db, 기본 : CRAWLER_QUEUE 환경변수)"
+
+# --옵션 이름 -> RoomFilter 필드
+FILTER_OPTIONS = [
+    ('min_using_fee', int), ('max_using_fee', int), ('min_rent', int), ('max_rent', int),
+    ('min_vacancy_rate', float), ('max_vacancy_rate', float), ('min_size', int), ('max_size', int),
+    ('max_deposit', int), ('max_monthly_rent', int),
+]
+
+
+def datetime_argument(value):
+    from datetime import datetime
+    return datetime.fromisoformat(value)
+
+
+def _read_ids(args):
+    ids = list(args.ids)
+    if args.ids_file:
+        with (sys.stdin if args.ids_file == '-' else open(args.ids_file, encoding='utf-8')) as f:
+            ids += [line.strip() for line in f if line.strip()]
+    elif not ids and not sys.stdin.isatty():
+        ids = [line.strip() for line in sys.stdin if line.strip()]
+    return ids
+
+
+def _print_ids(ids):
+    for id in ids:
+        print(id)
+
+
+def _log_cache_stats():
+    from .instrumentation import logger
+    from .room import GEOCODE_CACHE, NAVER_ID_CACHE, NAVER_COMPLEX_CACHE
+    from .vacancy import SCHEDULE_CACHE
+    for cache in (GEOCODE_CACHE, NAVER_ID_CACHE, NAVER_COMPLEX_CACHE, SCHEDULE_CACHE):
+        logger.info("%s", cache)
+
+
+def _load_comparables(args):
+    # 이전 크롤링 결과를 주변 매물 색인에 넣어두면 네이버에서 가격을 찾지 못한 방에 대신 사용 (--exact가 아닐 때)
+    if not args.comparables:
+        return
+    from .instrumentation import logger
+    from .records import RoomBatch
+    from .spatial import COMPARABLES
+    for path in args.comparables:
+        COMPARABLES.add_batch(RoomBatch.from_jsonl(path))
+    logger.info("%s", COMPARABLES)
+
+
+def _open_sink(args):
+    # --history가 있으면 결과 파일과 함께 이력 저장소에도 기록
+    from .sink import open_sink, MultiSink
+    sink = open_sink(args.output)
+    if args.history:
+        from .history import HistorySink
+        return MultiSink(sink, HistorySink(args.history))
+    return sink
+
+
+def search_map(args):
+    from .sam_search import sam_search_map, sam_search_map_tiled
+    if args.no_tiled:
+        ids = sam_search_map(*args.bbox, args.map_level, args.property_type)
+        if ids is None:
+            return 1
+    else:
+        ids, _, _ = sam_search_map_tiled(*args.bbox, args.map_level, args.property_type,
+                                         max_depth=args.max_depth)
+    _print_ids(ids)
+    return 0
+
+
+def search_keyword(args):
+    from .sam_search import sam_search_keyword
+    _print_ids(sam_search_keyword(args.keyword, args.property_type, args.max_iter))
+    return 0
+
+
+def crawl(args):
+    from .instrumentation import logger
+    from . import sam_search
+
+    _load_comparables(args)
+    options = {'duration': args.duration, 'exact': args.exact}
+    with _open_sink(args) as sink:
+        if args.bbox:
+            from .screening import RoomFilter
+            filters = RoomFilter(
+                property_types=tuple(args.property_type) if args.property_type else None,
+                room_types=tuple(args.room_type) if args.room_type else None,
+                **{name: getattr(args, name) for name, _ in FILTER_OPTIONS})
+            sam_search.crawl(args.bbox, filters, args.map_level, sink=sink, max_workers=args.workers, **options)
+        else:
+            ids = _read_ids(args)
+            if not ids:
+                logger.error("크롤링할 방 id가 없습니다. id, --ids-file 또는 --bbox를 지정하세요.")
+                return 2
+            if args.mode == 'async':
+                if args.workers:
+                    options['concurrency'] = args.workers
+                sam_search.process_in_event_loop(ids, sink=sink, **options)
+            elif args.mode == 'parse-pool':
+                if args.workers:
+                    options['network_workers'] = args.workers
+                sam_search.process_in_parse_pool(ids, sink=sink, **options)
+            else:
+                sam_search.process_in_thread_pool(ids, sink=sink, max_workers=args.workers, **options)
+        logger.info("%d개의 방을 %s에 저장했습니다.", sink.count, args.output)
+    _log_cache_stats()
+    return 0
+
+
+def refresh(args):
+    from .instrumentation import logger
+    from .sam_search import process_incremental
+
+    ids = _read_ids(args)
+    if not ids:
+        logger.error("다시 크롤링할 방 id가 없습니다. id 또는 --ids-file을 지정하세요.")
+        return 2
+    _load_comparables(args)
+    with _open_sink(args) as sink:
+        process_incremental(ids, run_id=args.run_id, sink=sink, max_workers=args.workers,
+                            duration=args.duration, exact=args.exact)
+        logger.info("%d개의 방을 %s에 저장했습니다.", sink.count, args.output)
+    _log_cache_stats()
+    return 0
+
+
+def quote(args):
+    from datetime import date
+    from .instrumentation import logger
+    from .sink import JsonlSink
+    from .quotes import RentQuoter
+
+    ids = _read_ids(args)
+    if not ids:
+        logger.error("견적을 받을 방 id가 없습니다. id 또는 --ids-file을 지정하세요.")
+        return 2
+    starts = [date.fromisoformat(start) for start in args.start] if args.start else None
+    with RentQuoter(starts, args.weeks, not args.no_skip_booked, args.workers) as quoter:
+        matrix = quoter.run(ids)
+    with JsonlSink(args.output) as sink:
+        for row in matrix.rows():
+            sink.write_record(row)
+    logger.info("%s", matrix)
+    return 0
+
+
+def analyze(args):
+    from .analytics import RoomAnalytics, REGION_GU, REGION_DONG
+    analytics = RoomAnalytics.from_jsonl(args.input)
+    summary = analytics.by_region(REGION_DONG if args.dong else REGION_GU, metric=args.metric)
+    print(summary.round(3).to_string())
+    if args.top:
+        print(analytics.top(args.top, args.metric).to_string())
+    return 0
+
+
+def nearby(args):
+    from .records import RoomBatch
+    from .spatial import ComparableIndex, NAVER, ROOM
+    index = ComparableIndex()
+    for path in args.input:
+        index.add_batch(RoomBatch.from_jsonl(path))
+    report = index.report(args.longitude, args.latitude, args.radius, args.size, args.tolerance)
+    print(" ".join("{}={}".format(key, value) for key, value in report.items()))
+    for kind in (NAVER, ROOM):
+        for d, comparable in index.nearest(args.longitude, args.latitude, args.k, args.radius, kind,
+                                           args.size, args.tolerance):
+            print("{}\t{}\t{:.0f}m\t{}평\t{}".format(
+                kind, comparable.key, d, comparable.size,
+                comparable.rent if kind == ROOM else "{}/{}".format(comparable.deposit, comparable.monthly_rent)))
+    return 0
+
+
+def enqueue(args):
+    from .instrumentation import logger
+    from .work_queue import open_queue, enqueue as put_ids
+    from .sam_search import enqueue_search
+
+    with open_queue(args.queue) as queue:
+        if args.stats:
+            print(queue)
+            return 0
+        if args.bbox or args.keyword:
+            enqueue_search(queue, args.bbox, args.keyword, args.map_level, args.property_type)
+        else:
+            ids = _read_ids(args)
+            if not ids:
+                logger.error("큐에 넣을 방 id가 없습니다. id, --ids-file, --bbox 또는 --keyword를 지정하세요.")
+                return 2
+            logger.info("%d개의 방을 큐에 넣었습니다. (%s)", put_ids(queue, ids), queue)
+    return 0
+
+
+def work(args):
+    from .instrumentation import logger
+    from .work_queue import open_queue
+    from .sam_search import process_from_queue
+
+    _load_comparables(args)
+    with open_queue(args.queue, visibility_timeout=args.visibility_timeout) as queue, _open_sink(args) as sink:
+        process_from_queue(queue, sink=sink, max_workers=args.workers, wait=args.wait,
+                           duration=args.duration, exact=args.exact)
+        logger.info("%d개의 방을 %s에 저장했습니다. (%s)", sink.count, args.output, queue)
+    _log_cache_stats()
+    return 0
+
+
+def history(args):
+    import json
+    import time
+    from datetime import datetime
+    from .instrumentation import logger
+    from .records import RoomBatch
+    from .history import HistoryStore
+
+    with HistoryStore(args.path) as store:
+        # 이전에 저장한 jsonl 파일 하나를 크롤링 한 번으로 추가 (시각 : 파일의 가장 이른 crawled_at)
+        for path in args.import_files or ():
+            with open(path, encoding='utf-8') as f:
+                crawled = [json.loads(line).get('crawled_at') for line in f if line.strip()]
+            crawled = [datetime.fromisoformat(value).timestamp() for value in crawled if value]
+            changed = store.append(RoomBatch.from_jsonl(path), min(crawled) if crawled else os.path.getmtime(path))
+            logger.info("%s : 바뀐 방 %d개", path, changed)
+        if args.import_files:
+            store.flush()
+            logger.info("%s", store)
+            return 0
+
+        end = args.end.timestamp() if args.end else time.time()
+        if args.rid:
+            frame = store.changes(rids=args.rid, start=end - args.days * 24 * 60 * 60, end=end)
+        else:
+            frame = store.trend(args.field, region=args.region, days=args.days, end=end)
+        print(frame.round({column: 4 for column in frame.select_dtypes('number').columns}).to_string())
+    return 0
+
+
+def _add_ids_arguments(parser):
+    parser.add_argument("ids", nargs="*", help="33m2 방 id (없으면 --ids-file 또는 표준입력)")
+    parser.add_argument("--ids-file", help="한 줄에 id 하나씩 적힌 파일 ('-'이면 표준입력)")
+
+
+def _add_crawl_arguments(parser):
+    parser.add_argument("-o", "--output", default="rooms.jsonl", help="저장할 곳 (.jsonl 파일 또는 .parquet 디렉터리)")
+    parser.add_argument("--workers", type=int, help="동시에 처리할 방의 수")
+    parser.add_argument("--duration", type=int, default=28, help="공실률과 가격을 계산할 기간(일)")
+    parser.add_argument("--exact", action="store_true", help="네이버 부동산에서 전용면적이 같은 매물만 사용")
+    parser.add_argument("--history", help="가격/공실률이 바뀐 방만 이 디렉터리의 이력 저장소에도 기록 (history.py)")
+    parser.add_argument("--comparables", action="append",
+                        help="이전 크롤링 결과(.jsonl). 네이버에서 가격을 찾지 못하면 주변 매물을 대신 사용")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m crawler", description="33m2 크롤러")
+    parser.add_argument("-v", "--verbose", action="store_true", help="방마다 찾은 내용도 출력")
+    parser.add_argument("-q", "--quiet", action="store_true", help="경고와 오류만 출력")
+    parser.add_argument("--parser", choices=["selectolax", "lxml", "bs4", "html.parser"],
+                        help="HTML 파서 (기본 : 설치된 것 중 가장 빠른 것)")
+    parser.add_argument("--transport", choices=["live", "record", "replay"],
+                        help="실제 요청 / 녹화 / 카세트 재생 (transport.py)")
+    parser.add_argument("--metrics-port", type=int, default=os.environ.get("CRAWLER_METRICS_PORT"),
+                        help="Prometheus /metrics를 제공할 포트")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    command = commands.add_parser("search-map", help="지도 영역 안의 방 id 출력")
+    command.add_argument("bbox", nargs=4, type=float, metavar="COORD", help=BBOX_HELP)
+    command.add_argument("--map-level", type=int, default=3)
+    command.add_argument("--property-type", default="오피스텔")
+    command.add_argument("--max-depth", type=int, default=8, help="영역을 나눌 최대 깊이")
+    command.add_argument("--no-tiled", action="store_true",
+                         help="영역을 나누지 않고 한 번만 요청 (최대 1000개)")
+    command.set_defaults(run=search_map)
+
+    command = commands.add_parser("search-keyword", help="키워드로 검색한 방 id 출력")
+    command.add_argument("keyword")
+    command.add_argument("--property-type", default="오피스텔")
+    command.add_argument("--max-iter", type=int, default=50, help="요청할 최대 페이지 수")
+    command.set_defaults(run=search_keyword)
+
+    command = commands.add_parser("crawl", help="방을 크롤링해서 저장")
+    _add_ids_arguments(command)
+    _add_crawl_arguments(command)
+    command.add_argument("--mode", choices=["threads", "async", "parse-pool"], default="threads")
+    command.add_argument("--bbox", nargs=4, type=float, metavar="COORD",
+                         help=BBOX_HELP + " (지도 영역의 방 중 조건에 맞는 방만 크롤링)")
+    command.add_argument("--map-level", type=int, default=3)
+    command.add_argument("--property-type", action="append", help="--bbox와 함께 사용. 여러 번 지정 가능")
+    command.add_argument("--room-type", action="append", help="--bbox와 함께 사용. 상세 페이지의 건물 유형")
+    for name, type in FILTER_OPTIONS:
+        command.add_argument("--" + name.replace("_", "-"), type=type, help="--bbox와 함께 사용")
+    command.set_defaults(run=crawl)
+
+    command = commands.add_parser("refresh", help="같은 run에서 끝나지 않은 방의 오래된 단계만 다시 크롤링")
+    _add_ids_arguments(command)
+    _add_crawl_arguments(command)
+    command.add_argument("--run-id", help="같은 run id로 다시 실행하면 끝난 방은 건너뜀 (기본 : 오늘 날짜)")
+    command.set_defaults(run=refresh)
+
+    command = commands.add_parser("quote", help="여러 시작일과 기간의 예약 견적 저장")
+    _add_ids_arguments(command)
+    command.add_argument("-o", "--output", default="quotes.jsonl")
+    command.add_argument("--start", action="append", help="견적 시작일 YYYY-MM-DD, 여러 번 지정 가능 (기본 : 다음 달 1일)")
+    command.add_argument("--weeks", nargs="+", type=int, default=[1, 4, 8, 12])
+    command.add_argument("--workers", type=int, default=64, help="동시에 요청할 견적 수")
+    command.add_argument("--no-skip-booked", action="store_true", help="예약된 날이 낀 기간도 요청")
+    command.set_defaults(run=quote)
+
+    command = commands.add_parser("analyze", help="지역별 단기 임대 수익과 네이버 월세 비교")
+    command.add_argument("input", help="crawl로 저장한 .jsonl 파일")
+    command.add_argument("--dong", action="store_true", help="구 대신 동별로 묶음")
+    command.add_argument("--metric", default="spread",
+                         choices=["short_term_net", "spread", "spread_ratio", "deposit_yield"])
+    command.add_argument("--top", type=int, default=0, help="metric이 가장 큰 방 N개도 출력")
+    command.set_defaults(run=analyze)
+
+    command = commands.add_parser("nearby", help="좌표 주변의 방과 네이버 매물, 시세 요약 출력")
+    command.add_argument("longitude", type=float)
+    command.add_argument("latitude", type=float)
+    command.add_argument("input", nargs="+", help="crawl로 저장한 .jsonl 파일")
+    command.add_argument("--radius", type=float, default=500, help="반경(m)")
+    command.add_argument("--size", type=int, help="전용면적(평)")
+    command.add_argument("--tolerance", type=int, default=1, help="전용면적 +-평")
+    command.add_argument("-k", type=int, default=10, help="종류별로 출력할 가까운 매물 수")
+    command.set_defaults(run=nearby)
+
+    command = commands.add_parser("enqueue", help="검색한 방 id를 작업 큐에 넣음 (coordinator)")
+    _add_ids_arguments(command)
+    command.add_argument("--queue", default=QUEUE_DEFAULT, help=QUEUE_HELP)
+    command.add_argument("--bbox", nargs=4, type=float, metavar="COORD", help=BBOX_HELP)
+    command.add_argument("--keyword")
+    command.add_argument("--map-level", type=int, default=3)
+    command.add_argument("--property-type", default="오피스텔")
+    command.add_argument("--stats", action="store_true", help="큐의 상태별 방 수만 출력")
+    command.set_defaults(run=enqueue)
+
+    command = commands.add_parser("work", help="작업 큐에서 방을 빌려 크롤링해서 저장 (worker)")
+    _add_crawl_arguments(command)
+    command.add_argument("--queue", default=QUEUE_DEFAULT, help=QUEUE_HELP)
+    command.add_argument("--visibility-timeout", type=float, default=300,
+                         help="빌린 방을 다른 worker에게 숨기는 시간(초). 처리 중에는 자동으로 늘림")
+    command.add_argument("--wait", action="store_true", help="큐가 비어도 끝내지 않고 새 방을 기다림")
+    command.set_defaults(run=work)
+
+    command = commands.add_parser("history", help="가격/공실률 이력의 추이 또는 방의 변경 이력 출력")
+    command.add_argument("--path", default=os.path.join(".cache", "history"), help="이력 저장소 디렉터리")
+    command.add_argument("--region", help="구 또는 동 이름 (예: 마포구)")
+    command.add_argument("--rid", action="append", help="방 id, 여러 번 지정 가능 (변경 이력 출력)")
+    command.add_argument("--field", default="vacancy_rate",
+                         choices=["rent", "long_term_discount", "management_fee", "cleaning_fee", "contract_fee",
+                                  "vacancy_rate", "deposit", "monthly_rent"])
+    command.add_argument("--days", type=float, default=90)
+    command.add_argument("--end", type=datetime_argument, help="기간의 끝 YYYY-MM-DD (기본 : 지금)")
+    command.add_argument("--import", dest="import_files", nargs="+", metavar="JSONL",
+                         help="이전 크롤링 결과 파일들을 (파일 하나를 크롤링 한 번으로) 추가")
+    command.set_defaults(run=history)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    # 환경변수로 읽는 설정은 해당 모듈을 처음 사용할 때 읽으므로 여기서 바꿔두면 됨
+    if args.parser:
+        os.environ["CRAWLER_PARSER"] = args.parser
+    if args.transport:
+        os.environ["CRAWLER_TRANSPORT"] = args.transport
+
+    from . import instrumentation
+    instrumentation.configure_logging(
+        logging.WARNING if args.quiet else logging.DEBUG if args.verbose else logging.INFO)
+    if args.metrics_port:
+        instrumentation.start_http_server(int(args.metrics_port))
+
+    return args.run(args)
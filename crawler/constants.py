@@ -0,0 +1,4 @@
+# 여러 모듈이 같이 쓰는 상수 (room을 불러오지 않고 사용할 수 있음)
+
+# 33m2 예약 견적의 항목 (Room.prices, 저장 파일의 prices 순서)
+ROOM_CONTRACT_DATA_LIST = ['임대료', '장기계약 할인', '관리비용', '청소비용', '계약 수수료']
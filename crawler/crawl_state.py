@@ -0,0 +1,250 @@
+import concurrent.futures
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import date
+
+from .room import Room, ROOM_STAGES, STAGE_EXECUTOR, ROOM_SIZE_TOLERANCE, Address, room_failed
+from .stages import run_stages, imap_unordered
+from .instrumentation import logger, room_done
+
+# 이어서 크롤링하기 / 바뀐 것만 다시 크롤링하기
+# 방마다 단계별로 마지막으로 가져온 시각, 응답 내용의 hash, 파싱 결과를 저장해두고
+# - 같은 run_id로 다시 실행하면 이미 끝난 방은 건너뜀
+# - 새 run_id(예: 매일 밤 새로고침)로 실행하면 유효기간이 지난 단계만 다시 요청
+STATE_PATH = os.path.join(".cache", "crawl_state.sqlite3")
+
+DAY = 24 * 60 * 60
+
+# 단계별 유효기간(초). 카카오 주소는 geocode 캐시가 따로 관리하므로 여기 없음
+STAGE_MAX_AGE = {
+    'detail': 7 * DAY,
+    'rent_fee': 1 * DAY,
+    'vacancy': 1 * DAY,
+    'land_price': 7 * DAY,
+}
+
+# 단계별로 저장하고 복원할 Room 필드
+STAGE_FIELDS = {
+    'detail': ['room_name', 'room_size_pyeong_sam', 'room_type', 'address_query'],
+    'rent_fee': ['prices'],
+    'vacancy': ['vacancy_rate'],
+    'land_price': ['naver_id', 'room_size_pyeong_naver', 'deposit', 'monthly_rent'],
+}
+
+
+def content_hash(text: str):
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+def default_run_id():
+    # 같은 날 다시 실행하면 이어서 크롤링
+    return date.today().isoformat()
+
+
+class CrawlState:
+    def __init__(self, path: str = STATE_PATH):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS run_rooms ("
+            "run_id TEXT NOT NULL, rid TEXT NOT NULL, finished_at REAL NOT NULL, "
+            "PRIMARY KEY (run_id, rid))"
+        )
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS stages ("
+            "rid TEXT NOT NULL, stage TEXT NOT NULL, fetched_at REAL NOT NULL, "
+            "content_hash TEXT, payload TEXT, PRIMARY KEY (rid, stage))"
+        )
+        self._lock = threading.Lock()
+
+    def finished(self, run_id: str):
+        with self._lock:
+            rows = self._connection.execute("SELECT rid FROM run_rooms WHERE run_id = ?", (run_id,)).fetchall()
+        return {row[0] for row in rows}
+
+    def mark_finished(self, run_id: str, rids):
+        now = time.time()
+        with self._lock:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO run_rooms (run_id, rid, finished_at) VALUES (?, ?, ?)",
+                [(run_id, str(rid), now) for rid in rids]
+            )
+
+    def load_stage(self, rid, stage: str):
+        # (가져온 시각, hash, payload) 또는 None
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT fetched_at, content_hash, payload FROM stages WHERE rid = ? AND stage = ?",
+                (str(rid), stage)
+            ).fetchone()
+        if row is None:
+            return None
+        return row[0], row[1], json.loads(row[2])
+
+    def save_stage(self, rid, stage: str, payload: dict, hash: str = None):
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO stages (rid, stage, fetched_at, content_hash, payload) VALUES (?, ?, ?, ?, ?)",
+                (str(rid), stage, time.time(), hash, json.dumps(payload, ensure_ascii=False))
+            )
+
+    def close(self):
+        self._connection.close()
+
+
+class IncrementalCrawler:
+    # Room의 단계 그래프(ROOM_STAGES)를 그대로 쓰되 단계마다 저장된 결과를 재사용할지 결정
+    def __init__(self, state: CrawlState = None, run_id: str = None, max_age: dict = None,
+                 duration: int = 28, exact: bool = False, tolerance: int = ROOM_SIZE_TOLERANCE):
+        self.state = state or CrawlState()
+        self.run_id = run_id or default_run_id()
+        self.max_age = dict(STAGE_MAX_AGE, **(max_age or {}))
+        self.duration = duration
+        self.exact = exact
+        self.tolerance = tolerance
+        self.fetched = {stage: 0 for stage in STAGE_FIELDS}
+        self.reused = {stage: 0 for stage in STAGE_FIELDS}
+        self._count_lock = threading.Lock()
+
+    def _fresh(self, stored, stage: str):
+        return stored is not None and time.time() - stored[0] < self.max_age[stage]
+
+    def _count(self, counter: dict, stage: str):
+        with self._count_lock:
+            counter[stage] += 1
+
+    def _restore(self, room: Room, stage: str, payload: dict):
+        for field in STAGE_FIELDS[stage]:
+            setattr(room, field, payload.get(field))
+        self._count(self.reused, stage)
+
+    def _save(self, room: Room, stage: str, hash: str = None):
+        payload = {field: getattr(room, field) for field in STAGE_FIELDS[stage]}
+        self.state.save_stage(room.sam_id, stage, payload, hash)
+        self._count(self.fetched, stage)
+
+    def build_room(self, rid) -> Room:
+        room = Room(rid, self.duration, fetch=False, exact=self.exact, tolerance=self.tolerance)
+        detail_changed = [True]
+
+        def detail():
+            stored = self.state.load_stage(rid, 'detail')
+            if self._fresh(stored, 'detail'):
+                detail_changed[0] = False
+                self._restore(room, 'detail', stored[2])
+                return
+
+            text = room.fetchDetail()
+            if text is None:
+                return False
+
+            # 상세 페이지가 바뀌지 않았으면 파싱 결과와 네이버 가격도 그대로 사용
+            hash = content_hash(text)
+            if stored is not None and stored[1] == hash:
+                detail_changed[0] = False
+                self._restore(room, 'detail', stored[2])
+            else:
+                room.parseLand(text)
+            self._save(room, 'detail', hash)
+
+        def address():
+            # geocode 캐시를 거치므로 한 번 찾은 주소는 다시 요청하지 않음
+            room.address = Address(room.address_query)
+
+        def rent_fee():
+            stored = self.state.load_stage(rid, 'rent_fee')
+            if self._fresh(stored, 'rent_fee'):
+                self._restore(room, 'rent_fee', stored[2])
+                return
+
+            text = room.fetchRentFee()
+            hash = content_hash(text)
+            if stored is not None and stored[1] == hash:
+                self._restore(room, 'rent_fee', stored[2])
+            else:
+                room.parseRentFee(text)
+            # 견적을 받지 못했으면 저장하지 않고 다음 실행에서 다시 요청
+            if room.prices['임대료'] is not None:
+                self._save(room, 'rent_fee', hash)
+
+        def vacancy():
+            stored = self.state.load_stage(rid, 'vacancy')
+            if self._fresh(stored, 'vacancy'):
+                self._restore(room, 'vacancy', stored[2])
+                return
+
+            room.updateVacancyRate(self.duration)
+            if room.vacancy_calendar.missing_month(self.duration) is None:
+                self._save(room, 'vacancy')
+
+        def land_price():
+            stored = self.state.load_stage(rid, 'land_price')
+            if not detail_changed[0] and self._fresh(stored, 'land_price'):
+                self._restore(room, 'land_price', stored[2])
+                return
+
+            room.updateLandPrice(exact=self.exact, tolerance=self.tolerance)
+            if room.deposit is not None:
+                self._save(room, 'land_price')
+
+        functions = {
+            'detail': detail,
+            'address': address,
+            'rent_fee': rent_fee,
+            'vacancy': vacancy,
+            'land_price': land_price,
+        }
+        run_stages({name: (deps, functions[name]) for name, deps in ROOM_STAGES.items()}, STAGE_EXECUTOR)
+        return room
+
+    def crawl(self, ids, sink=None, max_workers=None, batch_size: int = 100):
+        # 이번 run에서 이미 끝난 방은 건너뜀
+        # sink에 기록한 뒤 batch_size개씩 끝난 것으로 표시하므로, 중간에 멈춰도 기록되지 않은 방은 다시 크롤링
+        finished = self.state.finished(self.run_id)
+        if finished:
+            logger.info("이미 크롤링한 %d개의 방은 건너뜁니다. (run : %s)", len(finished), self.run_id)
+
+        done_ids = []
+
+        def commit():
+            if sink is not None:
+                sink.flush()
+            self.state.mark_finished(self.run_id, done_ids)
+            done_ids.clear()
+
+        # 중간에 예외로 멈춰도 sink에 기록한 방은 끝난 것으로 표시 (다시 실행할 때 중복 기록하지 않음)
+        try:
+            with concurrent.futures.ThreadPoolExecutor(max_workers) as executor:
+                todo = (id for id in ids if str(id) not in finished)
+                for room in imap_unordered(executor, self.build_room_safe, todo):
+                    if room is None:
+                        continue
+                    if sink is not None:
+                        sink.write(room)
+                    done_ids.append(room.sam_id)
+                    if len(done_ids) >= batch_size:
+                        commit()
+        finally:
+            commit()
+
+    def build_room_safe(self, rid):
+        # 오류가 난 방은 실패로 세고 None (끝난 것으로 표시하지 않으므로 다음 실행에서 다시 크롤링)
+        try:
+            room = self.build_room(rid)
+        except Exception as e:
+            room_failed(rid, e)
+            return None
+        room_done('ok')
+        return room
+
+    def __str__(self):
+        return "\n".join("{} : 요청 {}회, 재사용 {}회".format(stage, self.fetched[stage], self.reused[stage])
+                         for stage in STAGE_FIELDS)
@@ -0,0 +1,378 @@
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+from .records import RoomRecord
+
+# 방마다 가격, 공실률, 네이버 월세가 언제 어떻게 바뀌었는지 저장하는 로컬 시계열 저장소
+# 크롤링할 때마다 모든 방을 저장하지 않고, 직전 값과 달라진 방만 한 줄(바뀐 시각, 모든 값)로 저장
+# -> 크롤링 횟수가 아니라 바뀐 횟수만큼 커짐 (크롤링 시각 목록과 방 목록은 따로 한 번씩만 저장)
+#
+# 디렉터리 구성
+#   meta.json          : 방 사전(방 번호 -> sam_id, 구, 동, 마지막으로 본 시각), 지역명 사전, 크롤링 시각, 세그먼트 목록
+#   segment-000001.npz : 바뀐 줄들을 (방 번호, 시각) 순으로 정렬한 열 단위 세그먼트 (한 번 쓰면 바꾸지 않음)
+#                        열마다 앞 줄과의 차이(delta)를 담을 수 있는 가장 작은 정수형으로 저장하고 압축
+#                        값이 없으면(None) null_<열> 비트마스크
+#
+#   store = HistoryStore(".cache/history")
+#   store.append(records)                                  # RoomRecord들 또는 RoomBatch (크롤링 한 번)
+#   store.flush()
+#   store.trend('vacancy_rate', region='마포구', days=90)  # 크롤링 시각별 방 수/평균/중앙값
+#   store.series('vacancy_rate', region='마포구', days=90) # 크롤링 시각 x 방
+#   store.changes(rids=[38048])                            # 한 방의 변경 이력
+HISTORY_PATH = os.path.join(".cache", "history")
+HISTORY_FIELDS = ('rent', 'long_term_discount', 'management_fee', 'cleaning_fee', 'contract_fee',
+                  'vacancy_rate', 'deposit', 'monthly_rent')
+# 정수로 저장하기 위해 곱하는 값 (공실률은 소수)
+FIELD_SCALE = {'vacancy_rate': 10 ** 6}
+
+SEGMENT_ROWS = 100000
+DAY = 24 * 60 * 60
+
+NULL = np.iinfo(np.int64).min
+_NARROW_TYPES = (np.int8, np.int16, np.int32, np.int64)
+
+
+def _encode(value, field: str):
+    if value is None or value != value:  # None 또는 NaN
+        return NULL
+    return int(round(float(value) * FIELD_SCALE.get(field, 1)))
+
+
+def _narrow(array):
+    # 값을 담을 수 있는 가장 작은 정수형
+    if len(array) == 0:
+        return array.astype(np.int8)
+    low, high = array.min(), array.max()
+    for dtype in _NARROW_TYPES:
+        info = np.iinfo(dtype)
+        if info.min <= low and high <= info.max:
+            return array.astype(dtype)
+    return array
+
+
+def write_segment(path: str, rids, timestamps, values):
+    # rids, timestamps : int64 배열, values : (줄 수, len(HISTORY_FIELDS)) int64 배열
+    order = np.lexsort((timestamps, rids))
+    rids, timestamps, values = rids[order], timestamps[order], values[order]
+    arrays = {'rid': _narrow(np.diff(rids, prepend=0)), 'ts': _narrow(np.diff(timestamps, prepend=0))}
+    for i, field in enumerate(HISTORY_FIELDS):
+        column = values[:, i]
+        null = column == NULL
+        if null.any():
+            arrays['null_' + field] = np.packbits(null)
+            column = np.where(null, 0, column)
+        arrays[field] = _narrow(np.diff(column, prepend=0))
+    with open(path, 'wb') as f:
+        np.savez_compressed(f, **arrays)
+
+
+def read_segment(path: str):
+    # (rids, timestamps, values) - write_segment의 반대. (방 번호, 시각) 순으로 정렬되어 있음
+    with np.load(path) as data:
+        rids = np.cumsum(data['rid'], dtype=np.int64)
+        timestamps = np.cumsum(data['ts'], dtype=np.int64)
+        values = np.empty((len(rids), len(HISTORY_FIELDS)), dtype=np.int64)
+        for i, field in enumerate(HISTORY_FIELDS):
+            values[:, i] = np.cumsum(data[field], dtype=np.int64)
+            if 'null_' + field in data.files:
+                null = np.unpackbits(data['null_' + field], count=len(rids)).astype(bool)
+                values[null, i] = NULL
+    return rids, timestamps, values
+
+
+def _last_per_rid(rids):
+    # (방 번호, 시각) 순으로 정렬된 rids에서 방마다 마지막 줄
+    if len(rids) == 0:
+        return np.zeros(0, dtype=bool)
+    return np.r_[rids[1:] != rids[:-1], True]
+
+
+class HistoryStore:
+    # segment_rows : 바뀐 줄이 이만큼 모이면 세그먼트 하나로 내려씀 (flush/close에서도 내려씀)
+    def __init__(self, path: str = HISTORY_PATH, segment_rows: int = SEGMENT_ROWS):
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.segment_rows = segment_rows
+        self._lock = threading.RLock()
+
+        meta = {'rooms': [], 'strings': [], 'crawls': [], 'segments': []}
+        if os.path.exists(self._meta_path()):
+            with open(self._meta_path(), encoding='utf-8') as f:
+                meta.update(json.load(f))
+        self.rooms = meta['rooms']        # [[sam_id, 구 번호, 동 번호, 마지막으로 본 시각], ...] (방 번호 순)
+        self.strings = meta['strings']    # 지역명 사전
+        self.crawls = meta['crawls']      # 크롤링 시각들
+        self.segments = meta['segments']  # [{'file', 'rows', 'ts_min', 'ts_max'}, ...]
+        self._room_codes = {room[0]: code for code, room in enumerate(self.rooms)}
+        self._string_codes = {string: code for code, string in enumerate(self.strings)}
+        self._segment_cache = {}  # 파일 이름 -> read_segment 결과 (세그먼트는 바뀌지 않음)
+        self._buffer = []
+        self._dirty = False
+        self.latest = self._load_latest()  # 방 번호 -> 마지막으로 저장한 값들
+
+    def _meta_path(self):
+        return os.path.join(self.path, "meta.json")
+
+    def _segment(self, segment: dict):
+        data = self._segment_cache.get(segment['file'])
+        if data is None:
+            data = read_segment(os.path.join(self.path, segment['file']))
+            self._segment_cache[segment['file']] = data
+        return data
+
+    def _load_latest(self):
+        latest = {}
+        for segment in self.segments:
+            rids, _, values = self._segment(segment)
+            last = _last_per_rid(rids)
+            latest.update(zip(rids[last].tolist(), map(tuple, values[last].tolist())))
+        return latest
+
+    def _string(self, value):
+        if value is None:
+            return -1
+        code = self._string_codes.get(value)
+        if code is None:
+            code = self._string_codes[value] = len(self.strings)
+            self.strings.append(value)
+        return code
+
+    def _room(self, sam_id: int, gu: str, dong: str, timestamp: int):
+        code = self._room_codes.get(sam_id)
+        if code is None:
+            code = self._room_codes[sam_id] = len(self.rooms)
+            self.rooms.append([sam_id, -1, -1, timestamp])
+        room = self.rooms[code]
+        # 주소를 찾지 못한 크롤링에서는 지역을 지우지 않음
+        if gu is not None:
+            room[1], room[2] = self._string(gu), self._string(dong)
+        room[3] = max(room[3], timestamp)
+        return code
+
+    @staticmethod
+    def _rows(records):
+        # (sam_id, 구, 동, 값들) - RoomBatch는 열에서 바로 읽음
+        if hasattr(records, 'column'):
+            columns = [records.column(name) for name in ('sam_id', 'region_2depth_name', 'region_3depth_name')]
+            values = [records.column(field) for field in HISTORY_FIELDS]
+            for (sam_id, gu, dong), row in zip(zip(*columns), zip(*values)):
+                if sam_id == sam_id:
+                    yield (int(sam_id), gu, dong,
+                           tuple(_encode(value, field) for value, field in zip(row, HISTORY_FIELDS)))
+            return
+
+        for record in records:
+            if record.sam_id is None:
+                continue
+            jibun = record.address.jibun if record.address else None
+            yield (int(record.sam_id), getattr(jibun, 'region_2depth_name', None),
+                   getattr(jibun, 'region_3depth_name', None),
+                   tuple(_encode(getattr(record, field), field) for field in HISTORY_FIELDS))
+
+    def append(self, records, timestamp: float = None):
+        # 크롤링 한 번의 결과(RoomRecord들 또는 RoomBatch)를 timestamp(기본 : 지금) 시각으로 추가
+        # 바뀐 방의 수를 반환
+        timestamp = int(time.time() if timestamp is None else timestamp)
+        changed = 0
+        with self._lock:
+            for sam_id, gu, dong, values in self._rows(records):
+                code = self._room(sam_id, gu, dong, timestamp)
+                if self.latest.get(code) != values:
+                    self.latest[code] = values
+                    self._buffer.append((code, timestamp, values))
+                    changed += 1
+            if not self.crawls or self.crawls[-1] != timestamp:
+                self.crawls.append(timestamp)
+            self._dirty = True
+            if len(self._buffer) >= self.segment_rows:
+                self.flush()
+        return changed
+
+    def flush(self):
+        with self._lock:
+            if self._buffer:
+                rids = np.array([row[0] for row in self._buffer], dtype=np.int64)
+                timestamps = np.array([row[1] for row in self._buffer], dtype=np.int64)
+                values = np.array([row[2] for row in self._buffer], dtype=np.int64)
+                name = "segment-{:06d}.npz".format(len(self.segments) + 1)
+                write_segment(os.path.join(self.path, name), rids, timestamps, values)
+                self.segments.append({'file': name, 'rows': len(rids),
+                                      'ts_min': int(timestamps.min()), 'ts_max': int(timestamps.max())})
+                self._buffer = []
+            if self._dirty or not os.path.exists(self._meta_path()):
+                self._save_meta()
+                self._dirty = False
+
+    def _save_meta(self):
+        # 임시 파일에 쓰고 바꿔치기 (쓰는 중에 죽어도 이전 meta.json은 남음)
+        temporary = self._meta_path() + ".tmp"
+        with open(temporary, 'w', encoding='utf-8') as f:
+            json.dump({'rooms': self.rooms, 'strings': self.strings, 'crawls': self.crawls,
+                       'segments': self.segments}, f, ensure_ascii=False)
+        os.replace(temporary, self._meta_path())
+
+    def _select(self, rids=None, region: str = None):
+        # 조회할 방 번호 배열 (None이면 모든 방)
+        if rids is None and region is None:
+            return None
+        if rids is not None:
+            codes = [self._room_codes.get(int(rid)) for rid in rids]
+            return np.array(sorted(code for code in codes if code is not None), dtype=np.int64)
+        # 구 또는 동 이름
+        region_code = self._string_codes.get(region)
+        if region_code is None:
+            return np.zeros(0, dtype=np.int64)
+        return np.array([code for code, room in enumerate(self.rooms) if region_code in (room[1], room[2])],
+                        dtype=np.int64)
+
+    def _range(self, rids=None, region: str = None, start: float = None, end: float = None):
+        # start 이전 마지막 값(그 시점의 값)과 [start, end]에 바뀐 줄 -> (rids, timestamps, values)
+        self.flush()
+        codes = self._select(rids, region)
+        parts = []
+        for segment in self.segments:
+            if end is not None and segment['ts_min'] > end:
+                continue
+            segment_rids, timestamps, values = self._segment(segment)
+            if codes is not None:
+                # 세그먼트는 방 번호 순으로 정렬되어 있으므로 방마다 구간만 잘라냄
+                left = np.searchsorted(segment_rids, codes, 'left')
+                right = np.searchsorted(segment_rids, codes, 'right')
+                index = np.concatenate([np.arange(l, r) for l, r in zip(left, right) if r > l] or
+                                       [np.zeros(0, dtype=np.int64)])
+            else:
+                index = np.arange(len(segment_rids))
+            if end is not None:
+                index = index[timestamps[index] <= end]
+            parts.append((segment_rids[index], timestamps[index], values[index]))
+
+        if not parts:
+            return np.zeros(0, np.int64), np.zeros(0, np.int64), np.zeros((0, len(HISTORY_FIELDS)), np.int64)
+        rids, timestamps, values = (np.concatenate(column) for column in zip(*parts))
+        order = np.lexsort((timestamps, rids))
+        rids, timestamps, values = rids[order], timestamps[order], values[order]
+
+        if start is not None:
+            # start 이전 줄은 방마다 마지막 줄만 남김
+            before = timestamps < start
+            keep = ~before | (before & np.r_[(rids[1:] != rids[:-1]) | ~before[1:], True])
+            rids, timestamps, values = rids[keep], timestamps[keep], values[keep]
+        return rids, timestamps, values
+
+    def _frame(self, rids, timestamps, values, fields):
+        import pandas as pd
+        columns = {'sam_id': np.array([room[0] for room in self.rooms], dtype=np.int64)[rids],
+                   'timestamp': pd.to_datetime(timestamps, unit='s')}
+        for field in fields:
+            column = values[:, HISTORY_FIELDS.index(field)]
+            columns[field] = np.where(column == NULL, np.nan, column / FIELD_SCALE.get(field, 1))
+        return pd.DataFrame(columns)
+
+    def _window(self, start, end, days):
+        if days is not None:
+            end = time.time() if end is None else end
+            start = end - days * DAY
+        return start, end
+
+    def changes(self, rids=None, region: str = None, start: float = None, end: float = None, days: float = None,
+                fields=HISTORY_FIELDS):
+        # 바뀐 줄들 (sam_id, timestamp, fields...). start가 있으면 start 시점의 값도 한 줄씩 포함
+        start, end = self._window(start, end, days)
+        with self._lock:
+            return self._frame(*self._range(rids, region, start, end), fields)
+
+    def series(self, field: str = 'vacancy_rate', rids=None, region: str = None, start: float = None,
+               end: float = None, days: float = None):
+        # 크롤링 시각 x 방(sam_id)의 field 값. 처음 보기 전과 마지막으로 본 뒤는 NaN
+        import pandas as pd
+        start, end = self._window(start, end, days)
+        with self._lock:
+            rids, timestamps, values = self._range(rids, region, start, end)
+            crawls = np.array([t for t in self.crawls if (start is None or t >= start) and (end is None or t <= end)],
+                              dtype=np.int64)
+            last_seen = np.array([room[3] for room in self.rooms], dtype=np.int64)
+            frame = self._frame(rids, timestamps, values, (field,))
+
+        index = pd.to_datetime(crawls, unit='s')
+        if frame.empty:
+            return pd.DataFrame(index=index)
+        # start 이전 값은 start 시각의 값으로 봄
+        if start is not None:
+            frame['timestamp'] = frame['timestamp'].clip(lower=pd.to_datetime(int(start), unit='s'))
+        wide = frame.drop_duplicates(['timestamp', 'sam_id'], keep='last').pivot(
+            index='timestamp', columns='sam_id', values=field)
+        wide = wide.reindex(wide.index.union(index)).ffill().reindex(index)
+        # 마지막으로 본 뒤(목록에서 빠진 방)는 값이 없음
+        seen = last_seen[[self._room_codes[sam_id] for sam_id in wide.columns]]
+        return wide.where(crawls[:, None] <= seen[None, :])
+
+    def trend(self, field: str = 'vacancy_rate', rids=None, region: str = None, start: float = None,
+              end: float = None, days: float = None):
+        # 크롤링 시각별 방 수, 평균, 중앙값
+        import pandas as pd
+        wide = self.series(field, rids, region, start, end, days)
+        return pd.DataFrame({'rooms': wide.count(axis=1), 'mean': wide.mean(axis=1), 'median': wide.median(axis=1)})
+
+    def size(self):
+        # 디스크에서 차지하는 바이트 수
+        return sum(os.path.getsize(os.path.join(self.path, name)) for name in os.listdir(self.path))
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __str__(self):
+        return "HistoryStore {} : 방 {}개, 크롤링 {}번, 바뀐 줄 {}개 (세그먼트 {}개, {:.1f} KB)".format(
+            self.path, len(self.rooms), len(self.crawls), sum(segment['rows'] for segment in self.segments),
+            len(self.segments), self.size() / 1024)
+
+
+class HistorySink:
+    # 크롤링 결과를 HistoryStore에 추가하는 sink (sink.MultiSink로 jsonl 등과 같이 사용)
+    # 크롤링 한 번을 sink를 연 시각 하나로 저장하고, batch_size개마다 store에 넘김
+    def __init__(self, path: str = HISTORY_PATH, timestamp: float = None, batch_size: int = 1000):
+        self.store = HistoryStore(path)
+        self.timestamp = time.time() if timestamp is None else timestamp
+        self.batch_size = batch_size
+        self.count = 0
+        self._records = []
+        self._lock = threading.Lock()
+
+    def write(self, room):
+        self._add(RoomRecord.from_room(room))
+
+    def write_record(self, record: dict):
+        self._add(RoomRecord.from_dict(record))
+
+    def _add(self, record: RoomRecord):
+        with self._lock:
+            self._records.append(record)
+            self.count += 1
+            if len(self._records) >= self.batch_size:
+                self.store.append(self._records, self.timestamp)
+                self._records = []
+
+    def flush(self):
+        with self._lock:
+            if self._records:
+                self.store.append(self._records, self.timestamp)
+                self._records = []
+            self.store.flush()
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,306 @@
+import asyncio
+import random
+import threading
+import time
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .transport import transport_from_env
+from .instrumentation import span, REGISTRY, Gauge, HTTP_REQUESTS, HTTP_RETRIES
+
+# 호스트별 요청 스케줄러
+# - 토큰 버킷으로 초당 요청 수를 제한
+# - AIMD로 동시 요청 수를 조절 (429/5xx/느린 응답이면 절반으로, 정상이면 1씩 증가)
+# - 실패한 요청은 jitter를 준 지수 backoff 후 재시도
+# 실제 전송은 transport가 담당 (녹화/재생, transport.py)
+# 요청마다 'http' span과 호스트/상태별 카운터를 남김 (instrumentation.py)
+
+
+@dataclass
+class HostPolicy:
+    rate: float                     # 초당 요청 수
+    burst: int                      # 한 번에 몰아서 보낼 수 있는 요청 수
+    concurrency: int = 8            # 처음 동시 요청 수
+    min_concurrency: int = 1
+    max_concurrency: int = 64
+    slow: float = 5.0               # 이보다 오래 걸린 응답은 혼잡 신호로 봄(초)
+
+
+HOST_POLICIES = {
+    '33m2.co.kr': HostPolicy(rate=50, burst=50, concurrency=16, max_concurrency=64),
+    'dapi.kakao.com': HostPolicy(rate=20, burst=20, concurrency=8, max_concurrency=32),
+    'm.land.naver.com': HostPolicy(rate=10, burst=10, concurrency=4, max_concurrency=16),
+    'fin.land.naver.com': HostPolicy(rate=10, burst=10, concurrency=4, max_concurrency=16),
+}
+DEFAULT_POLICY = HostPolicy(rate=20, burst=20)
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        # 토큰 하나를 예약하고 기다려야 하는 시간(초)을 반환
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+
+class AIMDController:
+    # additive increase / multiplicative decrease
+    def __init__(self, policy: HostPolicy):
+        self.policy = policy
+        self.limit = float(policy.concurrency)
+        self._lock = threading.Lock()
+
+    def on_success(self, latency: float):
+        with self._lock:
+            if latency > self.policy.slow:
+                self._decrease()
+            else:
+                self.limit = min(self.policy.max_concurrency, self.limit + 1 / max(self.limit, 1))
+
+    def on_failure(self):
+        with self._lock:
+            self._decrease()
+
+    def _decrease(self):
+        self.limit = max(self.policy.min_concurrency, self.limit / 2)
+
+
+class HostState:
+    def __init__(self, policy: HostPolicy):
+        self.policy = policy
+        self.bucket = TokenBucket(policy.rate, policy.burst)
+        self.controller = AIMDController(policy)
+        self.in_flight = 0
+        self.condition = threading.Condition()
+        self._async_condition = None # (event loop, asyncio.Condition)
+
+    def try_acquire(self):
+        with self.condition:
+            if self.in_flight < int(self.controller.limit):
+                self.in_flight += 1
+                return True
+            return False
+
+    def acquire(self):
+        with self.condition:
+            while self.in_flight >= int(self.controller.limit):
+                self.condition.wait()
+            self.in_flight += 1
+
+    def release(self):
+        with self.condition:
+            self.in_flight -= 1
+            self.condition.notify()
+
+    def async_condition(self):
+        # asyncio.Condition은 만들어진 event loop에서만 쓸 수 있으므로 loop마다 새로 만듦
+        loop = asyncio.get_running_loop()
+        if self._async_condition is None or self._async_condition[0] is not loop:
+            self._async_condition = (loop, asyncio.Condition())
+        return self._async_condition[1]
+
+    async def aacquire(self):
+        condition = self.async_condition()
+        async with condition:
+            while not self.try_acquire():
+                # 다른 쓰레드가 release한 경우는 알림을 못 받으므로 주기적으로 다시 확인
+                try:
+                    await asyncio.wait_for(condition.wait(), 0.1)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def arelease(self):
+        self.release()
+        condition = self.async_condition()
+        async with condition:
+            condition.notify()
+
+
+def retry_after(headers):
+    # Retry-After 헤더(초 또는 날짜)를 초로 변환
+    value = headers.get('Retry-After') if headers else None
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class RequestScheduler:
+    def __init__(self, policies: dict = None, retries: int = 3, backoff: float = 0.5,
+                 max_backoff: float = 30.0, pool_size: int = 64, transport=None):
+        self.policies = HOST_POLICIES if policies is None else policies
+        self._transport = transport
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.hosts = {}
+        self._hosts_lock = threading.Lock()
+
+        # 모든 쓰레드가 커넥션 풀을 공유
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=16, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    @property
+    def transport(self):
+        # 환경변수(CRAWLER_TRANSPORT)로 정하는 transport는 처음 요청할 때 만듦 (카세트 파일을 import 시점에 열지 않음)
+        if self._transport is None:
+            self._transport = transport_from_env()
+        return self._transport
+
+    @transport.setter
+    def transport(self, transport):
+        self._transport = transport
+
+    def host(self, url: str):
+        return self.host_state(urlsplit(url).hostname or '')
+
+    def host_state(self, hostname: str):
+        with self._hosts_lock:
+            if hostname not in self.hosts:
+                self.hosts[hostname] = HostState(self.policies.get(hostname, DEFAULT_POLICY))
+            return self.hosts[hostname]
+
+    def host_states(self):
+        # (호스트 이름, HostState) 목록. 다른 쓰레드가 새 호스트를 등록하는 중에도 읽을 수 있게 복사해서 반환
+        with self._hosts_lock:
+            return list(self.hosts.items())
+
+    def backoff_delay(self, attempt: int, headers=None):
+        # full jitter : 0 ~ min(max_backoff, backoff * 2^attempt) 사이 임의 시간
+        delay = retry_after(headers)
+        if delay is not None:
+            return min(self.max_backoff, delay)
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    def request(self, method: str, url: str, session=None, **kwargs):
+        hostname = urlsplit(url).hostname or ''
+        state = self.host_state(hostname)
+        session = session or self.session
+
+        for attempt in range(self.retries + 1):
+            error = None
+            state.acquire()
+            try:
+                time.sleep(state.bucket.reserve())
+                with span('http', host=hostname, method=method) as s:
+                    started = time.monotonic()
+                    response = self.transport.send(session, method, url, **kwargs)
+                    latency = time.monotonic() - started
+                    s.set(status=response.status_code)
+            except requests.RequestException as e:
+                error = e
+            finally:
+                state.release()
+
+            if error is not None:
+                state.controller.on_failure()
+                HTTP_REQUESTS.inc(host=hostname, status=type(error).__name__)
+                if attempt == self.retries:
+                    raise error
+                HTTP_RETRIES.inc(host=hostname, reason=type(error).__name__)
+                time.sleep(self.backoff_delay(attempt))
+                continue
+
+            HTTP_REQUESTS.inc(host=hostname, status=response.status_code)
+            if response.status_code in RETRY_STATUS:
+                state.controller.on_failure()
+                if attempt < self.retries:
+                    HTTP_RETRIES.inc(host=hostname, reason=response.status_code)
+                    time.sleep(self.backoff_delay(attempt, response.headers))
+                    continue
+            else:
+                state.controller.on_success(latency)
+            return response
+
+    def get(self, url: str, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    async def arequest(self, session, method: str, url: str, read, **kwargs):
+        # aiohttp 버전. read(response)는 응답 본문을 읽는 코루틴 함수
+        # (status, read 결과, 최종 url)을 반환
+        import aiohttp
+
+        hostname = urlsplit(url).hostname or ''
+        state = self.host_state(hostname)
+
+        for attempt in range(self.retries + 1):
+            error = None
+            await state.aacquire()
+            try:
+                await asyncio.sleep(state.bucket.reserve())
+                with span('http', host=hostname, method=method) as s:
+                    started = time.monotonic()
+                    async with self.transport.asend(session, method, url, **kwargs) as response:
+                        status = response.status
+                        headers = response.headers
+                        final_url = str(response.url)
+                        body = await read(response)
+                    latency = time.monotonic() - started
+                    s.set(status=status)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                error = e
+            finally:
+                await state.arelease()
+
+            if error is not None:
+                state.controller.on_failure()
+                HTTP_REQUESTS.inc(host=hostname, status=type(error).__name__)
+                if attempt == self.retries:
+                    raise error
+                HTTP_RETRIES.inc(host=hostname, reason=type(error).__name__)
+                await asyncio.sleep(self.backoff_delay(attempt))
+                continue
+
+            HTTP_REQUESTS.inc(host=hostname, status=status)
+            if status in RETRY_STATUS:
+                state.controller.on_failure()
+                if attempt < self.retries:
+                    HTTP_RETRIES.inc(host=hostname, reason=status)
+                    await asyncio.sleep(self.backoff_delay(attempt, headers))
+                    continue
+            else:
+                state.controller.on_success(latency)
+            return status, body, final_url
+
+    def stats(self):
+        return {hostname: {"limit": state.controller.limit, "in_flight": state.in_flight}
+                for hostname, state in self.host_states()}
+
+
+# room.py, sam_search.py 등이 같이 쓰는 스케줄러
+SCHEDULER = RequestScheduler()
+
+# 호스트별 AIMD 동시 요청 한도와 진행중인 요청 수
+REGISTRY.register(Gauge("crawler_host_concurrency_limit", "AIMD concurrency limit per host", ("host",),
+                        lambda: {(hostname,): state.controller.limit for hostname, state in SCHEDULER.host_states()}))
+REGISTRY.register(Gauge("crawler_host_in_flight", "Requests in flight per host", ("host",),
+                        lambda: {(hostname,): state.in_flight for hostname, state in SCHEDULER.host_states()}))
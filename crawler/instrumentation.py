@@ -0,0 +1,337 @@
+import bisect
+import logging
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 크롤러 계측 (span, 실패 사유별 카운터, Prometheus 형식 exporter)
+# 꺼져 있으면 span()은 아무것도 하지 않는 객체를 돌려주고 카운터는 바로 반환하므로 비용이 거의 없음
+# 켜는 방법 : enable(), start_http_server(port), 또는 CRAWLER_METRICS=1
+#   python -m crawler --metrics-port 9108 ... 이면 /metrics exporter도 시작
+#
+# span 이름
+#   http  : 요청 한 번 (재시도마다 따로), attrs : host, method, status
+#   stage : 방 하나를 만드는 단계 하나 (stages.py), attrs : stage
+#   parse : 페이지 하나의 파싱 (parsers.py), attrs : page
+#
+# 진단 메시지는 print 대신 logger("crawler")로 남김
+# 실패는 failure(사유, 메시지, ...)로 남기면 crawler_failures_total{reason=사유}도 하나 증가
+logger = logging.getLogger("crawler")
+
+_enabled = False
+_span_hooks = []
+_failure_hooks = []
+
+# Histogram 기본 구간의 상한 (초)
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def enabled():
+    return _enabled
+
+
+def enable():
+    global _enabled
+    _enabled = True
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join('{}="{}"'.format(name, _escape(value)) for name, value in pairs) + "}"
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        if not _enabled:
+            return
+        key = tuple(str(labels.get(label, '')) for label in self.labels)
+        with self._lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def get(self, **labels):
+        return self.values.get(tuple(str(labels.get(label, '')) for label in self.labels), 0)
+
+    def clear(self):
+        with self._lock:
+            self.values.clear()
+
+    def collect(self):
+        lines = ["# HELP {} {}".format(self.name, self.documentation), "# TYPE {} counter".format(self.name)]
+        with self._lock:
+            items = sorted(self.values.items())
+        for key, value in items:
+            lines.append("{}{} {}".format(self.name, _format_labels(self.labels, key), value))
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self.values = {}  # {라벨 값들: [구간별 개수(누적 아님) ..., 합계, 개수]}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        if not _enabled:
+            return
+        key = tuple(str(labels.get(label, '')) for label in self.labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self.values.get(key)
+            if entry is None:
+                entry = self.values[key] = [0] * (len(self.buckets) + 3)
+            entry[index] += 1
+            entry[-2] += value
+            entry[-1] += 1
+
+    def clear(self):
+        with self._lock:
+            self.values.clear()
+
+    def collect(self):
+        lines = ["# HELP {} {}".format(self.name, self.documentation), "# TYPE {} histogram".format(self.name)]
+        with self._lock:
+            items = sorted((key, list(entry)) for key, entry in self.values.items())
+        for key, entry in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), entry):
+                cumulative += count
+                le = "+Inf" if bound == float('inf') else repr(bound)
+                lines.append("{}_bucket{} {}".format(self.name, _format_labels(self.labels, key, [("le", le)]), cumulative))
+            lines.append("{}_sum{} {}".format(self.name, _format_labels(self.labels, key), entry[-2]))
+            lines.append("{}_count{} {}".format(self.name, _format_labels(self.labels, key), entry[-1]))
+        return lines
+
+
+class Gauge:
+    # 값을 저장하지 않고 내보낼 때마다 read()를 호출. read()는 {라벨 값들: 값}을 반환
+    def __init__(self, name: str, documentation: str, labels=(), read=None):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.read = read
+
+    def clear(self):
+        pass
+
+    def collect(self):
+        lines = ["# HELP {} {}".format(self.name, self.documentation), "# TYPE {} gauge".format(self.name)]
+        for key, value in sorted(self.read().items()):
+            lines.append("{}{} {}".format(self.name, _format_labels(self.labels, key), value))
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def clear(self):
+        for metric in self.metrics:
+            metric.clear()
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.collect())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+HTTP_REQUESTS = REGISTRY.register(Counter(
+    "crawler_http_requests_total", "HTTP requests sent (each retry counts)", ("host", "status")))
+HTTP_RETRIES = REGISTRY.register(Counter(
+    "crawler_http_retries_total", "HTTP requests retried", ("host", "reason")))
+FAILURES = REGISTRY.register(Counter(
+    "crawler_failures_total", "Crawl failures by reason", ("reason",)))
+ROOMS = REGISTRY.register(Counter(
+    "crawler_rooms_total", "Rooms finished by the crawl loops", ("result",)))
+SPAN_ERRORS = REGISTRY.register(Counter(
+    "crawler_span_errors_total", "Spans that ended with an exception", ("span", "error")))
+
+# span 이름 -> (Histogram, 라벨로 쓸 attrs 키)
+SPAN_HISTOGRAMS = {
+    'http': REGISTRY.register(Histogram("crawler_http_request_seconds", "HTTP request latency", ("host",))),
+    'stage': REGISTRY.register(Histogram("crawler_stage_seconds", "Room stage latency", ("stage",))),
+    'parse': REGISTRY.register(Histogram("crawler_parse_seconds", "Page parse time", ("page",))),
+}
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Span:
+    __slots__ = ('name', 'attrs', 'start', 'start_ns', 'duration', 'error')
+
+    def __init__(self, name: str, attrs: dict):
+        self.name = name
+        self.attrs = attrs
+        self.duration = None
+        self.error = None
+
+    def __enter__(self):
+        self.start_ns = time.time_ns()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.duration = time.perf_counter() - self.start
+        if exc_type is not None:
+            self.error = exc_type.__name__
+        _finish(self)
+        return False
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+
+def span(name: str, **attrs):
+    # with span('http', host=...) as s: ... s.set(status=200)
+    if not _enabled:
+        return NOOP_SPAN
+    return Span(name, attrs)
+
+
+def _finish(span: Span):
+    histogram = SPAN_HISTOGRAMS.get(span.name)
+    if histogram is not None:
+        histogram.observe(span.duration, **span.attrs)
+    if span.error is not None:
+        SPAN_ERRORS.inc(span=span.name, error=span.error)
+    for hook in _span_hooks:
+        try:
+            hook(span)
+        except Exception:
+            logger.exception("span hook에서 오류가 발생했습니다")
+
+
+def add_span_hook(hook):
+    # hook(span) : span이 끝날 때마다 (span이 끝난 쓰레드에서) 호출
+    _span_hooks.append(hook)
+    return hook
+
+
+def add_failure_hook(hook):
+    # hook(reason, message) : failure()가 호출될 때마다 호출
+    _failure_hooks.append(hook)
+    return hook
+
+
+def remove_hook(hook):
+    for hooks in (_span_hooks, _failure_hooks):
+        if hook in hooks:
+            hooks.remove(hook)
+
+
+def failure(reason: str, message: str, *args, level: int = logging.WARNING):
+    # 실패 사유별로 세고 logger에 남김. message는 logging 형식 ("... %s", 값)
+    if _enabled:
+        FAILURES.inc(reason=reason)
+        for hook in _failure_hooks:
+            try:
+                hook(reason, message % args if args else message)
+            except Exception:
+                logger.exception("failure hook에서 오류가 발생했습니다")
+    logger.log(level, message, *args)
+
+
+def room_done(result: str = 'ok'):
+    ROOMS.inc(result=result)
+
+
+def use_opentelemetry(tracer=None):
+    # 끝난 span을 OpenTelemetry span으로도 내보냄 (opentelemetry-api가 설치되어 있어야 함)
+    from opentelemetry import trace
+
+    tracer = tracer or trace.get_tracer("crawler")
+
+    def hook(span: Span):
+        otel_span = tracer.start_span("crawler." + span.name, start_time=span.start_ns,
+                                      attributes={key: str(value) for key, value in span.attrs.items()})
+        if span.error is not None:
+            otel_span.set_status(trace.Status(trace.StatusCode.ERROR, span.error))
+        otel_span.end(end_time=span.start_ns + int(span.duration * 1e9))
+
+    enable()
+    return add_span_hook(hook)
+
+
+def render_prometheus():
+    return REGISTRY.render()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = render_prometheus().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_http_server(port: int = 9108, addr: str = ''):
+    # 백그라운드 쓰레드에서 http://addr:port/metrics 를 제공하고 계측을 켬
+    server = ThreadingHTTPServer((addr, port), _MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-exporter", daemon=True).start()
+    enable()
+    logger.info("metrics exporter : http://%s:%d/metrics", addr or '0.0.0.0', server.server_address[1])
+    return server
+
+
+def configure_logging(level: int = logging.INFO):
+    # 스크립트로 실행할 때 예전 print처럼 메시지만 출력
+    if not logger.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+    logger.setLevel(level)
+
+
+if os.environ.get('CRAWLER_METRICS', '') not in ('', '0'):
+    enable()
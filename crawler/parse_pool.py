@@ -0,0 +1,180 @@
+import concurrent.futures
+import functools
+import os
+import queue
+import threading
+
+from . import parsers
+from .cache import MISSING
+from .room import (Room, Address, ComplexIndex, ROOM_STAGES, ROOM_SIZE_TOLERANCE, NAVER_ID_CACHE, NAVER_COMPLEX_CACHE,
+                   room_failed)
+from .stages import submit_stages, then, then_submit
+from .instrumentation import room_done
+
+# 네트워크와 파싱을 나눈 크롤링 파이프라인
+# 네트워크 쓰레드는 응답 본문만 받아서 프로세스 풀에 넘기고 바로 다음 요청을 보냄
+# HTML 파싱은 GIL과 관계없이 프로세스 수(코어 수)만큼 동시에 진행되고
+# 파싱 결과는 Room에 채워진 뒤 queue를 통해 crawl()을 호출한 쪽으로 돌아옴
+#
+# with ParsePipeline() as pipeline:
+#     for room in pipeline.crawl(ids):
+#         ...
+DEFAULT_NETWORK_WORKERS = 64
+
+
+def _init_worker(backend: str):
+    # 부모 프로세스와 같은 파서 backend 사용
+    parsers.set_backend(backend)
+
+
+class ParsePipeline:
+    def __init__(self, network_workers: int = DEFAULT_NETWORK_WORKERS, parse_workers: int = None,
+                 duration: int = 28, exact: bool = False, tolerance: int = ROOM_SIZE_TOLERANCE,
+                 mp_context=None):
+        self.duration = duration
+        self.exact = exact
+        self.tolerance = tolerance
+        self.network = concurrent.futures.ThreadPoolExecutor(network_workers)
+        self.parse_pool = concurrent.futures.ProcessPoolExecutor(
+            parse_workers or os.cpu_count(), mp_context=mp_context,
+            initializer=_init_worker, initargs=(parsers.get_backend().name,)
+        )
+
+    def parse(self, function, text: str):
+        # parsers의 parse 함수를 프로세스 풀에서 실행하는 Future
+        return self.parse_pool.submit(function, text)
+
+    def search_land_price(self, room: Room):
+        # Room.searchLandPrice와 같지만 파싱을 기다리지 않고 True/False/None을 갖는 Future를 반환
+        # 네이버 검색 -> 파싱 -> 단지 매물 요청 -> 파싱을 Future로 이어서 실행하므로
+        # 네트워크 쓰레드는 파싱이 끝나기를 기다리지 않고 다른 방의 요청을 보냄
+        room.naver_id = None
+        search_url = room.landPriceSearchUrl()
+        if search_url is None:
+            return None
+
+        def search():
+            response = room.fetchNaverSearch(search_url)
+            if response is None:
+                return MISSING
+            return then(self.parse(parsers.parse_naver_search, response.text),
+                        lambda search: room.findNaverId(search, response.url))
+
+        def complex_articles():
+            text = room.fetchComplexArticles()
+            if text is None:
+                return MISSING
+            return then(self.parse(parsers.parse_complex_page, text), lambda page: ComplexIndex(*page))
+
+        def match(index):
+            if index is MISSING:
+                return None
+            return room.matchLandPrice(index, self.exact, self.tolerance)
+
+        def find_complex(naver_id):
+            # 네트워크 쓰레드에서 실행
+            if naver_id is MISSING or naver_id is None:
+                return None
+            room.naver_id = naver_id
+            return then(NAVER_COMPLEX_CACHE.future_or_compute(naver_id, complex_articles), match)
+
+        naver_id = NAVER_ID_CACHE.future_or_compute(room.naverIdKey(), search)
+        return then_submit(naver_id, find_complex, self.network)
+
+    def stages(self, room: Room):
+        def detail():
+            text = room.fetchDetail()
+            if text is None:
+                return False
+            return then(self.parse(parsers.parse_room_detail, text), room.applyLand)
+
+        def address():
+            room.address = Address(room.address_query)
+
+        def rent_fee():
+            text = room.fetchRentFee()
+            return then(self.parse(parsers.parse_contract_list, text), room.applyRentFee)
+
+        def vacancy():
+            # 일정은 작은 json이므로 네트워크 쓰레드에서 처리
+            room.updateVacancyRate(self.duration)
+
+        def land_price():
+            # Room.updateLandPrice와 같음. 못 찾았으면 주변 단지의 매물을 대신 사용
+            def fallback(found):
+                if not found and not self.exact:
+                    room.matchComparablePrice(self.tolerance)
+
+            found = self.search_land_price(room)
+            if isinstance(found, concurrent.futures.Future):
+                return then(found, fallback)
+            fallback(found)
+
+        functions = {
+            'detail': detail,
+            'address': address,
+            'rent_fee': rent_fee,
+            'vacancy': vacancy,
+            'land_price': land_price,
+        }
+        return {name: (deps, functions[name]) for name, deps in ROOM_STAGES.items()}
+
+    def submit_room(self, rid):
+        # 방 하나의 모든 단계가 끝나면 Room을 결과로 갖는 Future
+        room = Room(rid, self.duration, fetch=False)
+        return then(submit_stages(self.stages(room), self.network), lambda _: room)
+
+    def crawl(self, ids, sink=None, max_pending: int = None):
+        # 끝난 순서대로 Room을 돌려줌. 동시에 max_pending개의 방만 진행해서 메모리 사용량이 일정함
+        max_pending = max_pending or self.network._max_workers * 4
+        done = queue.Queue()
+        slots = threading.Semaphore(max_pending)
+        submitted = 0
+        received = 0
+
+        def on_done(rid, future):
+            slots.release()
+            done.put((rid, future))
+
+        for rid in ids:
+            slots.acquire()
+            self.submit_room(rid).add_done_callback(functools.partial(on_done, rid))
+            submitted += 1
+            # 기다리지 않고 이미 끝난 방들을 넘겨줌
+            while True:
+                try:
+                    item = done.get_nowait()
+                except queue.Empty:
+                    break
+                received += 1
+                room = self._result(*item, sink)
+                if room is not None:
+                    yield room
+
+        while received < submitted:
+            received += 1
+            room = self._result(*done.get(), sink)
+            if room is not None:
+                yield room
+
+    def _result(self, rid, future, sink):
+        # 요청이나 파싱 중 오류가 난 방만 버리고 None (나머지 방은 계속 크롤링)
+        try:
+            room = future.result()
+        except Exception as e:
+            room_failed(rid, e)
+            return None
+        room_done('ok')
+        if sink is not None:
+            sink.write(room)
+        return room
+
+    def close(self):
+        self.network.shutdown()
+        self.parse_pool.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
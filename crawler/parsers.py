@@ -0,0 +1,401 @@
+import os
+import re
+
+from . import instrumentation
+# 페이지 종류별 HTML 파서
+# 33m2 상세 페이지, 33m2 예약 견적, 네이버 부동산 검색 결과, 네이버 부동산 단지 매물 페이지에서
+# 필요한 몇 개의 노드만 읽으므로 backend를 바꿔서 파싱 비용을 줄일 수 있음
+#
+# backend
+#   html.parser : BeautifulSoup(html.parser)로 전체 트리를 만듦 (기존 방식)
+#   bs4         : BeautifulSoup + SoupStrainer로 필요한 부분만 트리로 만듦
+#   lxml        : lxml.html + 미리 컴파일한 XPath
+#   selectolax  : selectolax + CSS selector
+#
+# 환경변수 CRAWLER_PARSER로 고를 수 있고, 없으면 설치된 것 중 selectolax > lxml > bs4 순서로 사용
+# (benchmarks/bench_parsers.py 참고)
+#
+# backend는 문자열만 뽑아오고, 숫자 변환 등은 아래의 공통 함수에서 처리
+#   detail(text)          -> (이름, 주소, [(span, p), ...] 또는 None)
+#   contract(text)        -> [(span, p), ...]
+#   naver_search(text)    -> ('noresult' | 'layer' | None, [(주소, href), ...])
+#   complex_articles(text)-> [(가격, [요약, ...]), ...]
+#
+# backend 호출마다 'parse' span을 남김 (instrumentation.py, 프로세스 풀 worker에서는 그 프로세스에만 남음)
+
+
+def _class_xpath(tag: str, class_name: str):
+    return "{}[contains(concat(' ', normalize-space(@class), ' '), ' {} ')]".format(tag, class_name)
+
+
+class Bs4Backend:
+    # strain=False이면 기존과 같은 전체 트리, True이면 페이지마다 필요한 요소만 트리로 만듦
+    def __init__(self, strain: bool = True):
+        from bs4 import BeautifulSoup, SoupStrainer
+
+        self.BeautifulSoup = BeautifulSoup
+        self.strain = strain
+        self.name = 'bs4' if strain else 'html.parser'
+        # SoupStrainer는 트리 빌더와 관계없이 동작하므로 더 빠른 lxml 트리 빌더가 있으면 사용
+        self.features = 'html.parser'
+        if strain:
+            try:
+                import lxml  # noqa: F401
+                self.features = 'lxml'
+            except ImportError:
+                pass
+
+        self.strainers = {
+            'intro': SoupStrainer(attrs={'id': 'room_intro'}),
+            'place_detail': SoupStrainer('ul', attrs={'class': 'place_detail'}),
+            'contract': SoupStrainer(attrs={'class': 'contract_list'}),
+            'naver_search': SoupStrainer(attrs={'class': ['p_noresult', 'layer_result']}),
+            'complex': SoupStrainer('li', attrs={'class': 'ComplexArticleItem_item__L5o7k'}),
+        }
+
+    def soup(self, text: str, page: str):
+        if not self.strain:
+            return self.BeautifulSoup(text, 'html.parser')
+        return self.BeautifulSoup(text, self.features, parse_only=self.strainers[page])
+
+    def detail(self, text: str):
+        if self.strain:
+            intro_soup = self.soup(text, 'intro')
+            detail_soup = self.soup(text, 'place_detail')
+        else:
+            intro_soup = detail_soup = self.soup(text, None)
+
+        room_intro = intro_soup.find('div', id='room_intro')
+        name = None
+        address = None
+        if room_intro:
+            name = room_intro.find('strong').text if room_intro.find('strong') else None
+            address = room_intro.find('p', class_='address').text if room_intro.find('p', class_='address') else None
+
+        place_detail_ul = detail_soup.find('ul', class_='place_detail')
+        if not place_detail_ul:
+            return name, address, None
+
+        items = []
+        for li in place_detail_ul.find_all('li'):
+            span_tag = li.find('span')
+            p_tag = li.find('p')
+            items.append((span_tag.text if span_tag else None, p_tag.text if p_tag else None))
+        return name, address, items
+
+    def contract(self, text: str):
+        items = []
+        for item in self.soup(text, 'contract').select('.contract_list li'):
+            items.append((item.select_one('span').text, item.select_one('p').text))
+        return items
+
+    def naver_search(self, text: str):
+        soup = self.soup(text, 'naver_search')
+        if soup.find(class_="p_noresult"):
+            return 'noresult', []
+        if not soup.find(class_='layer_result'):
+            return None, []
+
+        results = []
+        for item in soup.find_all("li", class_="result_item"):
+            address_tag = item.find("span", class_="address")
+            link_tag = item.find("a", class_="inner")
+            if address_tag and link_tag:
+                results.append((address_tag.text, link_tag["href"]))
+        return 'layer', results
+
+    def complex_articles(self, text: str):
+        articles = []
+        for item in self.soup(text, 'complex').find_all("li", class_="ComplexArticleItem_item__L5o7k"):
+            price = item.find("span", class_="ComplexArticleItem_price__DFeIb")
+            summaries = [summary.text for summary in item.find_all("li", class_="ComplexArticleItem_item-summary__oHSwl")]
+            articles.append((price.text if price else None, summaries))
+        return articles
+
+
+class LxmlBackend:
+    name = 'lxml'
+
+    def __init__(self):
+        import lxml.html
+        from lxml.etree import XPath
+
+        self.fromstring = lxml.html.document_fromstring
+        self.xpaths = {
+            'intro': XPath("//div[@id='room_intro'][1]"),
+            'name': XPath("(.//strong)[1]"),
+            'address': XPath("(.//" + _class_xpath('p', 'address') + ")[1]"),
+            'place_detail': XPath("(//" + _class_xpath('ul', 'place_detail') + ")[1]"),
+            'li': XPath(".//li"),
+            'span': XPath("(.//span)[1]"),
+            'p': XPath("(.//p)[1]"),
+            'contract': XPath("//*[contains(concat(' ', normalize-space(@class), ' '), ' contract_list ')]//li"),
+            'noresult': XPath("//*[contains(concat(' ', normalize-space(@class), ' '), ' p_noresult ')][1]"),
+            'layer': XPath("//*[contains(concat(' ', normalize-space(@class), ' '), ' layer_result ')][1]"),
+            'result_item': XPath("//" + _class_xpath('li', 'result_item')),
+            'result_address': XPath("(.//" + _class_xpath('span', 'address') + ")[1]"),
+            'result_link': XPath("(.//" + _class_xpath('a', 'inner') + ")[1]"),
+            'article': XPath("//" + _class_xpath('li', 'ComplexArticleItem_item__L5o7k')),
+            'price': XPath("(.//" + _class_xpath('span', 'ComplexArticleItem_price__DFeIb') + ")[1]"),
+            'summary': XPath(".//" + _class_xpath('li', 'ComplexArticleItem_item-summary__oHSwl')),
+        }
+
+    def _document(self, text: str):
+        if not text or not text.strip():
+            return None
+        return self.fromstring(text)
+
+    def _first(self, name: str, node):
+        found = self.xpaths[name](node)
+        return found[0] if found else None
+
+    def _text(self, node):
+        return node.text_content() if node is not None else None
+
+    def detail(self, text: str):
+        document = self._document(text)
+        if document is None:
+            return None, None, None
+
+        room_intro = self._first('intro', document)
+        name = None
+        address = None
+        if room_intro is not None:
+            name = self._text(self._first('name', room_intro))
+            address = self._text(self._first('address', room_intro))
+
+        place_detail_ul = self._first('place_detail', document)
+        if place_detail_ul is None:
+            return name, address, None
+
+        items = [(self._text(self._first('span', li)), self._text(self._first('p', li)))
+                 for li in self.xpaths['li'](place_detail_ul)]
+        return name, address, items
+
+    def contract(self, text: str):
+        document = self._document(text)
+        if document is None:
+            return []
+        return [(self._text(self._first('span', li)), self._text(self._first('p', li)))
+                for li in self.xpaths['contract'](document)]
+
+    def naver_search(self, text: str):
+        document = self._document(text)
+        if document is None:
+            return None, []
+        if self._first('noresult', document) is not None:
+            return 'noresult', []
+        if self._first('layer', document) is None:
+            return None, []
+
+        results = []
+        for item in self.xpaths['result_item'](document):
+            address_tag = self._first('result_address', item)
+            link_tag = self._first('result_link', item)
+            if address_tag is not None and link_tag is not None and link_tag.get('href') is not None:
+                results.append((address_tag.text_content(), link_tag.get('href')))
+        return 'layer', results
+
+    def complex_articles(self, text: str):
+        document = self._document(text)
+        if document is None:
+            return []
+        return [(self._text(self._first('price', item)),
+                 [summary.text_content() for summary in self.xpaths['summary'](item)])
+                for item in self.xpaths['article'](document)]
+
+
+class SelectolaxBackend:
+    name = 'selectolax'
+
+    def __init__(self):
+        try:
+            from selectolax.lexbor import LexborHTMLParser as HTMLParser
+        except ImportError:
+            # 1.0 이전 버전
+            from selectolax.parser import HTMLParser
+
+        self.HTMLParser = HTMLParser
+
+    def _text(self, node):
+        return node.text() if node is not None else None
+
+    def detail(self, text: str):
+        tree = self.HTMLParser(text)
+        room_intro = tree.css_first('div#room_intro')
+        name = None
+        address = None
+        if room_intro is not None:
+            name = self._text(room_intro.css_first('strong'))
+            address = self._text(room_intro.css_first('p.address'))
+
+        place_detail_ul = tree.css_first('ul.place_detail')
+        if place_detail_ul is None:
+            return name, address, None
+
+        items = [(self._text(li.css_first('span')), self._text(li.css_first('p')))
+                 for li in place_detail_ul.css('li')]
+        return name, address, items
+
+    def contract(self, text: str):
+        return [(self._text(li.css_first('span')), self._text(li.css_first('p')))
+                for li in self.HTMLParser(text).css('.contract_list li')]
+
+    def naver_search(self, text: str):
+        tree = self.HTMLParser(text)
+        if tree.css_first('.p_noresult') is not None:
+            return 'noresult', []
+        if tree.css_first('.layer_result') is None:
+            return None, []
+
+        results = []
+        for item in tree.css('li.result_item'):
+            address_tag = item.css_first('span.address')
+            link_tag = item.css_first('a.inner')
+            if address_tag is not None and link_tag is not None and link_tag.attributes.get('href') is not None:
+                results.append((address_tag.text(), link_tag.attributes['href']))
+        return 'layer', results
+
+    def complex_articles(self, text: str):
+        return [(self._text(item.css_first('span.ComplexArticleItem_price__DFeIb')),
+                 [summary.text() for summary in item.css('li.ComplexArticleItem_item-summary__oHSwl')])
+                for item in self.HTMLParser(text).css('li.ComplexArticleItem_item__L5o7k')]
+
+
+BACKENDS = {
+    'html.parser': lambda: Bs4Backend(strain=False),
+    'bs4': lambda: Bs4Backend(strain=True),
+    'lxml': LxmlBackend,
+    'selectolax': SelectolaxBackend,
+}
+DEFAULT_BACKENDS = ('selectolax', 'lxml', 'bs4')
+
+_backend = None
+
+
+def set_backend(name: str):
+    global _backend
+    _backend = BACKENDS[name]()
+    return _backend
+
+
+def get_backend():
+    # 처음 파싱할 때 backend를 고름 (import 시점에는 파서 라이브러리를 불러오지 않음)
+    global _backend
+    if _backend is None:
+        name = os.environ.get('CRAWLER_PARSER')
+        if name:
+            return set_backend(name)
+        for name in DEFAULT_BACKENDS:
+            try:
+                return set_backend(name)
+            except ImportError:
+                continue
+        raise ImportError("HTML 파서가 없습니다. lxml, selectolax, beautifulsoup4 중 하나를 설치하세요.")
+    return _backend
+
+
+def _strip(text):
+    return text.strip() if text is not None else None
+
+
+# 33m2 상세 페이지
+# {'room_name', 'address_query', 'room_size_pyeong_sam', 'room_type', 'has_place_detail'}
+# 전용 면적이나 건물 유형을 찾지 못하면 None
+def parse_room_detail(text: str, backend=None):
+    with instrumentation.span('parse', page='detail'):
+        name, address, items = (backend or get_backend()).detail(text)
+    detail = {
+        'room_name': _strip(name),
+        'address_query': _strip(address),
+        'room_size_pyeong_sam': None,
+        'room_type': None,
+        'has_place_detail': items is not None,
+    }
+
+    for span, p in items or ():
+        # '전용 면적' 텍스트를 포함한 li를 찾고, 그 다음 p 태그의 값 추출 (첫 번째 항목만)
+        if span and '전용 면적' in span and p is not None and detail['room_size_pyeong_sam'] is None:
+            detail['room_size_pyeong_sam'] = int(p.strip()[:-1])
+        # '건물 유형' 텍스트를 포함한 li를 찾고, 그 다음 p 태그의 값 추출 (첫 번째 항목만)
+        if span and '건물 유형' in span and p is not None and detail['room_type'] is None:
+            detail['room_type'] = p.strip()
+    return detail
+
+
+# 33m2 예약 견적 {'임대료': 1000000, ...}
+def parse_contract_list(text: str, backend=None):
+    prices = {}
+    with instrumentation.span('parse', page='contract'):
+        items = (backend or get_backend()).contract(text)
+    for key, value in items:
+        prices[key.strip()] = int(value.strip()[:-1].replace(",", ""))
+    return prices
+
+
+# 네이버 부동산 검색 결과
+# ('noresult', []) : 검색 매물 없음, ('layer', [(주소, href), ...]) : 검색 결과 목록, (None, []) : 그 외
+def parse_naver_search(text: str, backend=None):
+    with instrumentation.span('parse', page='naver_search'):
+        kind, results = (backend or get_backend()).naver_search(text)
+    return kind, [(address.strip(), href) for address, href in results]
+
+
+# '월세 1,000/80' -> (1000, 80), '월세 1억 2,000/80' -> (12000, 80) (단위 : 만원)
+NAVER_PRICE_PATTERN = re.compile(r"([\d,억\s]+)/\s*([\d,]+)")
+
+
+def parse_naver_price(text: str):
+    match = NAVER_PRICE_PATTERN.search(text)
+    if not match:
+        return None
+
+    deposit_text = match.group(1).replace(",", "").replace(" ", "")
+    if "억" in deposit_text:
+        eok, _, rest = deposit_text.partition("억")
+        deposit = int(eok or 0) * 10000 + int(rest or 0)
+    else:
+        deposit = int(deposit_text)
+    return deposit, int(match.group(2).replace(",", ""))
+
+
+# 네이버 부동산 단지 매물 페이지를 [[전용면적(평), 보증금, 월세], ...]로 변환 (페이지 순서 유지)
+def parse_complex_articles(text: str, backend=None):
+    articles = []
+    with instrumentation.span('parse', page='complex_articles'):
+        items = (backend or get_backend()).complex_articles(text)
+    for price, summaries in items:
+        price = parse_naver_price(price.strip().split(" ~ ")[0]) if price else None
+        if price is None:
+            continue
+
+        # "평수 (전용면적)"이 있는 요소를 모두 찾기
+        for summary in summaries:
+            if "(" in summary and ")" in summary:
+                _, _, _area = summary.rpartition("(")
+                _area = _area.strip(") ")
+                # 숫자만 추출
+                _area = re.sub(r'[^0-9]', '', _area)
+                if _area:
+                    articles.append([int(_area), price[0], price[1]])
+    return articles
+
+
+# 단지 페이지의 데이터 스크립트에 있는 단지 좌표
+# (fin.land.naver.com은 "coordinates":{"xCoordinate":경도,"yCoordinate":위도}, 예전 페이지는 "longitude"/"latitude")
+NAVER_LONGITUDE_PATTERN = re.compile(r'"(?:xCoordinate|longitude|lng|lon)"\s*:\s*"?(1[23]\d\.\d+)')
+NAVER_LATITUDE_PATTERN = re.compile(r'"(?:yCoordinate|latitude|lat)"\s*:\s*"?(3\d\.\d+)')
+
+
+def parse_complex_position(text: str):
+    # (경도, 위도) 또는 None. 태그가 아니라 스크립트 안의 문자열이므로 backend와 관계없이 정규식으로 찾음
+    longitude = NAVER_LONGITUDE_PATTERN.search(text)
+    latitude = NAVER_LATITUDE_PATTERN.search(text)
+    if longitude is None or latitude is None:
+        return None
+    return float(longitude.group(1)), float(latitude.group(1))
+
+
+# 단지 매물 페이지 -> (parse_complex_articles의 매물 목록, 단지 좌표 또는 None)
+def parse_complex_page(text: str, backend=None):
+    return parse_complex_articles(text, backend), parse_complex_position(text)
@@ -0,0 +1,154 @@
+import concurrent.futures
+import threading
+from datetime import date, timedelta
+
+import requests
+
+from .room import (Room, ROOM_CONTRACT_DATA_LIST, SAM_BOOKING_URL, contract_breakdown, default_quote_start,
+                   quote_end)
+from .http_scheduler import SCHEDULER
+from .parsers import parse_contract_list
+from .stages import imap_unordered
+from .instrumentation import failure, room_done
+
+# 여러 기간의 예약 견적 (방 x 시작일 x 주 -> 항목별 금액)
+# 방마다 requests.Session 하나로 /webpc/booking/start 견적을 동시에 요청
+# 캐시된 예약 일정(vacancy.py)에서 예약됐거나 예약 불가능한 날이 낀 기간은 요청하지 않음
+#
+#   matrix = quote_matrix(ids, starts=[date(2026, 11, 1), date(2026, 12, 1)])
+#   matrix.get('38048', date(2026, 11, 1), 8)  # {'임대료': ..., '장기계약 할인': ..., ...}
+#   matrix.discounts('38048')                  # {1: 0, 4: 0, 8: 40000, 12: 90000}
+QUOTE_WEEKS = (1, 4, 8, 12)
+
+# 예약된 날이 있어 요청하지 않은 기간
+BOOKED = 'booked'
+
+
+def _int_or_none(value):
+    if value is None:
+        return None
+    return int(value)
+
+
+class QuoteMatrix:
+    def __init__(self):
+        self.quotes = {}   # {rid: {(start, weeks): 항목별 금액 또는 None(실패)}}
+        self.skipped = {}  # {rid: [(start, weeks), ...]} 예약된 날이 있어 요청하지 않은 기간
+        self._lock = threading.Lock()
+
+    def add(self, rid, start: date, weeks: int, prices):
+        with self._lock:
+            if prices is BOOKED:
+                self.skipped.setdefault(str(rid), []).append((start, weeks))
+            else:
+                self.quotes.setdefault(str(rid), {})[(start, weeks)] = prices
+
+    def get(self, rid, start: date, weeks: int, default=None):
+        return self.quotes.get(str(rid), {}).get((start, weeks), default)
+
+    def discounts(self, rid):
+        # 주 수별 장기계약 할인 {주: 할인 금액} (가장 이른 시작일의 견적)
+        result = {}
+        for (start, weeks), prices in sorted(self.quotes.get(str(rid), {}).items()):
+            if prices is not None and weeks not in result:
+                result[weeks] = _int_or_none(prices["장기계약 할인"])
+        return result
+
+    def rows(self):
+        # 견적 하나에 한 줄 {'sam_id', 'start_date', 'end_date', 'weeks', 항목별 금액...}
+        for rid, quotes in self.quotes.items():
+            for (start, weeks), prices in sorted(quotes.items()):
+                if prices is None:
+                    continue
+                row = {'sam_id': rid, 'start_date': start.isoformat(),
+                       'end_date': quote_end(start, weeks).isoformat(), 'weeks': weeks}
+                for key in ROOM_CONTRACT_DATA_LIST:
+                    row[key] = _int_or_none(prices[key])
+                yield row
+
+    def to_pandas(self):
+        import pandas as pd
+        return pd.DataFrame(list(self.rows()), columns=['sam_id', 'start_date', 'end_date', 'weeks'] +
+                            ROOM_CONTRACT_DATA_LIST)
+
+    def __len__(self):
+        return sum(len(quotes) for quotes in self.quotes.values())
+
+    def __str__(self):
+        failed = sum(prices is None for quotes in self.quotes.values() for prices in quotes.values())
+        return "방 {}개, 견적 {}개 (실패 {}개), 예약되어 건너뛴 기간 {}개".format(
+            len(set(self.quotes) | set(self.skipped)), len(self) - failed, failed,
+            sum(len(windows) for windows in self.skipped.values()))
+
+
+class RentQuoter:
+    # starts : 견적 시작일들 (기본 : 다음 달 1일), weeks : 견적 기간(주)들
+    # skip_booked : 예약 일정에서 기간 중 예약된 날이 있으면 요청하지 않음
+    # max_workers : 동시에 요청하는 견적 수 (방 단위가 아니라 견적 단위)
+    def __init__(self, starts=None, weeks=QUOTE_WEEKS, skip_booked: bool = True, max_workers: int = 64):
+        self.starts = tuple(starts or (default_quote_start(),))
+        self.weeks = tuple(weeks)
+        self.skip_booked = skip_booked
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers)
+
+    def windows(self, room: Room):
+        # [(시작일, 주, 요청할지)]
+        windows = [(start, weeks) for start in self.starts for weeks in self.weeks]
+        if not self.skip_booked:
+            return [(start, weeks, True) for start, weeks in windows]
+
+        # 모든 기간을 덮는 달의 일정만 불러옴 (캐시에 있으면 요청하지 않음)
+        end = max(quote_end(start, weeks) for start, weeks in windows) + timedelta(days=1)
+        room.vacancy_calendar = room.loadVacancyCalendar(start=min(self.starts), end=end)
+        # 일정을 모르는 기간(요청 실패 등)은 요청해봄
+        return [(start, weeks, room.vacancy_calendar.available(start, quote_end(start, weeks) + timedelta(days=1))
+                 is not False) for start, weeks in windows]
+
+    def quote(self, room: Room, session, start: date, weeks: int):
+        headers, data = room.rentFeeArgs(start, weeks)
+        response = SCHEDULER.post(SAM_BOOKING_URL, session=session, headers=headers, data=data)
+        if response.status_code != 200:
+            failure("quote_http_error", "33m2에서 %s 의 %s부터 %d주 견적을 받지 못했습니다. Error: %s",
+                    room.sam_id, start, weeks, response.status_code)
+            return None
+
+        prices = parse_contract_list(response.text)
+        if not prices:
+            failure("quote_empty", "33m2에서 %s 의 %s부터 %d주 견적이 비어 있습니다.", room.sam_id, start, weeks)
+            return None
+        return contract_breakdown(prices, room.sam_id)
+
+    def quote_room(self, rid):
+        # [(시작일, 주, 항목별 금액 | None | BOOKED)]
+        room = Room(rid, fetch=False)
+        windows = self.windows(room)
+        with requests.Session() as session:
+            futures = [(start, weeks, self.executor.submit(self.quote, room, session, start, weeks))
+                       for start, weeks, request in windows if request]
+            quotes = [(start, weeks, future.result()) for start, weeks, future in futures]
+        return rid, quotes + [(start, weeks, BOOKED) for start, weeks, request in windows if not request]
+
+    def run(self, ids, matrix: QuoteMatrix = None, max_rooms: int = 32):
+        # 방 max_rooms개를 동시에 진행하면서 끝난 방부터 matrix에 채움
+        matrix = matrix if matrix is not None else QuoteMatrix()
+        with concurrent.futures.ThreadPoolExecutor(max_rooms) as rooms:
+            for rid, quotes in imap_unordered(rooms, self.quote_room, ids):
+                for start, weeks, prices in quotes:
+                    matrix.add(rid, start, weeks, prices)
+                room_done('quoted')
+        return matrix
+
+    def close(self):
+        self.executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def quote_matrix(ids, starts=None, weeks=QUOTE_WEEKS, skip_booked: bool = True, max_workers: int = 64,
+                 max_rooms: int = 32):
+    with RentQuoter(starts, weeks, skip_booked, max_workers) as quoter:
+        return quoter.run(ids, max_rooms=max_rooms)
@@ -0,0 +1,309 @@
+import array
+import json
+import math
+import sys
+from dataclasses import dataclass, fields
+
+from .constants import ROOM_CONTRACT_DATA_LIST
+
+# 분석용으로 메모리에 많이 들고 있을 결과 레코드
+# Room/Address는 요청하는 로직과 중간 상태(캐시 키, 공실 달력, lock 등)를 같이 들고 있어서 무거움
+# 여기의 레코드는 값만 가지는 불변 객체(__slots__)이고
+# - 좌표와 가격은 숫자로 저장
+# - 지역명, 도로명, 건물명, 건물 유형 등 여러 방이 같이 쓰는 문자열은 intern해서 하나만 저장
+# 많은 방을 한꺼번에 다룰 때는 열 단위로 저장하는 RoomBatch를 사용 (benchmarks/bench_records.py 참고)
+
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def _int_or_none(value):
+    if value is None or value == "":
+        return None
+    return int(value)
+
+
+def _floor(value):
+    # Address.floor ('3', 'B1', '지하1' 등) -> 층 번호. 지하는 음수, 알 수 없으면 None
+    if value is None or isinstance(value, int):
+        return value
+    text = str(value).strip().upper().replace(" ", "")
+    sign = 1
+    for prefix in ("지하", "B"):
+        if text.startswith(prefix):
+            text, sign = text[len(prefix):], -1
+            break
+    if not (text.isascii() and text.isdigit()):
+        return None
+    return sign * int(text)
+
+
+def _float_or_none(value):
+    if value is None or value == "":
+        return None
+    return float(value)
+
+
+@dataclass(frozen=True, slots=True)
+class JibunRecord:
+    region_1depth_name: str
+    region_2depth_name: str
+    region_3depth_name: str
+    main_address_no: str
+    sub_address_no: str
+
+    def __str__(self):
+        return "{} {} {} {}-{}".format(*self)
+
+    def __iter__(self):
+        return iter((self.region_1depth_name, self.region_2depth_name, self.region_3depth_name,
+                     self.main_address_no, self.sub_address_no))
+
+
+@dataclass(frozen=True, slots=True)
+class RoadRecord:
+    region_1depth_name: str
+    region_2depth_name: str
+    road_name: str
+    main_building_no: str
+    sub_building_no: str
+
+    def __str__(self):
+        return "{} {} {} {} {}".format(*self).strip()
+
+    def __iter__(self):
+        return iter((self.region_1depth_name, self.region_2depth_name, self.road_name,
+                     self.main_building_no, self.sub_building_no))
+
+
+@dataclass(frozen=True, slots=True)
+class AddressRecord:
+    jibun: JibunRecord
+    doro: RoadRecord
+    building_name: str
+    floor: int
+    postcode: str
+    longitude: float
+    latitude: float
+
+    @staticmethod
+    def from_address(address):
+        # room.Address -> AddressRecord. 카카오에서 찾지 못한 주소는 None
+        if address is None or not hasattr(address, 'jibun'):
+            return None
+        return AddressRecord(
+            JibunRecord(*(_intern(value) for value in address.jibun)),
+            RoadRecord(*(_intern(value) for value in address.doro)),
+            _intern(address.building_name),
+            _floor(address.floor),
+            _intern(address.postcode),
+            _float_or_none(address.longitude),
+            _float_or_none(address.latitude),
+        )
+
+    def __str__(self):
+        return str(self.jibun)
+
+
+@dataclass(frozen=True, slots=True)
+class RoomRecord:
+    sam_id: int
+    naver_id: int
+    room_name: str
+    room_type: str
+    room_size_pyeong_sam: int
+    room_size_pyeong_naver: int
+    address: AddressRecord
+    # 예약 견적 (원, ROOM_CONTRACT_DATA_LIST 순서)
+    rent: int
+    long_term_discount: int
+    management_fee: int
+    cleaning_fee: int
+    contract_fee: int
+    vacancy_rate: float
+    deposit: int          # 네이버 부동산 보증금 (만원)
+    monthly_rent: int     # 네이버 부동산 월세 (만원)
+
+    @staticmethod
+    def from_room(room):
+        prices = room.prices or {}
+        return RoomRecord(
+            _int_or_none(room.sam_id),
+            _int_or_none(room.naver_id),
+            room.room_name,
+            _intern(room.room_type),
+            room.room_size_pyeong_sam,
+            room.room_size_pyeong_naver,
+            AddressRecord.from_address(room.address),
+            *(_int_or_none(prices.get(key)) for key in ROOM_CONTRACT_DATA_LIST),
+            room.vacancy_rate,
+            room.deposit,
+            room.monthly_rent,
+        )
+
+    @staticmethod
+    def from_dict(record: dict):
+        # sink.room_to_record가 만든 dict (jsonl 한 줄) -> RoomRecord
+        address = None
+        if record.get('region_1depth_name') is not None:
+            address = AddressRecord(
+                JibunRecord(*(_intern(record.get(field)) for field in JIBUN_FIELDS)),
+                RoadRecord(*(_intern(record.get(field)) for field in ROAD_FIELDS)),
+                _intern(record.get('building_name')),
+                _floor(record.get('floor')),
+                _intern(record.get('postcode')),
+                _float_or_none(record.get('longitude')),
+                _float_or_none(record.get('latitude')),
+            )
+        prices = record.get('prices') or {}
+        return RoomRecord(
+            _int_or_none(record.get('sam_id')),
+            _int_or_none(record.get('naver_id')),
+            record.get('room_name'),
+            _intern(record.get('room_type')),
+            record.get('room_size_pyeong_sam'),
+            record.get('room_size_pyeong_naver'),
+            address,
+            *(_int_or_none(prices.get(key)) for key in ROOM_CONTRACT_DATA_LIST),
+            record.get('vacancy_rate'),
+            record.get('deposit'),
+            record.get('monthly_rent'),
+        )
+
+    @property
+    def prices(self):
+        return dict(zip(ROOM_CONTRACT_DATA_LIST, (self.rent, self.long_term_discount, self.management_fee,
+                                                   self.cleaning_fee, self.contract_fee)))
+
+
+JIBUN_FIELDS = [field.name for field in fields(JibunRecord)]
+ROAD_FIELDS = ['region_1depth_name', 'region_2depth_name', 'road_name', 'main_building_no', 'sub_building_no']
+
+# RoomBatch의 열 : (이름, 종류)
+# 숫자는 array('d')에 float로 저장하고 값이 없으면 nan. 문자열은 intern한 str의 list
+BATCH_COLUMNS = [
+    ('sam_id', 'd'), ('naver_id', 'd'), ('room_name', 's'), ('room_type', 's'),
+    ('room_size_pyeong_sam', 'd'), ('room_size_pyeong_naver', 'd'),
+    ('region_1depth_name', 's'), ('region_2depth_name', 's'), ('region_3depth_name', 's'),
+    ('main_address_no', 's'), ('sub_address_no', 's'),
+    ('road_name', 's'), ('main_building_no', 's'), ('sub_building_no', 's'),
+    ('building_name', 's'), ('floor', 'd'), ('postcode', 's'), ('longitude', 'd'), ('latitude', 'd'),
+    ('rent', 'd'), ('long_term_discount', 'd'), ('management_fee', 'd'), ('cleaning_fee', 'd'), ('contract_fee', 'd'),
+    ('vacancy_rate', 'd'), ('deposit', 'd'), ('monthly_rent', 'd'),
+]
+BATCH_INT_COLUMNS = {'sam_id', 'naver_id', 'room_size_pyeong_sam', 'room_size_pyeong_naver', 'floor',
+                     'rent', 'long_term_discount', 'management_fee', 'cleaning_fee', 'contract_fee',
+                     'deposit', 'monthly_rent'}
+
+
+def _flatten(record: RoomRecord):
+    address = record.address
+    jibun = address.jibun if address else None
+    doro = address.doro if address else None
+    values = {
+        'sam_id': record.sam_id, 'naver_id': record.naver_id,
+        'room_name': record.room_name, 'room_type': record.room_type,
+        'room_size_pyeong_sam': record.room_size_pyeong_sam,
+        'room_size_pyeong_naver': record.room_size_pyeong_naver,
+        'road_name': doro.road_name if doro else None,
+        'main_building_no': doro.main_building_no if doro else None,
+        'sub_building_no': doro.sub_building_no if doro else None,
+        'rent': record.rent, 'long_term_discount': record.long_term_discount,
+        'management_fee': record.management_fee, 'cleaning_fee': record.cleaning_fee,
+        'contract_fee': record.contract_fee,
+        'vacancy_rate': record.vacancy_rate, 'deposit': record.deposit, 'monthly_rent': record.monthly_rent,
+    }
+    for field in JIBUN_FIELDS:
+        values[field] = getattr(jibun, field) if jibun else None
+    for field in ('building_name', 'floor', 'postcode', 'longitude', 'latitude'):
+        values[field] = getattr(address, field) if address else None
+    return values
+
+
+class RoomBatch:
+    # 많은 방을 열 단위로 저장 (방마다 객체를 만들지 않음)
+    # batch.column('rent') -> array('d'), numpy.frombuffer(batch.column('rent'))로 복사없이 사용 가능
+    def __init__(self):
+        self.columns = {name: array.array('d') if kind == 'd' else [] for name, kind in BATCH_COLUMNS}
+        self._length = 0
+
+    def append(self, record: RoomRecord):
+        for name, value in _flatten(record).items():
+            if isinstance(self.columns[name], array.array):
+                self.columns[name].append(math.nan if value is None else float(value))
+            else:
+                self.columns[name].append(_intern(value))
+        self._length += 1
+
+    def append_room(self, room):
+        self.append(RoomRecord.from_room(room))
+
+    def extend(self, records):
+        for record in records:
+            self.append(record)
+        return self
+
+    def column(self, name: str):
+        return self.columns[name]
+
+    def __len__(self):
+        return self._length
+
+    def _value(self, name: str, i: int):
+        value = self.columns[name][i]
+        if isinstance(value, float):
+            if math.isnan(value):
+                return None
+            if name in BATCH_INT_COLUMNS:
+                return int(value)
+        return value
+
+    def __getitem__(self, i: int):
+        # i번째 방을 RoomRecord로 만들어서 반환
+        if i < 0:
+            i += self._length
+        if not 0 <= i < self._length:
+            raise IndexError(i)
+        values = {name: self._value(name, i) for name, _ in BATCH_COLUMNS}
+        address = None
+        if values['region_1depth_name'] is not None:
+            address = AddressRecord(
+                JibunRecord(*(values[field] for field in JIBUN_FIELDS)),
+                RoadRecord(values['region_1depth_name'], values['region_2depth_name'], values['road_name'],
+                           values['main_building_no'], values['sub_building_no']),
+                values['building_name'], values['floor'], values['postcode'],
+                values['longitude'], values['latitude'],
+            )
+        return RoomRecord(
+            values['sam_id'], values['naver_id'], values['room_name'], values['room_type'],
+            values['room_size_pyeong_sam'], values['room_size_pyeong_naver'], address,
+            values['rent'], values['long_term_discount'], values['management_fee'],
+            values['cleaning_fee'], values['contract_fee'],
+            values['vacancy_rate'], values['deposit'], values['monthly_rent'],
+        )
+
+    def __iter__(self):
+        for i in range(self._length):
+            yield self[i]
+
+    def to_pandas(self):
+        import pandas as pd
+        return pd.DataFrame({name: self.columns[name] for name, _ in BATCH_COLUMNS})
+
+    @staticmethod
+    def from_rooms(rooms):
+        batch = RoomBatch()
+        for room in rooms:
+            batch.append_room(room)
+        return batch
+
+    @staticmethod
+    def from_jsonl(path: str):
+        # sink.JsonlSink로 저장한 파일 -> RoomBatch
+        batch = RoomBatch()
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    batch.append(RoomRecord.from_dict(json.loads(line)))
+        return batch
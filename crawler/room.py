@@ -0,0 +1,794 @@
+import logging
+import os
+import re
+import json
+from dataclasses import dataclass
+from datetime import date, timedelta
+
+from .string_utilities import *
+from .constants import ROOM_CONTRACT_DATA_LIST
+from .stages import run_stages
+from .http_scheduler import SCHEDULER
+from .cache import PersistentCache, MISSING
+from .vacancy import VacancyCalendar, VACANCY_WINDOWS, load_calendar, next_month
+from .parsers import (parse_room_detail, parse_contract_list, parse_naver_search, parse_naver_price, parse_complex_articles,
+                      parse_complex_page)
+from .instrumentation import logger, failure, room_done, configure_logging
+from .spatial import COMPARABLES, COMPARABLE_RADIUS
+import threading
+import requests
+from concurrent.futures import ThreadPoolExecutor
+
+# 카카오 REST API 키 (.kakaokey 파일 또는 KAKAO_REST_API_KEY 환경변수)
+# import할 때가 아니라 카카오맵 API를 처음 요청할 때 읽음
+# 카세트 재생(transport.py)으로 실행할 때는 없어도 됨
+KAKAO_REST_API_KEY = None
+
+
+def kakao_api_key():
+    global KAKAO_REST_API_KEY
+    if KAKAO_REST_API_KEY is None:
+        if os.path.exists(".kakaokey"):
+            with open(".kakaokey", 'r') as f:
+                KAKAO_REST_API_KEY = f.read().strip()
+        else:
+            KAKAO_REST_API_KEY = os.environ.get("KAKAO_REST_API_KEY", "")
+    return KAKAO_REST_API_KEY
+
+
+SAM_URL_PREFIX = "https://33m2.co.kr/room/detail/"
+
+KAKAO_ADDRESS_URL = "https://dapi.kakao.com/v2/local/search/address.json"
+SAM_BOOKING_URL = 'https://33m2.co.kr/webpc/booking/start'
+SAM_SCHEDULE_URL = "https://33m2.co.kr/app/room/schedule"
+NAVER_SEARCH_URL_PREFIX = 'https://m.land.naver.com/search/result/'
+NAVER_COMPLEX_URL_PREFIX = "https://fin.land.naver.com/complexes/"
+NAVER_COMPLEX_URL_SUFFIX = "?tradeTypes=B2&spaceType=평&tab=article"
+
+MOBILE_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (iPhone; CPU iPhone OS 13_0 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/13.0 Mobile/15E148 Safari/604.1'
+}
+
+# Referer는 방마다 다르므로 요청할 때 추가
+BOOKING_HEADERS = {
+    'Content-Type': 'application/x-www-form-urlencoded; charset=UTF-8',
+    'Accept': '*/*',
+    'Sec-Fetch-Site': 'same-origin',
+    'Accept-Language': 'ko-KR,ko;q=0.9',
+    'Accept-Encoding': 'gzip, deflate, br',
+    'Sec-Fetch-Mode': 'cors',
+    'Origin': "https://33m2.co.kr/",
+    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/18.2 Safari/605.1.15',
+    'Sec-Fetch-Dest': 'empty',
+    'X-Requested-With': 'XMLHttpRequest',
+    'Priority': 'u=3, i'
+}
+
+SCHEDULE_HEADERS = {
+    "Accept": "*/*",
+    "Content-Type": "application/x-www-form-urlencoded; charset=UTF-8",
+    "Origin": "https://33m2.co.kr",
+    "Accept-Language": "ko-KR,ko;q=0.9",
+    "Accept-Encoding": "gzip, deflate, br",
+    "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/18.2 Safari/605.1.15",
+    "X-Requested-With": "XMLHttpRequest",
+    "Priority": "u=5, i"
+}
+
+# 카카오 주소 검색 결과 캐시 (같은 건물의 방들은 한 번만 검색)
+# 검색 결과가 없는 주소도 하루 동안 저장해서 다시 요청하지 않음
+GEOCODE_TTL = 30 * 24 * 60 * 60
+GEOCODE_NEGATIVE_TTL = 24 * 60 * 60
+GEOCODE_CACHE = PersistentCache("geocode", ttl=GEOCODE_TTL, negative_ttl=GEOCODE_NEGATIVE_TTL)
+
+# 네이버 부동산 캐시
+# (건물명, 도로명) -> naver id, naver id -> 단지 매물 목록
+# 같은 건물의 방들은 네이버 검색과 매물 페이지를 한 번씩만 요청
+NAVER_ID_TTL = 30 * 24 * 60 * 60
+NAVER_ID_NEGATIVE_TTL = 24 * 60 * 60
+NAVER_COMPLEX_TTL = 24 * 60 * 60
+NAVER_ID_CACHE = PersistentCache("naver_id", ttl=NAVER_ID_TTL, negative_ttl=NAVER_ID_NEGATIVE_TTL)
+NAVER_COMPLEX_CACHE = PersistentCache("naver_complex_index", ttl=NAVER_COMPLEX_TTL,
+                                      encode=lambda index: index.to_json(),
+                                      decode=lambda value: ComplexIndex.from_json(value))
+
+# 네이버에 같은 전용면적의 매물이 없을 때 대신 찾을 면적 범위(+-평)
+ROOM_SIZE_TOLERANCE = 1
+
+# 방 하나를 만드는 단계와 의존관계
+# 상세 페이지 -> 카카오 주소 -> 네이버 부동산 순서만 지키면 되고 나머지는 동시에 요청
+ROOM_STAGES = {
+    'detail': (),
+    'address': ('detail',),
+    'rent_fee': (),
+    'vacancy': (),
+    'land_price': ('address',),
+}
+
+# 단계별로 채워지는 Room 필드 (lazy Room은 필드를 처음 읽을 때 해당 단계를 실행)
+ROOM_STAGE_FIELDS = {
+    'detail': ('room_name', 'room_size_pyeong_sam', 'room_type', 'address_query'),
+    'address': ('address',),
+    'rent_fee': ('prices',),
+    'vacancy': ('vacancy_rate', 'vacancy_calendar'),
+    'land_price': ('naver_id', 'room_size_pyeong_naver', 'deposit', 'monthly_rent'),
+}
+FIELD_STAGE = {field: stage for stage, fields in ROOM_STAGE_FIELDS.items() for field in fields}
+
+
+def stage_closure(names):
+    # 단계들과 그 단계들이 의존하는 모든 단계
+    closure = set()
+    todo = list(names)
+    while todo:
+        name = todo.pop()
+        if name not in closure:
+            closure.add(name)
+            todo.extend(ROOM_STAGES[name])
+    return closure
+
+
+def stages_for(fields = None):
+    # 필드 이름 또는 단계 이름들을 채우는데 필요한 단계들. None이면 모든 단계
+    if fields is None:
+        return set(ROOM_STAGES)
+    if isinstance(fields, str):
+        fields = [fields]
+    return stage_closure(field if field in ROOM_STAGES else FIELD_STAGE[field] for field in fields)
+
+# Room 단계들을 실행하는 공용 쓰레드 풀
+STAGE_EXECUTOR = ThreadPoolExecutor(max_workers=32)
+
+class Jibun:
+    def __init__(self, region_1depth_name: str, 
+                 region_2depth_name: str, region_3depth_name: str, 
+                 main_address_no: str, sub_address_no: str):
+        self.region_1depth_name = region_1depth_name
+        self.region_2depth_name = region_2depth_name
+        self.region_3depth_name = region_3depth_name
+        self.main_address_no = main_address_no
+        self.sub_address_no = sub_address_no
+
+    def __str__(self):
+        return self.region_1depth_name + " " + \
+            self.region_2depth_name + " " + \
+            self.region_3depth_name + " " + \
+            self.main_address_no + "-" + \
+            self.sub_address_no
+    
+    def __iter__(self):
+        return iter([
+            self.region_1depth_name,
+            self.region_2depth_name,
+            self.region_3depth_name,
+            self.main_address_no,
+            self.sub_address_no
+        ])
+    
+class Road:
+    def __init__(self, region_1depth_name: str, 
+                 region_2depth_name: str, road_name: str, 
+                 main_building_no: str, sub_building_no: str):
+        self.region_1depth_name = region_1depth_name
+        self.region_2depth_name = region_2depth_name
+        self.road_name = road_name
+        self.main_building_no = main_building_no
+        self.sub_building_no = sub_building_no
+
+    def __str__(self):
+        return (self.region_1depth_name + " " + \
+            self.region_2depth_name + " " + \
+            self.road_name + " " + \
+            self.main_building_no + " " + \
+            self.sub_building_no).strip()
+
+    def __iter__(self):
+        return iter([
+            self.region_1depth_name,
+            self.region_2depth_name,
+            self.road_name,
+            self.main_building_no,
+            self.sub_building_no
+        ])
+        
+class Address:
+    # 33m2 기준(지번주소)으로 저장
+    # 예) 서울특별시 강남구 대치동 943-24 신안메트로칸 7층
+    # region1 : 서울시
+    # region2 : 강남구
+    # region3 : 대치동
+    # 
+    # data : 이미 받아둔 카카오맵 API 응답(json). 없으면 직접 요청함
+    def __init__(self, query: str, data: dict = MISSING):
+        if query is None:
+            return
+
+        if data is MISSING:
+            data = Address.request(query)
+            if data is MISSING:
+                return
+
+        if data is None or data["meta"]["total_count"] == 0:
+            failure("kakao_no_result", "카카오맵 API에서 검색할 수 없습니다. 검색어 : %s", query)
+            return
+        
+        # 서울 강남구 삼성동 114-1
+        # 서울, 강남구, 삼성동, 114, 1
+        self.jibun = Jibun(
+            data["documents"][0]["address"]["region_1depth_name"],
+            data["documents"][0]["address"]["region_2depth_name"],
+            data["documents"][0]["address"]["region_3depth_name"],
+            data["documents"][0]["address"]["main_address_no"],
+            data["documents"][0]["address"]["sub_address_no"],
+        )
+
+        # 서울 강남구 삼성로95길 9
+        # 서울, 강남구, 삼성로95길, 9, (emptystring)
+        self.doro = Road(
+            data["documents"][0]["road_address"]["region_1depth_name"],
+            data["documents"][0]["road_address"]["region_2depth_name"],
+            data["documents"][0]["road_address"]["road_name"],
+            data["documents"][0]["road_address"]["main_building_no"],
+            data["documents"][0]["road_address"]["sub_building_no"],
+        )
+
+        self.floor = query.split()[-1][:-1] if '층' in query.split()[-1] else '0'
+        self.postcode = data["documents"][0]["road_address"]["zone_no"]
+        self.building_name = data["documents"][0]["road_address"]["building_name"]
+        self.building_name_preprocessed = re.sub(r"[^가-힣a-zA-Z0-9\s]", "", self.building_name)
+        self.building_name_preprocessed = replace_roman_numerals(self.building_name_preprocessed)
+        self.longitude = data["documents"][0]["x"]
+        self.latitude = data["documents"][0]["y"]
+
+    @staticmethod
+    def requestArgs(query: str):
+        headers = {
+            "Authorization": f"KakaoAK {kakao_api_key()}"
+        }
+        params = {
+            "query": query,
+            "analyze_type": "similar" # 특수기호 붙으면 exact는 제대로 못찾음
+        }
+        return headers, params
+
+    # 캐시에 있으면 캐시에서, 없으면 카카오맵 API에 요청
+    # 요청 실패는 MISSING, 검색 결과 없음은 None
+    @staticmethod
+    def request(query: str):
+        def fetch():
+            headers, params = Address.requestArgs(query)
+            response = SCHEDULER.get(KAKAO_ADDRESS_URL, headers=headers, params=params)
+
+            if not response.status_code == 200:
+                failure("kakao_http_error", "카카오맵 API 요청 실패. 검색어 : %s", query)
+                return MISSING
+
+            return Address.compactResponse(response.json())
+
+        return GEOCODE_CACHE.get_or_compute(normalize_address_query(query), fetch)
+
+    @staticmethod
+    def compactResponse(data: dict):
+        # 첫 번째 검색 결과만 사용하므로 나머지는 저장하지 않음
+        if data["meta"]["total_count"] == 0:
+            return None
+        return {"meta": {"total_count": data["meta"]["total_count"]}, "documents": data["documents"][:1]}
+
+    def __str__(self):
+        return self.jibun.__str__()
+
+class Room:
+    # fetch=False이면 네트워크 요청 없이 빈 Room만 만듦 (async_room 등에서 값을 채움)
+    # lazy=True이면 필드를 처음 읽을 때 필요한 단계만 실행하고 저장해둠
+    #   room = Room(id, lazy=True)
+    #   if room.prices['임대료'] < 1000000:   # 예약 견적만 요청
+    #       print(room.deposit)               # 이때 상세 페이지 -> 카카오 -> 네이버 요청
+    def __init__(self, samsam_id: str, duration = 28, fetch = True, lazy = False,
+                 exact: bool = False, tolerance: int = ROOM_SIZE_TOLERANCE):
+        self.sam_id = samsam_id
+        self.duration = duration
+        self.exact = exact
+        self.tolerance = tolerance
+        self._loaded = set() # 실행한 단계
+        self._failed = set() # False를 반환한 단계 (의존하는 단계는 실행하지 않음)
+        self._lock = threading.RLock()
+
+        if lazy:
+            return
+
+        for stage in ROOM_STAGE_FIELDS:
+            self._clear(stage)
+
+        if not fetch:
+            return
+
+        # self.valid = False
+        # 예약/일정 요청은 sam_id만 있으면 되므로 상세 페이지 -> 카카오 -> 네이버 순서와 동시에 진행
+        self.prefetch()
+
+    def __getattr__(self, name: str):
+        # lazy Room에서 아직 없는 필드를 읽으면 그 필드의 단계(와 의존하는 단계)를 실행
+        stage = FIELD_STAGE.get(name)
+        if stage is None or '_lock' not in self.__dict__:
+            raise AttributeError("'Room' object has no attribute '{}'".format(name))
+        self.prefetch(stage)
+        return self.__dict__[name]
+
+    def _clear(self, stage: str):
+        for field in ROOM_STAGE_FIELDS[stage]:
+            setattr(self, field, None)
+
+    def _scratch(self, names):
+        # 단계를 실행할 사본. 단계가 채우는 필드는 사본에만 쓰이므로
+        # 실행 중에 다른 쓰레드가 이 Room의 필드를 읽으면 (__dict__에 없어서) lock을 기다림
+        # 사본에는 lock이 없으므로 단계 안에서 필드를 읽어도 lazy 로딩하지 않음
+        scratch = object.__new__(type(self))
+        scratch.__dict__.update((key, value) for key, value in self.__dict__.items() if key != '_lock')
+        for name in names:
+            scratch._clear(name)
+        return scratch
+
+    # fields(필드 이름 또는 단계 이름 목록)를 채우는데 필요한 단계 중 아직 실행하지 않은 것만 실행
+    # 예: room.prefetch(['prices', 'vacancy_rate'])
+    def prefetch(self, fields = None, executor = STAGE_EXECUTOR):
+        with self._lock:
+            names = stages_for(fields) - self._loaded
+            if not names:
+                return
+
+            scratch = self._scratch(names)
+            stages = scratch.stages(self.duration, self.exact, self.tolerance)
+            todo = {}
+            skipped = set()
+            for name in names:
+                deps, fn = stages[name]
+                # 앞서 실패한 단계에 의존하면 실행하지 않고 빈 값으로 둠
+                if any(dep in self._failed for dep in deps):
+                    skipped.add(name)
+                    continue
+                todo[name] = (tuple(dep for dep in deps if dep in names), fn)
+
+            # 예외가 나면 필드를 채우지 않으므로 다음에 읽을 때 다시 시도
+            results = run_stages(todo, executor)
+
+            # 모든 단계가 끝난 뒤에 필드를 채움
+            for name in names:
+                for field in ROOM_STAGE_FIELDS[name]:
+                    self.__dict__[field] = scratch.__dict__[field]
+            self._loaded.update(names)
+            self._failed.update(skipped)
+            self._failed.update(name for name, result in results.items() if result is False)
+
+    # 이미 채워진 단계들
+    @property
+    def loaded(self):
+        return set(self._loaded)
+
+    # ROOM_STAGES 순서대로 실행할 함수들
+    def stages(self, duration = 28, exact: bool = False, tolerance: int = ROOM_SIZE_TOLERANCE):
+        functions = {
+            'detail': self.updateDetail,
+            'address': self.updateAddress,
+            'rent_fee': self.updateRentFee,
+            'vacancy': lambda: self.updateVacancyRate(duration),
+            'land_price': lambda: self.updateLandPrice(exact=exact, tolerance=tolerance),
+        }
+        return {name: (deps, functions[name]) for name, deps in ROOM_STAGES.items()}
+
+    @property
+    def url(self):
+        return SAM_URL_PREFIX + str(self.sam_id)
+
+    def updateLand(self):
+        # 1. 이름과 주소 찾기
+        if self.updateDetail() is not False:
+            self.updateAddress()
+
+    def updateDetail(self):
+        text = self.fetchDetail()
+        if text is None:
+            return False
+
+        self.parseLand(text)
+
+    def fetchDetail(self):
+        response = SCHEDULER.get(self.url, headers=MOBILE_HEADERS)
+
+        if response.status_code != 200:
+            failure("detail_http_error", "33m2에서 응답을 받지 못했습니다. id : %s", self.sam_id)
+            return None
+
+        return response.text
+
+    def updateAddress(self):
+        self.address = Address(self.address_query)
+
+    # 상세 페이지에서 이름, 전용면적, 건물 유형, 주소 검색어를 채움
+    def parseLand(self, text: str):
+        return self.applyLand(parse_room_detail(text))
+
+    # parse_room_detail의 결과를 채움 (파싱은 다른 프로세스에서 했을 수 있음)
+    def applyLand(self, detail: dict):
+
+        # 이름과 주소
+        self.room_name = detail['room_name']
+        self.address_query = detail['address_query']
+
+        # 전용면적과 건물 유형
+        self.room_size_pyeong_sam = 0
+        self.room_type = ""
+
+        if detail['has_place_detail']:
+            if detail['room_size_pyeong_sam'] is not None:
+                self.room_size_pyeong_sam = detail['room_size_pyeong_sam']
+            else:
+                failure("room_size_not_found", "33m2에서 %s 의 전용 면적을 찾을 수 없습니다.", self.sam_id)
+
+            if detail['room_type'] is not None:
+                self.room_type = detail['room_type']
+            else:
+                failure("room_type_not_found", "33m2에서 %s 의 건물 유형을 찾을 수 없습니다.", self.sam_id)
+
+        else:
+            failure("place_detail_not_found", "(전용면적) %s 에서 place_detail 클래스를 가진 ul을 찾을 수 없습니다.", self.sam_id)
+
+        # self.valid = True
+        return self.address_query
+
+    # start부터 weeks주 견적 요청 (start가 없으면 다음 달 1일)
+    def rentFeeArgs(self, start: date = None, weeks: int = 4):
+        # 요청 헤더
+        headers = dict(BOOKING_HEADERS, Referer=self.url)
+
+        # 유효한 날을 선택해야하기 때문에 예약이 없을거같은 날짜(다음 달 1일)를 기본으로 설정
+        start = start or default_quote_start()
+
+        # 요청 데이터
+        data = {
+            'rid': int(self.sam_id),  # 방 ID
+            'start_date': start.isoformat(),
+            'end_date': quote_end(start, weeks).isoformat(),
+            'week': str(weeks),
+            'is_extend': 'false',
+            'popup': 'true'
+        }
+        return headers, data
+
+    def updateRentFee(self):
+        self.parseRentFee(self.fetchRentFee())
+
+    def fetchRentFee(self):
+
+        # 2. 가격 정보 가져오기
+        headers, data = self.rentFeeArgs()
+
+        # POST 요청 보내기
+        response = SCHEDULER.post(SAM_BOOKING_URL, headers=headers, data=data)
+
+        return response.text
+
+    def parseRentFee(self, text: str):
+        # contract_list 내의 가격 추출
+        self.applyRentFee(parse_contract_list(text))
+
+    # parse_contract_list의 결과를 채움
+    def applyRentFee(self, prices_dict: dict):
+        self.prices = contract_breakdown(prices_dict, self.sam_id)
+
+    def vacancyArgs(self, year: int, month: int):
+        # 헤더 정보
+        headers = dict(SCHEDULE_HEADERS, Referer=self.url)
+
+        # 요청 데이터
+        data = {
+            "rid": int(self.sam_id),  # room ID
+            "year": str(year),  # year
+            "month": str(month)    # month
+        }
+        return headers, data
+
+    def updateVacancyRate(self, duration = 28):
+        self.vacancy_rate = -1 # 오류시
+        self.vacancy_calendar = self.loadVacancyCalendar(duration)
+
+        # 날짜 수 추출
+        self.vacancy_rate = self.vacancy_calendar.rate(duration)
+
+    # 내일부터 days일을 계산하는데 필요한 달의 일정을 불러옴 (이미 불러온 달과 캐시에 있는 달은 요청하지 않음)
+    def loadVacancyCalendar(self, days = 28, start = None, end = None):
+        # 여러달 request할 수 있음
+        def fetch_month(year, month):
+            headers, data = self.vacancyArgs(year, month)
+
+            # POST 요청 보내기
+            response = SCHEDULER.post(SAM_SCHEDULE_URL, headers=headers, data=data)
+
+            # 응답 오류
+            if response.status_code != 200:
+                failure("schedule_http_error", "33m2에서 %s 의 일정을 받지 못했습니다. Error: %s", self.sam_id, response.status_code)
+                return MISSING
+
+            return response.json()["schedule_list"]
+
+        # lazy Room에서 vacancy 단계를 실행하지 않도록 __dict__에서 읽음
+        return load_calendar(self.sam_id, days, fetch_month, self.__dict__.get('vacancy_calendar'), start, end)
+
+    # 여러 기간의 공실률 {28: 0.8, 56: 0.7, ...}
+    def vacancyRates(self, windows = VACANCY_WINDOWS):
+        self.vacancy_calendar = self.loadVacancyCalendar(max(windows))
+        return self.vacancy_calendar.rates(windows)
+
+    # [start, end) 기간의 공실률
+    def vacancyRateBetween(self, start, end):
+        self.vacancy_calendar = self.loadVacancyCalendar(start=start, end=end)
+        return self.vacancy_calendar.rate_between(start, end)
+
+    def landPriceSearchUrl(self):
+        # 카카오에서 찾지 못한 주소는 Address만 있고 도로명/건물명이 없음
+        if getattr(self.address, 'doro', None) is None:
+            failure("address_missing", "room id %s 의 주소가 없습니다.", self.sam_id)
+            return None
+
+        # naver id 검색하기
+        # search/result/에서 
+        building_name_url = remove_trailing_numerals(self.address.building_name_preprocessed)
+
+        return NAVER_SEARCH_URL_PREFIX + building_name_url
+
+    def naverIdKey(self):
+        return self.address.building_name_preprocessed + "|" + self.address.doro.road_name
+
+    def naverComplexUrl(self):
+        return NAVER_COMPLEX_URL_PREFIX + self.naver_id + NAVER_COMPLEX_URL_SUFFIX
+
+    # parse(parse 함수, text)로 파싱 방법을 바꿀 수 있음 (예: 프로세스 풀에서 파싱, parse_pool.py)
+    # exact가 아니면 네이버에서 가격을 찾지 못했을 때 주변 단지의 매물을 대신 사용 (matchComparablePrice)
+    def updateLandPrice(self, exact: bool = True, tolerance: int = ROOM_SIZE_TOLERANCE, parse = None):
+        if not self.searchLandPrice(exact, tolerance, parse) and not exact:
+            self.matchComparablePrice(tolerance)
+
+    # 네이버 부동산에서 단지를 찾아 가격을 채우고, 찾았으면 True
+    def searchLandPrice(self, exact: bool = True, tolerance: int = ROOM_SIZE_TOLERANCE, parse = None):
+        parse = parse or _parse_here
+        self.naver_id = None
+        search_url = self.landPriceSearchUrl()
+        if search_url is None:
+            return
+
+        # 같은 건물(건물명, 도로명)의 방들은 네이버 검색을 한 번만 함
+        def search():
+            response = self.fetchNaverSearch(search_url)
+            if response is None:
+                return MISSING
+
+            return self.findNaverId(parse(parse_naver_search, response.text), response.url)
+
+        naver_id = NAVER_ID_CACHE.get_or_compute(self.naverIdKey(), search)
+        if naver_id is MISSING or naver_id is None:
+            return None
+        self.naver_id = naver_id
+
+        # 매물 페이지로 들어옴(https://fin.land.naver.com/complexes/18350?tradeTypes=B2&spaceType=평&tab=article)
+        # 단지의 매물 목록도 한 번만 받아서 파싱
+        def complex_articles():
+            text = self.fetchComplexArticles()
+            if text is None:
+                return MISSING
+
+            return ComplexIndex(*parse(parse_complex_page, text))
+
+        index = NAVER_COMPLEX_CACHE.get_or_compute(self.naver_id, complex_articles)
+        if index is MISSING:
+            return None
+
+        return self.matchLandPrice(index, exact, tolerance)
+
+    def fetchNaverSearch(self, search_url: str):
+        response = SCHEDULER.get(search_url, headers=MOBILE_HEADERS)
+
+        if response.status_code != 200:
+            failure("naver_search_http_error", "네이버 부동산에서 응답을 받지 못했습니다. 검색어 : %s", search_url[len(NAVER_SEARCH_URL_PREFIX):])
+            return None
+
+        return response
+
+    def fetchComplexArticles(self):
+        response = SCHEDULER.get(self.naverComplexUrl(), headers=MOBILE_HEADERS)
+
+        if response.status_code != 200:
+            failure("naver_complex_http_error", "%s 에서 응답을 받지 못했습니다.", self.naverComplexUrl())
+            return None
+
+        return response.text
+
+    # 네이버 부동산 검색 결과에서 naver id를 찾아 반환
+    def parseNaverSearch(self, text: str, url: str):
+        return self.findNaverId(parse_naver_search(text), url)
+
+    # parse_naver_search의 결과 (kind, [(주소, href), ...])에서 naver id를 찾음
+    def findNaverId(self, search: tuple, url: str):
+        building_name_url = remove_trailing_numerals(self.address.building_name_preprocessed)
+        kind, results = search
+        # case 1. 검색 매물 없음
+        if kind == 'noresult':
+            failure("naver_no_result", "네이버 부동산에서 해당 매물을 찾을 수 없습니다. 검색어 : %s", building_name_url)
+            return None
+        
+        # 검색 페이지에 들어옴(https://m.land.naver.com/search/result/신안메트로칸)
+        # case 2. 만약 이름이 중복된 건물이 있을 경우 주소를 통해서 하나 선택
+        elif kind == 'layer':
+            # 33m2는 지번주소 제공 / 네이버는 도로명주소 제공 -> 주소 중 앞에서 두번째 행정구역을 비교
+            # 서울시 강남구 테헤란로 -> 강남구 만 이용
+            for address, href in results:
+                if self.address.doro.road_name in address:
+                    return href.split("/")[-1]
+
+            failure("naver_not_matched", "네이버 부동산에서 %s 를 찾지 못했습니다.", self.address)
+            return None
+        
+        # case 3. 바로 매물 페이지에 리디레팅됨
+        elif url.startswith(NAVER_COMPLEX_URL_PREFIX):
+            _url = url.split('?')[0]
+            return _url[len(NAVER_COMPLEX_URL_PREFIX):]
+
+        failure("naver_not_matched", "네이버 부동산에서 %s 를 찾지 못했습니다.", self.address)
+        return None
+
+    # 단지 매물 색인에서 전용면적이 같은 매물의 가격을 찾음
+    # exact가 아니면 전용면적 +-tolerance평 안에서 가장 가까운 매물을 대신 사용
+    # 찾았으면 True. 단지의 매물은 단지 좌표(없으면 방의 좌표)로 spatial.COMPARABLES에 등록해둠
+    def matchLandPrice(self, index, exact: bool = True, tolerance: int = ROOM_SIZE_TOLERANCE):
+        position = index.position
+        if position is None and self.address is not None:
+            position = getattr(self.address, 'longitude', None), getattr(self.address, 'latitude', None)
+        if position is not None:
+            COMPARABLES.add_complex(self.naver_id, *position, index.articles)
+        found = index.find(self.room_size_pyeong_sam)
+
+        if found is None:
+            message = ("네이버 부동산에서 %s 의 전용면적 %s 평 의 매물을 찾지 못하였습니다.", self.naver_id, self.room_size_pyeong_sam)
+            if exact or tolerance <= 0:
+                failure("naver_area_not_found", *message)
+                return False
+            logger.debug(*message)
+            logger.debug("대신하여 전용면적 %s ~ %s 평의 매물을 찾습니다.", self.room_size_pyeong_sam - tolerance, self.room_size_pyeong_sam + tolerance)
+
+            found = index.find(self.room_size_pyeong_sam, tolerance)
+            if found is None:
+                failure("naver_area_nearby_not_found", "네이버 부동산에서 %s 의 전용면적 %s ~ %s 평 의 매물을 찾지 못하였습니다.", self.naver_id, self.room_size_pyeong_sam - tolerance, self.room_size_pyeong_sam + tolerance)
+                return False
+            logger.debug("대신하여 %s 평의 매물을 찾았습니다.", found[0])
+
+        else:
+            logger.debug("네이버 부동산에서 %s 의 전용면적 %s 평 의 매물을 찾았습니다.", self.naver_id, self.room_size_pyeong_sam)
+
+        self.room_size_pyeong_naver, self.deposit, self.monthly_rent = found
+        return True
+
+    # 주변 단지(spatial.COMPARABLES)에서 전용면적 +-tolerance평인 가까운 매물의 가격을 대신 사용
+    # naver_id는 None으로 남으므로 네이버 단지에서 찾은 가격과 구분할 수 있음
+    def matchComparablePrice(self, tolerance: int = ROOM_SIZE_TOLERANCE, index = None):
+        index = index if index is not None else COMPARABLES
+        longitude = getattr(self.address, 'longitude', None)
+        latitude = getattr(self.address, 'latitude', None)
+        found = index.comparable_price(longitude, latitude, self.room_size_pyeong_sam or None, max(tolerance, 0))
+        if found is None:
+            logger.debug("%s 주변 %sm 안에서 전용면적 %s 평 근처의 매물을 찾지 못하였습니다.", self.sam_id, COMPARABLE_RADIUS, self.room_size_pyeong_sam)
+            return False
+
+        logger.debug("%s 주변 단지에서 대신하여 %s 평의 매물을 찾았습니다.", self.sam_id, found[0])
+        self.room_size_pyeong_naver, self.deposit, self.monthly_rent = found
+        return True
+
+
+def room_failed(rid, error: Exception):
+    # 방 하나를 만들다가 난 예외를 남기고 실패한 방으로 셈 (크롤링 루프는 그 방만 버리고 계속 진행)
+    if isinstance(error, requests.RequestException):
+        failure("request_error", "❌ 요청 중 오류 발생: %s %s", rid, error, level=logging.ERROR)
+    else:
+        failure("room_error", "❌ 처리 중 오류 발생: %s %r", rid, error, level=logging.ERROR)
+    room_done('failed')
+
+
+def prefetch_rooms(rooms, fields = None, max_workers = None):
+    # 여러 (lazy) Room의 fields를 동시에 채움
+    rooms = list(rooms)
+    with ThreadPoolExecutor(max_workers) as executor:
+        list(executor.map(lambda room: room.prefetch(fields), rooms))
+    return rooms
+
+
+def default_quote_start():
+    today = date.today()
+    return date(*next_month(today.year, today.month), 1)
+
+
+def quote_end(start: date, weeks: int):
+    # 2026-09-01부터 4주 -> 2026-09-28 (마지막 날 포함)
+    return start + timedelta(days=7 * weeks - 1)
+
+
+# parse_contract_list의 결과를 ROOM_CONTRACT_DATA_LIST 순서의 dict로 바꿈
+# 장기계약 할인이 없으면 "0", 나머지 항목이 견적에 없으면 None
+def contract_breakdown(prices_dict: dict, rid = None):
+    if not prices_dict:
+        failure("contract_empty", "33m2에서 %s 의 견적을 받지 못했습니다.", rid)
+        return {l: None for l in ROOM_CONTRACT_DATA_LIST}
+
+    prices = {}
+    for l in ROOM_CONTRACT_DATA_LIST:
+        if l in prices_dict:
+            prices[l] = prices_dict[l]
+        elif l == "장기계약 할인":
+            prices[l] = "0"
+        else:
+            failure("contract_field_missing", "33m2 %s 의 견적에 %s 항목이 없습니다.", rid, l)
+            prices[l] = None
+    return prices
+
+
+def _parse_here(parse, text: str):
+    return parse(text)
+
+
+# '월세 1,000/80' -> (1000, 80), '월세 1억 2,000/80' -> (12000, 80) (단위 : 만원)
+def parseNaverPrice(text: str):
+    return parse_naver_price(text)
+
+
+# 네이버 부동산 단지 매물 페이지를 [[전용면적(평), 보증금, 월세], ...]로 변환 (페이지 순서 유지)
+def parseComplexArticles(text: str):
+    return parse_complex_articles(text)
+
+
+class ComplexIndex:
+    # 단지 매물 목록을 전용면적(평) -> [(보증금, 월세), ...]로 색인
+    # 한 번 만들어두면 크기가 다른 방들도 dict 조회만으로 가격을 찾음
+    # position : 네이버 단지 페이지의 (경도, 위도), 없으면 None
+    def __init__(self, articles: list, position = None):
+        self.articles = articles
+        self.position = tuple(position) if position else None
+        self.by_area = {}
+        self.first_position = {} # 같은 거리의 면적이 여러개면 페이지에서 먼저 나온 매물을 사용
+        for position, (area, deposit, monthly_rent) in enumerate(articles):
+            self.by_area.setdefault(area, []).append((deposit, monthly_rent))
+            self.first_position.setdefault(area, position)
+
+    def find(self, area: int, tolerance: int = 0):
+        # (찾은 전용면적, 보증금, 월세) 또는 None
+        if area is None:
+            return None
+        if area in self.by_area:
+            return (area,) + self.by_area[area][0]
+
+        for distance in range(1, tolerance + 1):
+            candidates = [a for a in (area - distance, area + distance) if a in self.by_area]
+            if candidates:
+                nearest = min(candidates, key=self.first_position.__getitem__)
+                return (nearest,) + self.by_area[nearest][0]
+        return None
+
+    def prices(self, area: int, tolerance: int = 0):
+        # 전용면적 +-tolerance 안의 모든 매물 [(전용면적, 보증금, 월세), ...]
+        return [(a, deposit, monthly_rent)
+                for a in range(area - tolerance, area + tolerance + 1)
+                for deposit, monthly_rent in self.by_area.get(a, ())]
+
+    def __len__(self):
+        return len(self.articles)
+
+    def to_json(self):
+        return {"articles": self.articles, "position": self.position}
+
+    @staticmethod
+    def from_json(value):
+        # 예전 캐시에는 매물 목록만 저장되어 있음
+        if isinstance(value, list):
+            return ComplexIndex(value)
+        return ComplexIndex(value["articles"], value.get("position"))
+
+
+if __name__ == "__main__":
+    configure_logging(logging.DEBUG)
+    r = Room('38048')
+    print(r.address, r.naver_id, r.sam_id, r.deposit, r.monthly_rent, r.prices)
@@ -0,0 +1,330 @@
+import functools
+import logging
+import requests
+import re
+import time
+from .room import *
+import concurrent.futures
+from .stages import imap_unordered
+from .http_scheduler import SCHEDULER
+from .instrumentation import logger, failure, room_done
+
+SAM_SEARCH_KEYWORD_URL = "https://33m2.co.kr/webmobile/search/list/more"
+SAM_SEARCH_KEYWORD_PAGE_SIZE = 15
+
+# 매물 링크(<a href=".../38048">)의 끝 숫자만 뽑음. BeautifulSoup으로 전체를 파싱하지 않음
+HREF_ID_PATTERN = re.compile(r"""<a\b[^>]*?(?<![\w-])href\s*=\s*["']([^"']*?(\d+))["']""", re.IGNORECASE)
+
+def _sam_search_keyword_page(headers, keyword, property_type, request_num):
+    # 요청 데이터 설정
+    data = {
+        "theme_type": "",
+        "keyword": keyword,  # 사용자가 입력한 키워드
+        "start_num": (request_num * SAM_SEARCH_KEYWORD_PAGE_SIZE),
+        "room_cnt": "",
+        "property_type": property_type,
+        "animal": "false",
+        "subway": "false",
+        "parking_place": "false",
+        "longterm_discount": "false",
+        "early_discount": "false",
+        "min_using_fee": "0",
+        "max_using_fee": "0",
+    }
+
+    # POST 요청
+    response = SCHEDULER.post(SAM_SEARCH_KEYWORD_URL, headers=headers, data=data)
+
+    # 빈 페이지 : [], http 오류발생 : None
+    if len(response.text.strip()) == 0:
+        return []
+    if response.status_code != 200:
+        return None
+
+    # 응답에서 각각의 link 파싱 후 id 저장
+    return [match.group(2) for match in HREF_ID_PATTERN.finditer(response.text)]
+
+# 검색 결과 페이지를 window개씩 미리 동시에 요청하면서 찾은 id를 바로 돌려주는 generator
+# 첫 번째 빈 페이지에서 멈추고, 이미 나온 id는 다시 돌려주지 않음
+def iter_sam_search_keyword(keyword:str, property_type:str = "오피스텔", max_iter = 50, window = 5):
+    headers = {
+        "Content-Type": "application/x-www-form-urlencoded; charset=UTF-8",
+        "Accept": "*/*",
+        "User-Agent": "Mozilla/5.0 (iPhone; CPU iPhone OS 18_0 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/18.0 Mobile/15E148 Safari/604.1",
+        "Referer": f"https://33m2.co.kr/webmobile/search?keyword={requests.utils.quote(keyword)}",
+    }
+
+    seen = set()
+    with concurrent.futures.ThreadPoolExecutor(window) as executor:
+        for window_start in range(0, max_iter, window):
+            request_nums = range(window_start, min(window_start + window, max_iter))
+            futures = [executor.submit(_sam_search_keyword_page, headers, keyword, property_type, request_num)
+                       for request_num in request_nums]
+
+            try:
+                # 페이지 순서대로 처리
+                for future in futures:
+                    page = future.result()
+
+                    # 빈 페이지 또는 http 오류발생
+                    if not page:
+                        return
+
+                    for id in page:
+                        if id not in seen:
+                            seen.add(id)
+                            yield id
+
+            # request 오류발생
+            except requests.RequestException as e:
+                failure("keyword_search_error", "❌ 요청 중 오류 발생: %s", e, level=logging.ERROR)
+                return
+            finally:
+                for future in futures:
+                    future.cancel()
+
+def sam_search_keyword(keyword:str, property_type:str = "오피스텔", max_iter = 50):
+    logger.info("33m2에서 %s(으)로 검색중 (최대 %d건)", keyword, max_iter*SAM_SEARCH_KEYWORD_PAGE_SIZE)
+    ids = list(iter_sam_search_keyword(keyword, property_type, max_iter))
+    logger.info("%d개의 방을 찾았습니다!", len(ids))
+    return ids
+
+SAM_SEARCH_MAP_URL = "https://33m2.co.kr/app/room/search"
+
+
+class MapSearchError(RuntimeError):
+    # 다시 요청해도 매물 목록을 받지 못한 지도 영역이 있음
+    pass
+
+
+SAM_SEARCH_MAP_CAP = 1000 # 한 번에 받을 수 있는 최대 매물 수
+
+SAM_SEARCH_MAP_HEADERS = {
+    "Accept": "*/*",
+    "Content-Type": "application/x-www-form-urlencoded; charset=UTF-8",
+    "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/18.2 Safari/605.1.15",
+    "X-Requested-With": "XMLHttpRequest",
+}
+
+# 지도 영역 안의 매물 목록(json의 list)을 그대로 반환. 실패하면 None
+def sam_search_map_rooms(north_east_lng:float, north_east_lat:float, 
+                         south_west_lng:float, south_west_lat:float, 
+                         map_level:int, property_type:str = "오피스텔"):
+    data = {
+        "sort": "popular",
+        "property_type" : property_type,
+        "now_page": 1,
+        "map_level": map_level,
+        "by_location": "true",
+        "north_east_lng": north_east_lng,
+        "north_east_lat": north_east_lat,
+        "south_west_lng": south_west_lng,
+        "south_west_lat": south_west_lat,
+        "itemcount": SAM_SEARCH_MAP_CAP
+    }
+
+    # data = {
+    #     "theme_type": None,
+    #     "keyword": None,
+    #     "room_cnt": None,
+    #     "property_type": property_type,
+    #     "animal": False,
+    #     "subway": False,
+    #     "longterm_discount": False,
+    #     "early_discount": False,
+    #     "parking_place": False,
+    #     "start_date": None,
+    #     "end_date": None,
+    #     "week": None,
+    #     "min_using_fee": 0,
+    #     "max_using_fee": 1000000,
+    #     "sort": "popular",
+    #     "now_page": 1,
+    #     "map_level": map_level,
+    #     "by_location": True,
+    #     "north_east_lng": north_east_lng,
+    #     "north_east_lat": north_east_lat,
+    #     "south_west_lng": south_west_lng,
+    #     "south_west_lat": south_west_lat,
+    #     "itemcount": 1000
+    # }
+
+    response = SCHEDULER.post(SAM_SEARCH_MAP_URL, headers=SAM_SEARCH_MAP_HEADERS, data=data)
+
+    if response.status_code == 200:
+        json_data = response.json()
+        return json_data.get("list", [])
+    else:
+        failure("map_search_http_error", "지도에서 매물을 가져오는데 실패했습니다. : %s", response.status_code)
+        return None
+
+def sam_search_map(north_east_lng:float, north_east_lat:float, 
+                          south_west_lng:float, south_west_lat:float, 
+                          map_level:int, property_type:str = "오피스텔", with_coords:bool = False):
+    room_list = sam_search_map_rooms(north_east_lng, north_east_lat, south_west_lng, south_west_lat,
+                                     map_level, property_type)
+
+    if room_list is None:
+        return (None, None, None) if with_coords else None
+
+    # room_list = json_data["list"][0]
+    logger.info("%d개의 방을 찾았습니다!", len(room_list))
+    if len(room_list) >= SAM_SEARCH_MAP_CAP:
+        failure("map_search_capped", "한 번에 가져올 수 있는 %d개를 모두 채웠습니다. 누락된 방이 있을 수 있으니 sam_search_map_tiled를 사용하세요.", SAM_SEARCH_MAP_CAP)
+
+    ids = [room["rid"] for room in room_list] # rid
+    if not with_coords:
+        return ids
+
+    lats = [room.get("lat") for room in room_list] # latitude
+    lngs = [room.get("lng") for room in room_list] # longitude
+    return ids, lats, lngs
+
+# 지도 영역을 4등분해가며(quadtree) 검색
+# 한 영역의 결과가 SAM_SEARCH_MAP_CAP개를 채우면 잘린 것이므로 4개로 나눠 다시 검색
+# 같은 깊이의 영역들은 동시에 요청하고, 영역 경계에 걸친 방은 한 번만 셈
+# 요청에 실패한 영역은 retries번까지 다시 요청하고, 그래도 실패하면 MapSearchError (그 영역의 방이 빠지므로)
+# 매물 목록(json의 list 항목)을 처음 찾은 순서대로 반환
+def sam_search_map_tiled_rooms(north_east_lng:float, north_east_lat:float, 
+                               south_west_lng:float, south_west_lat:float, 
+                               map_level:int, property_type:str = "오피스텔",
+                               max_depth:int = 8, max_workers:int = 8, retries:int = 3):
+    rooms = dict() # rid -> 목록 항목, 처음 찾은 순서 유지
+    tiles = [((north_east_lng, north_east_lat, south_west_lng, south_west_lat), 0)] # (영역, 깊이)
+    failures = dict() # 영역 -> 실패 횟수
+    num_requests = 0
+
+    def search(item):
+        return sam_search_map_rooms(*item[0], map_level, property_type)
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers) as executor:
+        while tiles:
+            next_tiles = []
+            for (tile, depth), room_list in zip(tiles, executor.map(search, tiles)):
+                num_requests += 1
+                if room_list is None:
+                    failures[tile] = failures.get(tile, 0) + 1
+                    if failures[tile] > retries:
+                        raise MapSearchError("지도 영역 {} 의 매물을 {}번 모두 가져오지 못했습니다.".format(tile, failures[tile]))
+                    failure("map_search_tile_retry", "지도 영역 %s 을 다시 요청합니다. (%d번째 실패)", tile, failures[tile])
+                    time.sleep(SCHEDULER.backoff_delay(failures[tile]))
+                    next_tiles.append((tile, depth))
+                    continue
+
+                if len(room_list) >= SAM_SEARCH_MAP_CAP and depth < max_depth:
+                    ne_lng, ne_lat, sw_lng, sw_lat = tile
+                    mid_lng = (ne_lng + sw_lng) / 2
+                    mid_lat = (ne_lat + sw_lat) / 2
+                    next_tiles += [
+                        ((ne_lng, ne_lat, mid_lng, mid_lat), depth + 1),
+                        ((mid_lng, ne_lat, sw_lng, mid_lat), depth + 1),
+                        ((ne_lng, mid_lat, mid_lng, sw_lat), depth + 1),
+                        ((mid_lng, mid_lat, sw_lng, sw_lat), depth + 1),
+                    ]
+                    continue
+
+                if len(room_list) >= SAM_SEARCH_MAP_CAP:
+                    failure("map_search_capped", "최대 깊이에서도 %d개를 채운 영역이 있습니다 : %s", SAM_SEARCH_MAP_CAP, tile)
+
+                for room in room_list:
+                    if room["rid"] not in rooms:
+                        rooms[room["rid"]] = room
+
+            tiles = next_tiles
+
+    logger.info("%d번의 요청으로 %d개의 방을 찾았습니다!", num_requests, len(rooms))
+    return list(rooms.values())
+
+def sam_search_map_tiled(north_east_lng:float, north_east_lat:float, 
+                         south_west_lng:float, south_west_lat:float, 
+                         map_level:int, property_type:str = "오피스텔",
+                         max_depth:int = 8, max_workers:int = 8, retries:int = 3):
+    room_list = sam_search_map_tiled_rooms(north_east_lng, north_east_lat, south_west_lng, south_west_lat,
+                                           map_level, property_type, max_depth, max_workers, retries)
+    ids = [room["rid"] for room in room_list] # rid
+    lats = [room.get("lat") for room in room_list] # latitude
+    lngs = [room.get("lng") for room in room_list] # longitude
+    return ids, lats, lngs
+
+
+def process_entry(id, **kwargs):
+    return Room(id, **kwargs)
+
+def process_entry_safe(id, **kwargs):
+    # 오류가 난 방은 실패로 세고 None
+    try:
+        room = Room(id, **kwargs)
+    except Exception as e:
+        room_failed(id, e)
+        return None
+    room_done('ok')
+    return room
+
+# ThreadPoolExecutor를 사용하여 쓰레드 풀 관리
+# sink가 있으면 끝난 방을 바로 기록하고 버림 (동시에 처리중인 방만 메모리에 있음)
+# kwargs는 Room에 넘김 (duration, exact, tolerance)
+def process_in_thread_pool(ids, sink=None, max_workers=None, **kwargs):
+    with concurrent.futures.ThreadPoolExecutor(max_workers) as executor:
+        # 각 id에 대해 process_entry 함수를 실행하고 끝난 작업부터 처리
+        for room in imap_unordered(executor, functools.partial(process_entry_safe, **kwargs), ids):
+            if room is not None and sink is not None:
+                sink.write(room)
+
+# 바뀐 단계만 다시 크롤링. 같은 run_id로 다시 실행하면 끝난 방은 건너뜀
+def process_incremental(ids, run_id=None, sink=None, max_workers=None, **kwargs):
+    from .crawl_state import IncrementalCrawler
+    crawler = IncrementalCrawler(run_id=run_id, **kwargs)
+    crawler.crawl(ids, sink=sink, max_workers=max_workers)
+    logger.info("%s", crawler)
+    return crawler
+
+# 네트워크는 쓰레드, HTML 파싱은 프로세스 풀에서 처리 (코어 수만큼 파싱이 동시에 진행)
+def process_in_parse_pool(ids, sink=None, **kwargs):
+    from .parse_pool import ParsePipeline
+    with ParsePipeline(**kwargs) as pipeline:
+        for room in pipeline.crawl(ids, sink=sink):
+            pass
+
+# 지도 영역(bbox = (north_east_lng, north_east_lat, south_west_lng, south_west_lat)) 안에서 조건에 맞는 방만 크롤링
+# 건물 유형은 검색 요청에, 나머지 조건은 싼 단계부터 적용해서 통과한 방만 카카오/네이버를 요청 (screening.py)
+# rooms = crawl(bbox, RoomFilter(max_rent=1200000, min_size=7))
+def crawl(bbox, filters=None, map_level:int = 3, sink=None, max_workers=None, **kwargs):
+    from .screening import RoomFilter, Screening
+    filters = filters or RoomFilter()
+
+    room_list = []
+    seen = set()
+    for property_type in filters.property_types or ("오피스텔",):
+        for item in sam_search_map_tiled_rooms(*bbox, map_level, property_type):
+            if item["rid"] not in seen:
+                seen.add(item["rid"])
+                room_list.append(dict(item, property_type=item.get("property_type", property_type)))
+
+    screening = Screening(filters, **kwargs)
+    rooms = list(screening.run(room_list, sink=sink, max_workers=max_workers))
+    logger.info("%s", screening)
+    return rooms
+
+# 쓰레드 대신 하나의 이벤트 루프에서 모든 방을 처리
+def process_in_event_loop(ids, sink=None, **kwargs):
+    from .async_room import crawl_rooms
+    return crawl_rooms(ids, sink=sink, **kwargs)
+
+# coordinator : 지도 영역(bbox)이나 키워드로 검색한 방 id를 작업 큐(work_queue.py)에 넣음
+# 키워드 검색은 페이지를 받는 대로 넣으므로 검색이 끝나기 전에 worker가 시작할 수 있음
+def enqueue_search(queue, bbox=None, keyword=None, map_level:int = 3, property_type:str = "오피스텔"):
+    from .work_queue import enqueue
+    added = 0
+    if bbox is not None:
+        ids, _, _ = sam_search_map_tiled(*bbox, map_level, property_type)
+        added += enqueue(queue, ids)
+    if keyword is not None:
+        added += enqueue(queue, iter_sam_search_keyword(keyword, property_type))
+    logger.info("%d개의 방을 큐에 넣었습니다. (%s)", added, queue)
+    return added
+
+# worker : 여러 서버/프로세스가 같은 큐에서 방을 빌려 나눠서 크롤링 (방마다 한 번만 sink에 기록)
+def process_from_queue(queue, sink=None, max_workers=None, wait=False, **kwargs):
+    from .work_queue import QueueWorker
+    return QueueWorker(queue, sink=sink, max_workers=max_workers or 16, wait=wait, **kwargs).run()
+
@@ -0,0 +1,144 @@
+import concurrent.futures
+import threading
+from dataclasses import dataclass
+
+from .room import Room, ROOM_SIZE_TOLERANCE
+from .stages import imap_unordered
+from .instrumentation import room_done
+
+# 조건에 맞는 방만 끝까지 크롤링하는 screening 파이프라인
+# 싼 단계에서 먼저 걸러내고, 남은 방만 다음 단계를 요청
+#   1. listing  : 지도 검색 결과(json) 항목만으로 판단. 요청 없음
+#   2. rent_fee : 예약 견적 + 예약 일정 (33m2)
+#   3. detail   : 상세 페이지 (33m2)
+#   4. land_price : 카카오 주소 + 네이버 부동산
+# 카카오/네이버 요청 수는 지도 안의 모든 방이 아니라 앞의 조건을 통과한 방 수에 비례함
+
+SCREEN_STAGES = ['listing', 'rent_fee', 'detail', 'land_price']
+
+# 단계별로 미리 채울 Room 필드 (Room.prefetch)
+# 공실률(예약 일정)은 RoomFilter에 공실률 조건이 있을 때만 rent_fee 단계에서 채움 (RoomFilter.fields)
+SCREEN_FIELDS = {
+    'rent_fee': ['prices'],
+    'detail': ['room_name', 'room_size_pyeong_sam', 'room_type'],
+    'land_price': ['address', 'deposit'],
+}
+
+
+def _between(value, low, high):
+    # 조건이 없으면 통과, 값이 없으면(찾지 못함) 탈락
+    if low is None and high is None:
+        return True
+    if value is None:
+        return False
+    return (low is None or value >= low) and (high is None or value <= high)
+
+
+@dataclass
+class RoomFilter:
+    # None인 조건은 검사하지 않음
+    property_types: tuple = None    # 검색할 건물 유형 (지도 검색 요청에 넣음)
+    min_using_fee: int = None       # 검색 결과의 using_fee (원)
+    max_using_fee: int = None
+    min_rent: int = None            # 예약 견적의 임대료 (원, 4주)
+    max_rent: int = None
+    min_vacancy_rate: float = None
+    max_vacancy_rate: float = None
+    room_types: tuple = None        # 상세 페이지의 건물 유형
+    min_size: int = None            # 상세 페이지의 전용면적 (평)
+    max_size: int = None
+    max_deposit: int = None         # 네이버 부동산 보증금 (만원)
+    max_monthly_rent: int = None    # 네이버 부동산 월세 (만원)
+    where: object = None            # 모든 단계가 끝난 Room을 받아 True/False를 반환하는 함수
+
+    def listing(self, item: dict):
+        # 검색 결과에 필드가 없으면 다음 단계에서 판단하도록 통과
+        if self.property_types is not None and item.get("property_type") is not None \
+                and item["property_type"] not in self.property_types:
+            return False
+        if item.get("using_fee") is not None \
+                and not _between(item["using_fee"], self.min_using_fee, self.max_using_fee):
+            return False
+        return True
+
+    def has_vacancy_bound(self):
+        return self.min_vacancy_rate is not None or self.max_vacancy_rate is not None
+
+    def fields(self, stage: str):
+        # stage에서 검사하기 전에 채울 Room 필드
+        if stage == 'rent_fee' and self.has_vacancy_bound():
+            return SCREEN_FIELDS[stage] + ['vacancy_rate']
+        return SCREEN_FIELDS[stage]
+
+    def rent_fee(self, room: Room):
+        rent = room.prices.get("임대료") if room.prices else None
+        if not _between(rent, self.min_rent, self.max_rent):
+            return False
+        # 조건이 없으면 vacancy_rate를 읽지 않음 (lazy Room은 읽을 때 예약 일정을 요청함)
+        return not self.has_vacancy_bound() or \
+            _between(room.vacancy_rate, self.min_vacancy_rate, self.max_vacancy_rate)
+
+    def detail(self, room: Room):
+        if self.room_types is not None and room.room_type not in self.room_types:
+            return False
+        return _between(room.room_size_pyeong_sam, self.min_size, self.max_size)
+
+    def land_price(self, room: Room):
+        if not _between(room.deposit, None, self.max_deposit):
+            return False
+        if not _between(room.monthly_rent, None, self.max_monthly_rent):
+            return False
+        return self.where is None or bool(self.where(room))
+
+
+class Screening:
+    def __init__(self, filters: RoomFilter = None, duration: int = 28, exact: bool = False,
+                 tolerance: int = ROOM_SIZE_TOLERANCE):
+        self.filters = filters or RoomFilter()
+        self.duration = duration
+        self.exact = exact
+        self.tolerance = tolerance
+        self.passed = {stage: 0 for stage in SCREEN_STAGES}
+        self.total = 0
+        self._lock = threading.Lock()
+
+    def _count(self, stage: str):
+        with self._lock:
+            self.passed[stage] += 1
+
+    def screen_listings(self, room_list):
+        # 검색 결과 항목 -> 조건을 통과한 rid
+        for item in room_list:
+            self.total += 1
+            if self.filters.listing(item):
+                self._count('listing')
+                yield item["rid"]
+
+    def screen_room(self, rid):
+        # 단계마다 필요한 필드만 채우고 조건에 맞지 않으면 바로 멈춤. 통과하면 Room, 아니면 None
+        room = Room(rid, self.duration, lazy=True, exact=self.exact, tolerance=self.tolerance)
+        for stage in SCREEN_STAGES[1:]:
+            room.prefetch(self.filters.fields(stage))
+            if not getattr(self.filters, stage)(room):
+                return None
+            self._count(stage)
+        # 조건에 쓰지 않은 나머지 필드
+        room.prefetch()
+        return room
+
+    def run(self, room_list, sink=None, max_workers: int = None):
+        # 통과한 Room을 끝난 순서대로 돌려줌
+        with concurrent.futures.ThreadPoolExecutor(max_workers) as executor:
+            for room in imap_unordered(executor, self.screen_room, self.screen_listings(room_list)):
+                if room is None:
+                    room_done('screened_out')
+                    continue
+                room_done('ok')
+                if sink is not None:
+                    sink.write(room)
+                yield room
+
+    def __str__(self):
+        counts = ["검색 {}개".format(self.total)] + \
+            ["{} {}개".format(stage, self.passed[stage]) for stage in SCREEN_STAGES]
+        return " -> ".join(counts)
@@ -0,0 +1,217 @@
+import json
+import os
+from datetime import datetime
+
+from .constants import ROOM_CONTRACT_DATA_LIST
+
+# 크롤링이 끝난 방을 하나씩 파일에 이어 쓰는 결과 저장소
+# 모든 Room을 메모리에 들고 있지 않고, batch_size개마다 디스크에 내려씀
+# 비정상 종료시 잃는 것은 아직 flush하지 않은 마지막 batch 뿐
+#   jsonl   : 파일 하나에 이어 씀
+#   parquet : 디렉터리에 flush마다 part 파일 하나 (part-00001.parquet, ...)
+
+ADDRESS_FIELDS = ['region_1depth_name', 'region_2depth_name', 'region_3depth_name',
+                  'main_address_no', 'sub_address_no']
+ROAD_FIELDS = ['road_name', 'main_building_no', 'sub_building_no']
+
+
+def _int_or_none(value):
+    if value is None:
+        return None
+    return int(value)
+
+
+def _float_or_none(value):
+    if value is None:
+        return None
+    return float(value)
+
+
+def room_to_record(room):
+    # Room -> json으로 쓸 수 있는 dict
+    address = room.address
+    jibun = getattr(address, 'jibun', None)
+    doro = getattr(address, 'doro', None)
+
+    record = {
+        'sam_id': str(room.sam_id),
+        'naver_id': room.naver_id,
+        'room_name': room.room_name,
+        'room_type': room.room_type,
+        'room_size_pyeong_sam': room.room_size_pyeong_sam,
+        'room_size_pyeong_naver': room.room_size_pyeong_naver,
+    }
+    for field in ADDRESS_FIELDS:
+        record[field] = getattr(jibun, field, None)
+    for field in ROAD_FIELDS:
+        record[field] = getattr(doro, field, None)
+    record['building_name'] = getattr(address, 'building_name', None)
+    record['floor'] = getattr(address, 'floor', None)
+    record['postcode'] = getattr(address, 'postcode', None)
+    record['longitude'] = _float_or_none(getattr(address, 'longitude', None))
+    record['latitude'] = _float_or_none(getattr(address, 'latitude', None))
+
+    # 장기계약 할인이 없으면 "0"으로 들어있으므로 숫자로 통일
+    record['prices'] = {key: _int_or_none(value) for key, value in room.prices.items()} if room.prices else None
+    record['vacancy_rate'] = room.vacancy_rate
+    record['deposit'] = room.deposit
+    record['monthly_rent'] = room.monthly_rent
+    record['crawled_at'] = datetime.now().isoformat(timespec='seconds')
+    return record
+
+
+class JsonlSink:
+    # 한 줄에 방 하나씩 append
+    def __init__(self, path: str, batch_size: int = 100):
+        self.path = path
+        self.batch_size = batch_size
+        self.count = 0
+        self._buffer = []
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def write(self, room):
+        self.write_record(room_to_record(room))
+
+    def write_record(self, record: dict):
+        self._buffer.append(json.dumps(record, ensure_ascii=False))
+        self.count += 1
+        if len(self._buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if self._buffer:
+            self._file.write("\n".join(self._buffer) + "\n")
+            self._buffer = []
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        if self._file is not None:
+            self.flush()
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _parquet_schema(pa):
+    string_fields = ['sam_id', 'naver_id', 'room_name', 'room_type'] + ADDRESS_FIELDS + ROAD_FIELDS + \
+        ['building_name', 'floor', 'postcode', 'crawled_at']
+    fields = [(field, pa.string()) for field in string_fields]
+    fields += [
+        ('room_size_pyeong_sam', pa.int32()),
+        ('room_size_pyeong_naver', pa.int32()),
+        ('longitude', pa.float64()),
+        ('latitude', pa.float64()),
+        ('prices', pa.struct([(key, pa.int64()) for key in ROOM_CONTRACT_DATA_LIST])),
+        ('vacancy_rate', pa.float64()),
+        ('deposit', pa.int64()),
+        ('monthly_rent', pa.int64()),
+    ]
+    return pa.schema(fields)
+
+
+PARQUET_PART = "part-{:05d}.parquet"
+
+
+class ParquetSink:
+    # path는 디렉터리. batch_size개마다(flush마다) 완성된 parquet 파일 하나를 씀 (pyarrow 필요)
+    # parquet은 파일을 닫아야 footer가 써지므로 파일 하나에 이어 쓰면 비정상 종료시 파일 전체를 읽을 수 없음
+    # part 파일은 임시 파일에 쓴 뒤 이름을 바꾸므로 디렉터리의 part 파일은 모두 읽을 수 있음
+    # 다시 실행하면 다음 번호부터 이어 씀. 읽기 : pyarrow.parquet.read_table(path), pandas.read_parquet(path)
+    def __init__(self, path: str, batch_size: int = 1000):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("ParquetSink를 사용하려면 pyarrow가 필요합니다. (pip install pyarrow)")
+
+        if os.path.isfile(path):
+            raise ValueError("{} 은 파일입니다. ParquetSink는 part 파일을 넣을 디렉터리가 필요합니다.".format(path))
+
+        self._pa = pa
+        self._pq = pq
+        self.path = path
+        self.batch_size = batch_size
+        self.count = 0
+        self.schema = _parquet_schema(pa)
+        self._buffer = []
+        os.makedirs(path, exist_ok=True)
+        parts = [name for name in os.listdir(path) if name.startswith("part-") and name.endswith(".parquet")]
+        self._part = max((int(name[5:-8]) for name in parts), default=0)
+
+    def write(self, room):
+        self.write_record(room_to_record(room))
+
+    def write_record(self, record: dict):
+        self._buffer.append(record)
+        self.count += 1
+        if len(self._buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if self._buffer:
+            table = self._pa.Table.from_pylist(self._buffer, schema=self.schema)
+            self._part += 1
+            name = PARQUET_PART.format(self._part)
+            # '.'으로 시작하는 파일은 pyarrow가 읽지 않으므로 쓰다가 죽어도 남은 임시 파일은 무시됨
+            temporary = os.path.join(self.path, "." + name + ".tmp")
+            self._pq.write_table(table, temporary, row_group_size=len(self._buffer))
+            os.replace(temporary, os.path.join(self.path, name))
+            self._buffer = []
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class MultiSink:
+    # 여러 저장소에 동시에 기록 (예: jsonl + parquet)
+    def __init__(self, *sinks):
+        self.sinks = sinks
+
+    @property
+    def count(self):
+        return self.sinks[0].count if self.sinks else 0
+
+    def write(self, room):
+        record = room_to_record(room)
+        for sink in self.sinks:
+            sink.write_record(record)
+
+    def write_record(self, record: dict):
+        for sink in self.sinks:
+            sink.write_record(record)
+
+    def flush(self):
+        for sink in self.sinks:
+            sink.flush()
+
+    def close(self):
+        for sink in self.sinks:
+            sink.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def open_sink(path: str, **kwargs):
+    # 확장자로 저장 형식 선택 (.parquet이면 parquet, 나머지는 jsonl)
+    if path.endswith(".parquet"):
+        return ParquetSink(path, **kwargs)
+    return JsonlSink(path, **kwargs)
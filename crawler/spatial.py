@@ -0,0 +1,197 @@
+import heapq
+import math
+import statistics
+import threading
+from dataclasses import dataclass
+
+# 크롤링한 방과 네이버 부동산 단지 매물의 위치 색인 (HTTP 요청 없이 주변 매물 조회)
+# 좌표(경도, 위도)를 일정한 크기(기본 250m)의 격자로 나눠 dict에 담고
+# 반경 r 안의 격자만 훑어서 가까운 매물 k개를 찾음
+#
+#   네이버 단지 : 매물 목록을 받으면(Room.matchLandPrice) 단지 좌표에 단지의 모든 매물을 등록
+#                 (단지 페이지에 좌표가 없으면 처음 받은 방의 좌표)
+#   방         : RoomBatch/jsonl(from_batch, from_jsonl)에서 33m2 임대료와 전용면적을 등록
+#
+#   COMPARABLES.nearest(127.06, 37.50, size=8, tolerance=1)  # 500m 안, 7~9평 네이버 매물 5개
+#   COMPARABLES.report(127.06, 37.50, radius=1000)           # 주변 임대료/월세 중앙값
+#
+# Room.updateLandPrice는 exact가 아닐 때 네이버 검색이나 전용면적 매칭에 실패하면
+# 이 색인에서 주변 단지의 같은 면적대 매물을 대신 사용함 (naver_id는 None으로 남음)
+NAVER = 'naver'
+ROOM = 'room'
+
+CELL_METERS = 250
+COMPARABLE_RADIUS = 500
+COMPARABLE_K = 5
+
+METERS_PER_DEGREE_LAT = 110574
+METERS_PER_DEGREE_LNG = 111320
+# 한국(위도 33~39도)에서 경도 1도의 가장 짧은 길이 기준으로 격자를 나누면
+# 반경 r을 덮는 격자 수를 위도와 관계없이 계산할 수 있음
+_MIN_LATITUDE_COS = math.cos(math.radians(39))
+
+
+@dataclass(frozen=True, slots=True)
+class Comparable:
+    kind: str           # NAVER | ROOM
+    key: str            # naver id 또는 33m2 방 id
+    longitude: float
+    latitude: float
+    size: int           # 전용면적(평)
+    deposit: int        # 네이버 보증금 (만원, 방은 None)
+    monthly_rent: int   # 네이버 월세 (만원, 방은 None)
+    rent: int           # 33m2 임대료 (원, 네이버는 None)
+
+
+def _float_or_none(value):
+    if value is None or value == "":
+        return None
+    value = float(value)
+    return None if math.isnan(value) else value
+
+
+def _int_or_none(value):
+    value = _float_or_none(value)
+    return None if value is None else int(value)
+
+
+class ComparableIndex:
+    def __init__(self, cell_meters: float = CELL_METERS):
+        self.cell_meters = cell_meters
+        self.cell_lat = cell_meters / METERS_PER_DEGREE_LAT
+        self.cell_lng = cell_meters / (METERS_PER_DEGREE_LNG * _MIN_LATITUDE_COS)
+        self.cells = {NAVER: {}, ROOM: {}}  # {kind: {(경도 칸, 위도 칸): {전용면적: [Comparable, ...]}}}
+        self.keys = set()                    # 등록한 (kind, key)
+        self._lock = threading.Lock()
+
+    def _cell(self, longitude: float, latitude: float):
+        return int(longitude // self.cell_lng), int(latitude // self.cell_lat)
+
+    def _add(self, key, comparables):
+        # key(kind, id)를 처음 등록할 때만 comparables를 넣고 True
+        # 확인과 등록을 한 번에 하므로 여러 쓰레드가 같은 단지/방을 등록해도 한 번만 들어감
+        with self._lock:
+            if key in self.keys:
+                return False
+            self.keys.add(key)
+            for comparable in comparables:
+                cell = self.cells[comparable.kind].setdefault(self._cell(comparable.longitude, comparable.latitude), {})
+                cell.setdefault(comparable.size, []).append(comparable)
+            return True
+
+    def add_complex(self, naver_id, longitude, latitude, articles):
+        # articles : [[전용면적(평), 보증금, 월세], ...] (ComplexIndex.articles)
+        # 같은 단지는 한 번만 등록
+        longitude, latitude = _float_or_none(longitude), _float_or_none(latitude)
+        if naver_id is None or longitude is None or latitude is None:
+            return False
+        return self._add((NAVER, str(naver_id)),
+                         [Comparable(NAVER, str(naver_id), longitude, latitude, area, deposit, monthly_rent, None)
+                          for area, deposit, monthly_rent in articles])
+
+    def add_room(self, sam_id, longitude, latitude, size, rent):
+        longitude, latitude = _float_or_none(longitude), _float_or_none(latitude)
+        if longitude is None or latitude is None:
+            return False
+        return self._add((ROOM, str(sam_id)), (Comparable(ROOM, str(sam_id), longitude, latitude, size, None, None, rent),))
+
+    def add_batch(self, batch):
+        # RoomBatch의 방들과, 네이버 가격을 찾은 방의 단지 매물(방의 좌표, 네이버 전용면적)을 등록
+        columns = [batch.column(name) for name in ('sam_id', 'naver_id', 'longitude', 'latitude',
+                                                   'room_size_pyeong_sam', 'room_size_pyeong_naver',
+                                                   'rent', 'deposit', 'monthly_rent')]
+        for sam_id, naver_id, longitude, latitude, size_sam, size_naver, rent, deposit, monthly_rent in zip(*columns):
+            sam_id, naver_id = _int_or_none(sam_id), _int_or_none(naver_id)
+            if sam_id is not None:
+                self.add_room(sam_id, longitude, latitude, _int_or_none(size_sam), _int_or_none(rent))
+            if naver_id is not None and _float_or_none(monthly_rent) is not None:
+                # 단지의 매물 중 이 방과 맞춘 것 하나만 알고 있음
+                self.add_complex(naver_id, longitude, latitude,
+                                 [[_int_or_none(size_naver), _int_or_none(deposit), _int_or_none(monthly_rent)]])
+        return self
+
+    @staticmethod
+    def from_batch(batch, cell_meters: float = CELL_METERS):
+        return ComparableIndex(cell_meters).add_batch(batch)
+
+    @staticmethod
+    def from_jsonl(path: str, cell_meters: float = CELL_METERS):
+        from .records import RoomBatch
+        return ComparableIndex.from_batch(RoomBatch.from_jsonl(path), cell_meters)
+
+    def within(self, longitude: float, latitude: float, radius: float = COMPARABLE_RADIUS, kind: str = NAVER,
+               size: int = None, tolerance: int = 0):
+        # 반경 radius(m) 안의 (거리, Comparable)들 (순서 없음)
+        # size가 있으면 전용면적 size +-tolerance평만 (격자 안에서도 전용면적별로 나눠둠)
+        cx, cy = self._cell(longitude, latitude)
+        rings = int(math.ceil(radius / self.cell_meters))
+        cells = self.cells[kind]
+        sizes = None if size is None else range(size - tolerance, size + tolerance + 1)
+        lng_meters = METERS_PER_DEGREE_LNG * math.cos(math.radians(latitude))
+        # 다른 쓰레드가 등록하는 중에 격자와 목록이 바뀌지 않도록 후보만 lock 안에서 복사
+        candidates = []
+        with self._lock:
+            for x in range(cx - rings, cx + rings + 1):
+                for y in range(cy - rings, cy + rings + 1):
+                    cell = cells.get((x, y))
+                    if cell is None:
+                        continue
+                    for group in (cell.values() if sizes is None else (cell.get(s) for s in sizes)):
+                        candidates.extend(group or ())
+        found = []
+        for comparable in candidates:
+            d = math.hypot((comparable.longitude - longitude) * lng_meters,
+                           (comparable.latitude - latitude) * METERS_PER_DEGREE_LAT)
+            if d <= radius:
+                found.append((d, comparable))
+        return found
+
+    def nearest(self, longitude: float, latitude: float, k: int = COMPARABLE_K, radius: float = COMPARABLE_RADIUS,
+                kind: str = NAVER, size: int = None, tolerance: int = 0):
+        # 가까운 순서로 최대 k개의 (거리, Comparable)
+        return heapq.nsmallest(k, self.within(longitude, latitude, radius, kind, size, tolerance),
+                               key=lambda item: item[0])
+
+    def comparable_price(self, longitude, latitude, size, tolerance: int = 1, k: int = COMPARABLE_K,
+                         radius: float = COMPARABLE_RADIUS):
+        # 주변 단지의 같은 면적대 매물 k개 중 월세가 중앙값인 매물 (전용면적, 보증금, 월세) 또는 None
+        longitude, latitude = _float_or_none(longitude), _float_or_none(latitude)
+        if longitude is None or latitude is None or size is None:
+            return None
+        found = [comparable for _, comparable in self.nearest(longitude, latitude, k, radius, NAVER, size, tolerance)
+                 if comparable.monthly_rent is not None]
+        if not found:
+            return None
+        found.sort(key=lambda comparable: (comparable.monthly_rent, comparable.deposit or 0))
+        median = found[(len(found) - 1) // 2]
+        return median.size, median.deposit, median.monthly_rent
+
+    def report(self, longitude: float, latitude: float, radius: float = 1000, size: int = None, tolerance: int = 0):
+        # 주변 시세 요약 (값이 없으면 None)
+        rooms = [comparable for _, comparable in self.within(longitude, latitude, radius, ROOM, size, tolerance)]
+        articles = [comparable for _, comparable in self.within(longitude, latitude, radius, NAVER, size, tolerance)]
+
+        def median(values):
+            values = [value for value in values if value is not None]
+            return statistics.median(values) if values else None
+
+        return {
+            'rooms': len(rooms),
+            'rent_median': median(comparable.rent for comparable in rooms),
+            'complexes': len({comparable.key for comparable in articles}),
+            'articles': len(articles),
+            'deposit_median': median(comparable.deposit for comparable in articles),
+            'monthly_rent_median': median(comparable.monthly_rent for comparable in articles),
+        }
+
+    def __len__(self):
+        with self._lock:
+            return sum(len(group) for cells in self.cells.values() for cell in cells.values() for group in cell.values())
+
+    def __str__(self):
+        return "ComparableIndex : 단지/방 {}개, 매물 {}개, 격자 {}칸".format(
+            len(self.keys), len(self), len(self.cells[NAVER].keys() | self.cells[ROOM].keys()))
+
+
+# 크롤링 중에 받은 단지 매물이 쌓이는 색인 (Room.matchLandPrice가 등록)
+COMPARABLES = ComparableIndex()
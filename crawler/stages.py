@@ -0,0 +1,205 @@
+import asyncio
+import concurrent.futures
+import threading
+
+from .instrumentation import span
+
+# 방 하나를 만드는 단계들을 의존관계 그래프(DAG)로 실행
+# stages : {이름: (의존하는 단계 이름들, 실행할 함수)}
+# 의존하는 단계가 모두 끝나면 바로 시작하므로, 서로 관계없는 요청들은 동시에 진행됨
+# 단계 함수가 False를 반환하면 실패로 보고 그 단계에 의존하는 단계들은 실행하지 않음
+# 단계 함수가 Future를 반환하면 (예: 프로세스 풀에 넘긴 파싱) 그 Future가 끝날 때 단계가 끝남
+# 단계마다 'stage' span을 남김 (Future를 반환한 단계는 제출하는 데 걸린 시간만)
+
+def toposort(stages: dict):
+    order = []
+    visiting = set()
+    done = set()
+
+    def visit(name):
+        if name in done:
+            return
+        if name in visiting:
+            raise ValueError("단계 간 순환 의존이 있습니다 : " + name)
+        visiting.add(name)
+        for dep in stages[name][0]:
+            visit(dep)
+        visiting.discard(name)
+        done.add(name)
+        order.append(name)
+
+    for name in stages:
+        visit(name)
+    return order
+
+
+def _copy_future(source: concurrent.futures.Future, target: concurrent.futures.Future):
+    if source.exception() is not None:
+        target.set_exception(source.exception())
+    else:
+        target.set_result(source.result())
+
+
+def then(future: concurrent.futures.Future, fn):
+    # future의 결과로 fn을 실행한 결과를 갖는 Future (fn은 future를 끝낸 쓰레드에서 실행되므로 가벼운 일만)
+    result = concurrent.futures.Future()
+
+    def callback(done):
+        try:
+            result.set_result(fn(done.result()))
+        except BaseException as e:
+            result.set_exception(e)
+
+    future.add_done_callback(callback)
+    return result
+
+
+def then_submit(future: concurrent.futures.Future, fn, executor: concurrent.futures.Executor):
+    # then과 같지만 fn을 executor에서 실행 (네트워크 요청 등 무거운 일)
+    # fn이 Future를 반환하면 그 Future가 끝날 때 결과도 끝남
+    result = concurrent.futures.Future()
+
+    def run(value):
+        try:
+            out = fn(value)
+        except BaseException as e:
+            result.set_exception(e)
+            return
+        if isinstance(out, concurrent.futures.Future):
+            out.add_done_callback(lambda done: _copy_future(done, result))
+        else:
+            result.set_result(out)
+
+    def callback(done):
+        if done.exception() is not None:
+            result.set_exception(done.exception())
+        else:
+            executor.submit(run, done.result())
+
+    future.add_done_callback(callback)
+    return result
+
+
+def submit_stages(stages: dict, executor: concurrent.futures.Executor):
+    # 단계마다 Future를 하나씩 만들고, 의존하는 Future들이 끝나면 executor에 제출
+    # 작업 쓰레드가 다른 단계를 기다리며 막히지 않으므로 executor 크기와 관계없이 교착되지 않음
+    # 모든 단계가 끝나면 {이름: 결과}를 갖는 Future를 반환
+    futures = {name: concurrent.futures.Future() for name in stages}
+    lock = threading.Lock()
+
+    def start(name):
+        deps, fn = stages[name]
+        for dep in deps:
+            dep_future = futures[dep]
+            if dep_future.exception() is not None:
+                futures[name].set_exception(dep_future.exception())
+                return
+            if dep_future.result() is False:
+                futures[name].set_result(False)
+                return
+
+        def run():
+            try:
+                with span('stage', stage=name):
+                    result = fn()
+            except BaseException as e:
+                futures[name].set_exception(e)
+                return
+            if isinstance(result, concurrent.futures.Future):
+                result.add_done_callback(lambda done: _copy_future(done, futures[name]))
+            else:
+                futures[name].set_result(result)
+
+        executor.submit(run)
+
+    remaining = {name: len(stages[name][0]) for name in stages}
+
+    def on_done(dep_name):
+        def callback(_):
+            ready = []
+            with lock:
+                for name in stages:
+                    if dep_name in stages[name][0]:
+                        remaining[name] -= 1
+                        if remaining[name] == 0:
+                            ready.append(name)
+            for name in ready:
+                start(name)
+        return callback
+
+    finished = concurrent.futures.Future()
+    left = [len(stages)]
+
+    def on_finish(_):
+        with lock:
+            left[0] -= 1
+            if left[0] > 0:
+                return
+        try:
+            finished.set_result({name: future.result() for name, future in futures.items()})
+        except BaseException as e:
+            finished.set_exception(e)
+
+    for name in toposort(stages):
+        futures[name].add_done_callback(on_done(name))
+        futures[name].add_done_callback(on_finish)
+
+    if not stages:
+        finished.set_result({})
+
+    roots = [name for name in stages if remaining[name] == 0]
+    for name in roots:
+        start(name)
+
+    return finished
+
+
+def run_stages(stages: dict, executor: concurrent.futures.Executor):
+    return submit_stages(stages, executor).result()
+
+
+async def run_stages_async(stages: dict):
+    # stages의 함수는 코루틴 함수
+    tasks = {}
+
+    async def run(name):
+        deps, fn = stages[name]
+        results = await asyncio.gather(*(tasks[dep] for dep in deps))
+        if False in results:
+            return False
+        with span('stage', stage=name):
+            return await fn()
+
+    for name in toposort(stages):
+        tasks[name] = asyncio.ensure_future(run(name))
+
+    try:
+        results = await asyncio.gather(*tasks.values())
+    finally:
+        for task in tasks.values():
+            task.cancel()
+    return dict(zip(tasks.keys(), results))
+
+
+def imap_unordered(executor: concurrent.futures.Executor, fn, iterable, max_pending: int = None):
+    # executor.map과 비슷하지만 끝난 순서대로 결과를 돌려주고
+    # 동시에 max_pending개까지만 제출해서 입력이 아무리 많아도 메모리 사용량이 일정함
+    max_pending = max_pending or getattr(executor, '_max_workers', 8) * 4
+    iterator = iter(iterable)
+    pending = set()
+    try:
+        while True:
+            for item in iterator:
+                pending.add(executor.submit(fn, item))
+                if len(pending) >= max_pending:
+                    break
+
+            if not pending:
+                return
+
+            done, pending = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+    finally:
+        for future in pending:
+            future.cancel()
@@ -1,3 +1,5 @@
+import re
+
 roman_map = {
     "Ⅰ": "1", "Ⅱ": "2", "Ⅲ": "3", "Ⅳ": "4", "Ⅴ": "5", "Ⅵ": "6", "Ⅶ": "7", "Ⅷ": "8", "Ⅸ": "9", "Ⅹ": "10",
     "I": "1", "II": "2", "III": "3", "IV": "4", "V": "5", "VI": "6", "VII": "7", "VIII": "8", "IX": "9", "X": "10"
@@ -13,4 +15,12 @@ def remove_trailing_numerals(text: str):
     while '0' <= text[-1] <= '9':
         text = text[:-1]
     
-    return text
\ No newline at end of file
+    return text
+
+def normalize_address_query(query: str):
+    # 같은 건물의 다른 호실이 같은 키를 쓰도록 공백을 정리하고 마지막 'n층'을 제거
+    # 서울특별시  강남구 대치동 943-24 신안메트로칸 7층 -> 서울특별시 강남구 대치동 943-24 신안메트로칸
+    tokens = query.split()
+    if len(tokens) > 1 and re.fullmatch(r"(B|지하)?\d+층", tokens[-1]):
+        tokens = tokens[:-1]
+    return " ".join(tokens)
@@ -0,0 +1,276 @@
+import asyncio
+import contextlib
+import hashlib
+import json
+import os
+import random
+import re
+import sqlite3
+import threading
+import time
+from datetime import date
+from urllib.parse import urlencode, urlsplit
+
+from .instrumentation import failure
+
+# HTTP 요청을 실제로 보내는 계층 (RequestScheduler 아래)
+#   LiveTransport      : 실제 네트워크 (기본)
+#   RecordingTransport : 실제로 요청하고 요청/응답 쌍을 카세트(SQLite 파일)에 저장
+#   ReplayTransport    : 네트워크 없이 카세트에서 응답을 돌려줌. 지연 시간을 흉내낼 수 있음
+#
+# 한 번 녹화해두면 33m2/카카오/네이버 없이 같은 응답으로 크롤러 전체를 반복 실행할 수 있음
+#   python -m crawler --transport record crawl 38048 ...
+#   CRAWLER_TRANSPORT=replay CRAWLER_REPLAY_LATENCY=0.05 python -m crawler crawl 38048 ...
+CASSETTE_PATH = os.path.join(".cache", "cassettes.sqlite3")
+
+# 저장한 본문은 이미 압축이 풀려 있으므로 재생할 때 빼는 헤더
+_SKIP_HEADERS = {'content-encoding', 'content-length', 'transfer-encoding', 'connection'}
+
+
+# 오늘을 기준으로 정하는 날짜 (예약 견적의 start_date/end_date, 예약 일정의 year/month)는
+# 녹화한 날과 재생하는 날이 달라도 같은 요청이 되도록 이번 달로부터 몇 달 뒤인지로 바꿔서 키를 만듦
+#   오늘이 2026-10-18이면 year=2026&month=11 -> month="M+1"
+#   start_date=2026-11-01&end_date=2026-12-26 -> start_date="M+1-01", end_date="+55d" (가장 이른 날짜로부터 며칠 뒤)
+# 33m2의 일정 응답은 일(day)만 사용하므로 (vacancy.parse_schedule) 다른 달에 재생해도 그대로 쓸 수 있음
+ISO_DATE_PATTERN = re.compile(r"^(\d{4})-(\d{2})-(\d{2})$")
+
+
+def _month_offset(today: date, year: int, month: int):
+    return "M{:+d}".format((year - today.year) * 12 + month - today.month)
+
+
+def relative_dates(values: dict, today: date = None):
+    # 요청 본문/쿼리(dict)의 날짜 값을 오늘 기준의 상대 값으로 바꾼 dict
+    today = today or date.today()
+    values = {str(k): str(v) for k, v in values.items()}
+    dates = {}
+    for k, v in values.items():
+        match = ISO_DATE_PATTERN.match(v)
+        if match:
+            try:
+                dates[k] = date(*map(int, match.groups()))
+            except ValueError:
+                continue
+    if dates:
+        first = min(dates.values())
+        for k, d in dates.items():
+            if d == first:
+                values[k] = "{}-{:02d}".format(_month_offset(today, d.year, d.month), d.day)
+            else:
+                values[k] = "+{}d".format((d - first).days)
+    if values.get('year', '').isdigit() and values.get('month', '').isdigit():
+        values['month'] = _month_offset(today, int(values.pop('year')), int(values['month']))
+    return values
+
+
+def request_key(method: str, url: str, params=None, data=None, json_body=None, today: date = None):
+    # 헤더는 빼고 method, url, 쿼리, 본문으로 같은 요청인지 판단
+    parts = [method.upper(), url]
+    for value in (params, data):
+        if isinstance(value, dict):
+            parts.append(urlencode(sorted(relative_dates(value, today).items())))
+        else:
+            parts.append("" if value is None else str(value))
+    parts.append("" if json_body is None else json.dumps(json_body, sort_keys=True, ensure_ascii=False))
+    return hashlib.sha1("\n".join(parts).encode('utf-8')).hexdigest()
+
+
+def _key(method: str, url: str, kwargs: dict):
+    return request_key(method, url, kwargs.get('params'), kwargs.get('data'), kwargs.get('json'))
+
+
+class CassetteMiss(KeyError):
+    pass
+
+
+class CassetteStore:
+    def __init__(self, path: str = CASSETTE_PATH):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS cassette ("
+            "key TEXT PRIMARY KEY, method TEXT NOT NULL, url TEXT NOT NULL, status INTEGER NOT NULL, "
+            "headers TEXT NOT NULL, body BLOB NOT NULL, final_url TEXT NOT NULL, encoding TEXT, "
+            "recorded_at REAL NOT NULL)"
+        )
+        self._lock = threading.Lock()
+
+    def save(self, key: str, method: str, url: str, entry: dict):
+        headers = {k: v for k, v in entry['headers'].items() if k.lower() not in _SKIP_HEADERS}
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO cassette VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, method.upper(), url, entry['status'], json.dumps(headers), entry['body'],
+                 entry['url'], entry['encoding'], time.time())
+            )
+
+    def load(self, key: str):
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT status, headers, body, final_url, encoding FROM cassette WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {'status': row[0], 'headers': json.loads(row[1]), 'body': bytes(row[2]),
+                'url': row[3], 'encoding': row[4]}
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM cassette").fetchone()[0]
+
+    def close(self):
+        self._connection.close()
+
+
+class CassetteResponse:
+    # 재생한 응답. requests.Response와 aiohttp.ClientResponse에서 크롤러가 쓰는 부분만 흉내냄
+    def __init__(self, entry: dict):
+        from requests.structures import CaseInsensitiveDict
+
+        self.status_code = self.status = entry['status']
+        self.headers = CaseInsensitiveDict(entry['headers'])
+        self.content = entry['body']
+        self.url = entry['url']
+        self.encoding = entry['encoding'] or 'utf-8'
+
+    @property
+    def text(self):
+        return self.content.decode(self.encoding, errors='replace')
+
+    def json(self, **kwargs):
+        return json.loads(self.text)
+
+    async def __aenter__(self):
+        return _AsyncView(self)
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class _AsyncView:
+    # async with 안에서는 text()/json()이 코루틴인 aiohttp 방식으로 보여줌
+    def __init__(self, response: CassetteResponse):
+        self._response = response
+        self.status = response.status
+        self.headers = response.headers
+        self.url = response.url
+
+    async def read(self):
+        return self._response.content
+
+    async def text(self, encoding=None, errors='strict'):
+        return self._response.text
+
+    async def json(self, content_type=None, **kwargs):
+        return json.loads(self._response.text)
+
+
+class LiveTransport:
+    name = 'live'
+
+    def send(self, session, method: str, url: str, **kwargs):
+        return session.request(method, url, **kwargs)
+
+    def asend(self, session, method: str, url: str, **kwargs):
+        # async with로 사용하는 aiohttp 요청
+        return session.request(method, url, **kwargs)
+
+
+class RecordingTransport:
+    name = 'record'
+
+    def __init__(self, store: CassetteStore = None, inner=None):
+        self.store = store if store is not None else CassetteStore()
+        self.inner = inner or LiveTransport()
+        self.recorded = 0
+
+    def send(self, session, method: str, url: str, **kwargs):
+        response = self.inner.send(session, method, url, **kwargs)
+        self.store.save(_key(method, url, kwargs), method, url, {
+            'status': response.status_code, 'headers': dict(response.headers), 'body': response.content,
+            'url': response.url, 'encoding': response.encoding,
+        })
+        self.recorded += 1
+        return response
+
+    @contextlib.asynccontextmanager
+    async def asend(self, session, method: str, url: str, **kwargs):
+        async with self.inner.asend(session, method, url, **kwargs) as response:
+            entry = {
+                'status': response.status, 'headers': dict(response.headers), 'body': await response.read(),
+                'url': str(response.url), 'encoding': response.charset,
+            }
+        self.store.save(_key(method, url, kwargs), method, url, entry)
+        self.recorded += 1
+        async with CassetteResponse(entry) as replayed:
+            yield replayed
+
+
+class ReplayTransport:
+    # latency : 응답마다 기다릴 시간(초), host_latency : {호스트: 초}로 호스트별로 다르게
+    # jitter : 0 ~ jitter초를 추가로 기다림 (seed로 재현 가능)
+    # strict : 카세트에 없는 요청이면 CassetteMiss, 아니면 404 응답
+    name = 'replay'
+
+    def __init__(self, store: CassetteStore = None, latency: float = 0.0, host_latency: dict = None,
+                 jitter: float = 0.0, seed: int = 0, strict: bool = False):
+        self.store = store if store is not None else CassetteStore()
+        self.latency = latency
+        self.host_latency = host_latency or {}
+        self.jitter = jitter
+        self.strict = strict
+        self.hits = 0
+        self.misses = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def delay(self, url: str):
+        delay = self.host_latency.get(urlsplit(url).hostname, self.latency)
+        if self.jitter:
+            with self._lock:
+                delay += self._random.uniform(0, self.jitter)
+        return delay
+
+    def lookup(self, method: str, url: str, kwargs: dict):
+        entry = self.store.load(_key(method, url, kwargs))
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        if entry is None:
+            if self.strict:
+                raise CassetteMiss("{} {}".format(method, url))
+            failure("cassette_miss", "카세트에 없는 요청입니다 : %s %s", method, url)
+            entry = {'status': 404, 'headers': {}, 'body': b'', 'url': url, 'encoding': 'utf-8'}
+        return CassetteResponse(entry)
+
+    def send(self, session, method: str, url: str, **kwargs):
+        time.sleep(self.delay(url))
+        return self.lookup(method, url, kwargs)
+
+    @contextlib.asynccontextmanager
+    async def asend(self, session, method: str, url: str, **kwargs):
+        await asyncio.sleep(self.delay(url))
+        async with self.lookup(method, url, kwargs) as response:
+            yield response
+
+
+def transport_from_env():
+    # CRAWLER_TRANSPORT=live|record|replay, CRAWLER_CASSETTE=카세트 파일 경로
+    # CRAWLER_REPLAY_LATENCY=응답 지연(초), CRAWLER_REPLAY_JITTER=추가 지연(초)
+    mode = os.environ.get('CRAWLER_TRANSPORT', 'live')
+    if mode == 'live':
+        return LiveTransport()
+
+    store = CassetteStore(os.environ.get('CRAWLER_CASSETTE', CASSETTE_PATH))
+    if mode == 'record':
+        return RecordingTransport(store)
+    if mode == 'replay':
+        return ReplayTransport(store, latency=float(os.environ.get('CRAWLER_REPLAY_LATENCY', 0)),
+                               jitter=float(os.environ.get('CRAWLER_REPLAY_JITTER', 0)))
+    raise ValueError("CRAWLER_TRANSPORT는 live, record, replay 중 하나여야 합니다 : " + mode)
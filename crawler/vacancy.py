@@ -0,0 +1,186 @@
+import calendar
+from datetime import date, timedelta
+
+from .cache import PersistentCache, MISSING
+
+# 33m2 예약 일정(/app/room/schedule) 캐시와 공실률 계산
+# 한 달치 응답을 (예약된 날, 예약 불가능한 날) 비트셋으로 저장해두고
+# 28일, 56일, 84일 또는 임의의 기간의 공실률을 추가 요청 없이 계산
+SCHEDULE_TTL = 60 * 60
+SCHEDULE_CACHE = PersistentCache("schedule", ttl=SCHEDULE_TTL, maxsize=16384)
+
+VACANCY_WINDOWS = (28, 56, 84)
+
+# 예약 불가능한 날만 계속되는 방이 끝없이 요청하지 않도록 최대로 불러올 달의 수
+MAX_MONTHS = 24
+
+
+def tomorrow():
+    return date.today() + timedelta(days=1)
+
+
+def next_month(year: int, month: int):
+    return (year + 1, 1) if month == 12 else (year, month + 1)
+
+
+def schedule_key(rid, year: int, month: int):
+    return "{}:{}:{}".format(rid, year, month)
+
+
+def parse_schedule(schedule_list: list):
+    # response는 불가능한 날만 status = booking 이나 disable로 반환. 가능한날은 따로 반환안함
+    # [예약된 날 비트셋, 예약 불가능한 날 비트셋] (d일은 1 << d)
+    booking = 0
+    disable = 0
+    for item in schedule_list:
+        day = int(item["date"].split("-")[2])
+        if item["status"] == "booking":
+            booking |= 1 << day
+        elif item["status"] == "disable":
+            disable |= 1 << day
+    return [booking, disable]
+
+
+class VacancyCalendar:
+    # start부터의 일정을 달 단위로 들고 있으면서 여러 기간의 공실률을 계산
+    def __init__(self, start: date = None):
+        self.start = start or tomorrow()
+        self.months = {} # (year, month) -> [booking, disable]
+
+    def add(self, year: int, month: int, bits: list):
+        self.months[(year, month)] = bits
+
+    def _days(self, start: date):
+        # start부터 하루씩 (날짜, 예약됨, 불가능) 을 돌려줌. 아직 없는 달에 닿으면 (year, month)를 돌려주고 멈춤
+        year, month, day = start.year, start.month, start.day
+        for _ in range(MAX_MONTHS):
+            bits = self.months.get((year, month))
+            if bits is None:
+                yield (year, month)
+                return
+            booking, disable = bits
+            _, last_day = calendar.monthrange(year, month)
+            for d in range(day, last_day + 1):
+                yield date(year, month, d), booking >> d & 1, disable >> d & 1
+            year, month = next_month(year, month)
+            day = 1
+
+    def count(self, days: int, start: date = None):
+        # start부터 예약 가능한(disable이 아닌) 날 days일 동안의 (센 날 수, 공실 수, 부족한 달)
+        num_day = 0
+        num_vacant = 0
+        for item in self._days(start or self.start):
+            if num_day >= days:
+                break
+            if len(item) == 2:
+                return num_day, num_vacant, item
+            _, booked, disabled = item
+            # disable되지 않은 날만 셈
+            if not disabled:
+                num_day += 1
+                if not booked:
+                    num_vacant += 1
+        return num_day, num_vacant, None
+
+    def count_between(self, start: date, end: date):
+        # [start, end) 기간 중 disable이 아닌 날의 (센 날 수, 공실 수, 부족한 달)
+        num_day = 0
+        num_vacant = 0
+        for item in self._days(start):
+            if len(item) == 2:
+                if date(item[0], item[1], 1) >= end:
+                    break
+                return num_day, num_vacant, item
+            day, booked, disabled = item
+            if day >= end:
+                break
+            if not disabled:
+                num_day += 1
+                if not booked:
+                    num_vacant += 1
+        return num_day, num_vacant, None
+
+    def missing_month(self, days: int, start: date = None):
+        return self.count(days, start)[2]
+
+    def missing_month_between(self, start: date, end: date):
+        return self.count_between(start, end)[2]
+
+    def rate(self, days: int = 28, start: date = None):
+        num_day, num_vacant, _ = self.count(days, start)
+        if num_day == 0:
+            return -1 # 오류시
+        return num_vacant / num_day
+
+    def rate_between(self, start: date, end: date):
+        num_day, num_vacant, _ = self.count_between(start, end)
+        if num_day == 0:
+            return -1
+        return num_vacant / num_day
+
+    def rates(self, windows=VACANCY_WINDOWS, start: date = None):
+        return {days: self.rate(days, start) for days in windows}
+
+    def available(self, start: date, end: date):
+        # [start, end) 동안 예약된 날과 예약 불가능한 날이 하나도 없으면 True
+        # 아직 불러오지 않은 달이 있으면 None (모름)
+        for item in self._days(start):
+            if len(item) == 2:
+                if date(item[0], item[1], 1) >= end:
+                    return True
+                return None
+            day, booked, disabled = item
+            if day >= end:
+                return True
+            if booked or disabled:
+                return False
+        return True
+
+
+def _missing(vacancy_calendar: VacancyCalendar, days: int, start: date, end: date):
+    if end is not None:
+        return vacancy_calendar.missing_month_between(start or vacancy_calendar.start, end)
+    return vacancy_calendar.missing_month(days, start)
+
+
+def load_calendar(rid, days: int, fetch_month, vacancy_calendar: VacancyCalendar = None,
+                  start: date = None, end: date = None):
+    # fetch_month(year, month) -> schedule_list, 실패하면 MISSING
+    # days일(end가 있으면 [start, end))을 계산하는데 필요한 달만 (캐시에 없으면) 요청
+    vacancy_calendar = vacancy_calendar or VacancyCalendar()
+    while True:
+        missing = _missing(vacancy_calendar, days, start, end)
+        if missing is None:
+            return vacancy_calendar
+
+        year, month = missing
+
+        def fetch():
+            schedule_list = fetch_month(year, month)
+            return MISSING if schedule_list is MISSING else parse_schedule(schedule_list)
+
+        bits = SCHEDULE_CACHE.get_or_compute(schedule_key(rid, year, month), fetch)
+        if bits is MISSING:
+            return vacancy_calendar
+        vacancy_calendar.add(year, month, bits)
+
+
+async def aload_calendar(rid, days: int, fetch_month, vacancy_calendar: VacancyCalendar = None,
+                         start: date = None, end: date = None):
+    # load_calendar의 asyncio 버전. fetch_month는 코루틴 함수
+    vacancy_calendar = vacancy_calendar or VacancyCalendar()
+    while True:
+        missing = _missing(vacancy_calendar, days, start, end)
+        if missing is None:
+            return vacancy_calendar
+
+        year, month = missing
+
+        async def fetch():
+            schedule_list = await fetch_month(year, month)
+            return MISSING if schedule_list is MISSING else parse_schedule(schedule_list)
+
+        bits = await SCHEDULE_CACHE.aget_or_compute(schedule_key(rid, year, month), fetch)
+        if bits is MISSING:
+            return vacancy_calendar
+        vacancy_calendar.add(year, month, bits)
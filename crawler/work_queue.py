@@ -0,0 +1,482 @@
+import concurrent.futures
+import functools
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+
+from .instrumentation import logger, failure, room_done
+
+# 여러 프로세스/서버가 나눠서 크롤링하기 위한 작업 큐
+#   coordinator : 검색(sam_search_map, sam_search_keyword)으로 찾은 방 id를 큐에 넣음 (enqueue)
+#   worker      : 큐에서 방 id를 빌려(lease) 방을 크롤링하고 ack, 실패하면 requeue (QueueWorker)
+#
+# 빌린 방은 visibility_timeout(초) 동안 다른 worker에게 보이지 않음
+# worker가 죽어서 ack/requeue를 못하면 timeout이 지난 뒤 다른 worker가 다시 빌림
+# ack/requeue/hold는 빌릴 때 받은 token이 맞을 때만 성공 (timeout이 지나 다른 worker가 가져가면 token이 바뀜)
+#
+# worker는 크롤링한 방을 모아두었다가 기록하기 직전에 hold로 lease를 확인하고 timeout을 늘린 뒤
+# 아직 자기 것인 방만 sink에 기록하고 flush한 다음 ack (lease를 잃은 방의 결과는 버림)
+# -> 방마다 한 worker만 기록함. flush 전에 죽으면 ack하지 않았으므로 다른 worker가 다시 크롤링
+#
+# 아직 끝나지 않은(pending, leased) 방 id는 다시 넣어도 무시하고
+# 끝난(done, dead) 방은 다시 넣으면 처음부터 다시 크롤링 (다음 갱신 때 같은 큐를 그대로 사용)
+#
+#   python -m crawler enqueue --queue .cache/queue.sqlite3 --bbox 126.94 37.56 126.93 37.55
+#   python -m crawler work --queue .cache/queue.sqlite3 -o rooms-$(hostname).jsonl    # 서버마다
+#
+# 큐 주소
+#   파일 경로 또는 sqlite:///경로 : SqliteWorkQueue (한 서버 또는 공유 파일시스템, 테스트용)
+#   redis://host:port/db         : RedisWorkQueue (여러 서버, redis 패키지 필요)
+QUEUE_PATH = os.path.join(".cache", "queue.sqlite3")
+QUEUE_NAME = "rooms"
+
+VISIBILITY_TIMEOUT = 5 * 60
+MAX_ATTEMPTS = 5
+
+# 큐 상태
+PENDING = 'pending'
+LEASED = 'leased'
+DONE = 'done'
+DEAD = 'dead'  # MAX_ATTEMPTS번 실패해서 더 이상 빌려주지 않음
+
+
+@dataclass(frozen=True, slots=True)
+class Lease:
+    rid: str
+    token: str
+    attempts: int
+
+
+def default_worker_id():
+    return "{}:{}".format(socket.gethostname(), os.getpid())
+
+
+class SqliteWorkQueue:
+    # 여러 프로세스가 같은 파일을 열어도 됨 (빌리기/ack는 한 트랜잭션 안에서 처리)
+    def __init__(self, path: str = QUEUE_PATH, name: str = QUEUE_NAME,
+                 visibility_timeout: float = VISIBILITY_TIMEOUT, max_attempts: int = MAX_ATTEMPTS):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.name = name
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts
+        self._connection = sqlite3.connect(path, timeout=60, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS queue ("
+            "name TEXT NOT NULL, rid TEXT NOT NULL, state TEXT NOT NULL, attempts INTEGER NOT NULL DEFAULT 0, "
+            "token TEXT, worker TEXT, visible_at REAL NOT NULL, enqueued_at REAL NOT NULL, finished_at REAL, "
+            "error TEXT, PRIMARY KEY (name, rid))"
+        )
+        # 빌릴 수 있는 방만 visible_at 순서로 찾음
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS queue_visible ON queue (name, visible_at) "
+            "WHERE state IN ('pending', 'leased')"
+        )
+        self._lock = threading.Lock()
+
+    def _transaction(self, fn):
+        # BEGIN IMMEDIATE : 다른 프로세스가 같은 방을 동시에 빌리지 못하게 쓰기 lock을 먼저 잡음
+        with self._lock:
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                result = fn(self._connection)
+            except BaseException:
+                self._connection.execute("ROLLBACK")
+                raise
+            self._connection.execute("COMMIT")
+            return result
+
+    def put(self, rids):
+        # 새로 들어가거나 다시 들어간(끝났던) 방의 수
+        now = time.time()
+        rows = [(self.name, str(rid), PENDING, now, now) for rid in rids]
+        return self._transaction(lambda connection: connection.executemany(
+            "INSERT INTO queue (name, rid, state, visible_at, enqueued_at) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT (name, rid) DO UPDATE SET state = excluded.state, attempts = 0, token = NULL, "
+            "worker = NULL, visible_at = excluded.visible_at, enqueued_at = excluded.enqueued_at, "
+            "finished_at = NULL, error = NULL WHERE state IN ('done', 'dead')",
+            rows).rowcount)
+
+    def lease(self, n: int = 1, worker: str = None):
+        # 최대 n개의 방을 빌림 [Lease, ...]
+        def lease(connection):
+            now = time.time()
+            rows = connection.execute(
+                "SELECT rid, attempts FROM queue WHERE name = ? AND state IN ('pending', 'leased') "
+                "AND visible_at <= ? ORDER BY visible_at LIMIT ?", (self.name, now, n)).fetchall()
+            leases = []
+            for rid, attempts in rows:
+                if attempts >= self.max_attempts:
+                    connection.execute("UPDATE queue SET state = ?, token = NULL, finished_at = ? "
+                                       "WHERE name = ? AND rid = ?", (DEAD, now, self.name, rid))
+                    failure("queue_dead", "%s 번 시도한 방 %s 을 큐에서 뺍니다.", attempts, rid)
+                    continue
+                lease = Lease(rid, uuid.uuid4().hex, attempts + 1)
+                connection.execute(
+                    "UPDATE queue SET state = ?, token = ?, worker = ?, attempts = ?, visible_at = ? "
+                    "WHERE name = ? AND rid = ?",
+                    (LEASED, lease.token, worker, lease.attempts, now + self.visibility_timeout, self.name, rid))
+                leases.append(lease)
+            return leases
+
+        return self._transaction(lease)
+
+    def _update_leased(self, lease: Lease, assignments: str, values):
+        # token이 맞을 때만 바꿈. 바꿨으면 True
+        return self._transaction(lambda connection: connection.execute(
+            "UPDATE queue SET " + assignments + " WHERE name = ? AND rid = ? AND token = ? AND state = ?",
+            tuple(values) + (self.name, lease.rid, lease.token, LEASED)).rowcount == 1)
+
+    def ack(self, lease: Lease):
+        # 끝난 방. False면 timeout이 지나 다른 worker가 가져간 방 (그 worker도 기록할 수 있음)
+        return self._update_leased(lease, "state = ?, token = NULL, finished_at = ?, error = NULL",
+                                   (DONE, time.time()))
+
+    def requeue(self, lease: Lease, delay: float = 0, error: str = None):
+        # delay초 뒤에 다시 빌릴 수 있게 돌려놓음
+        return self._update_leased(lease, "state = ?, token = NULL, visible_at = ?, error = ?",
+                                   (PENDING, time.time() + delay, error))
+
+    def extend(self, leases, timeout: float = None):
+        # 아직 처리 중인 방의 visibility timeout을 늘림 (heartbeat)
+        visible_at = time.time() + (self.visibility_timeout if timeout is None else timeout)
+
+        def extend(connection):
+            return connection.executemany(
+                "UPDATE queue SET visible_at = ? WHERE name = ? AND rid = ? AND token = ? AND state = ?",
+                [(visible_at, self.name, lease.rid, lease.token, LEASED) for lease in leases]).rowcount
+
+        return self._transaction(extend)
+
+    def hold(self, leases, timeout: float = None):
+        # 아직 빌리고 있는 lease만 timeout을 늘려서 돌려줌 [Lease, ...] (sink에 기록하기 직전에 확인)
+        visible_at = time.time() + (self.visibility_timeout if timeout is None else timeout)
+
+        def hold(connection):
+            return [lease for lease in leases if connection.execute(
+                "UPDATE queue SET visible_at = ? WHERE name = ? AND rid = ? AND token = ? AND state = ?",
+                (visible_at, self.name, lease.rid, lease.token, LEASED)).rowcount == 1]
+
+        return self._transaction(hold)
+
+    def stats(self):
+        # {상태: 방 수}
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT state, COUNT(*) FROM queue WHERE name = ? GROUP BY state", (self.name,)).fetchall()
+        counts = {PENDING: 0, LEASED: 0, DONE: 0, DEAD: 0}
+        counts.update(rows)
+        return counts
+
+    def remaining(self):
+        # 아직 끝나지 않은 방의 수 (빌려간 방 포함)
+        counts = self.stats()
+        return counts[PENDING] + counts[LEASED]
+
+    def close(self):
+        self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __str__(self):
+        return "{} : {}".format(self.name, ", ".join("{} {}".format(k, v) for k, v in self.stats().items()))
+
+
+# RedisWorkQueue의 lua script. 여러 명령을 한 번에 처리하므로 서버 사이에 경쟁이 없음
+# 시각은 redis 서버의 TIME을 사용 (worker 서버들의 시계가 달라도 됨)
+_REDIS_NOW = "local t = redis.call('TIME') local now = tonumber(t[1]) + tonumber(t[2]) / 1000000 "
+
+# 끝나지 않은 방(pending zset에 있음)은 무시하고, 끝난 방은 done/dead에서 빼고 다시 넣음
+# KEYS : pending, done, dead, attempts, errors / ARGV : rid...
+_REDIS_PUT = """
+local added = 0
+for _, rid in ipairs(ARGV) do
+    if not redis.call('ZSCORE', KEYS[1], rid) then
+        redis.call('SREM', KEYS[2], rid)
+        redis.call('SREM', KEYS[3], rid)
+        redis.call('HDEL', KEYS[4], rid)
+        redis.call('HDEL', KEYS[5], rid)
+        redis.call('ZADD', KEYS[1], 0, rid)
+        added = added + 1
+    end
+end
+return added
+"""
+
+# KEYS : pending, leases, attempts, dead, token / ARGV : n, visibility_timeout, max_attempts
+_REDIS_LEASE = _REDIS_NOW + """
+local rids = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', now, 'LIMIT', 0, tonumber(ARGV[1]))
+local result = {}
+for _, rid in ipairs(rids) do
+    local attempts = tonumber(redis.call('HGET', KEYS[3], rid) or '0')
+    if attempts >= tonumber(ARGV[3]) then
+        redis.call('ZREM', KEYS[1], rid)
+        redis.call('HDEL', KEYS[2], rid)
+        redis.call('SADD', KEYS[4], rid)
+    else
+        local token = tostring(redis.call('INCR', KEYS[5]))
+        redis.call('HSET', KEYS[3], rid, attempts + 1)
+        redis.call('HSET', KEYS[2], rid, token)
+        redis.call('ZADD', KEYS[1], now + tonumber(ARGV[2]), rid)
+        table.insert(result, rid)
+        table.insert(result, token)
+        table.insert(result, attempts + 1)
+    end
+end
+return result
+"""
+
+# KEYS : pending, leases, done / ARGV : rid, token
+_REDIS_ACK = """
+if redis.call('HGET', KEYS[2], ARGV[1]) ~= ARGV[2] then
+    return 0
+end
+redis.call('ZREM', KEYS[1], ARGV[1])
+redis.call('HDEL', KEYS[2], ARGV[1])
+redis.call('SADD', KEYS[3], ARGV[1])
+return 1
+"""
+
+# KEYS : pending, leases, errors / ARGV : rid, token, delay, error
+_REDIS_REQUEUE = _REDIS_NOW + """
+if redis.call('HGET', KEYS[2], ARGV[1]) ~= ARGV[2] then
+    return 0
+end
+redis.call('HDEL', KEYS[2], ARGV[1])
+redis.call('ZADD', KEYS[1], now + tonumber(ARGV[3]), ARGV[1])
+if ARGV[4] ~= '' then
+    redis.call('HSET', KEYS[3], ARGV[1], ARGV[4])
+end
+return 1
+"""
+
+# KEYS : pending, leases / ARGV : timeout, rid, token, rid, token, ...
+# timeout을 늘린 방의 순서 (1부터, ARGV의 rid, token 쌍 순서)
+_REDIS_EXTEND = _REDIS_NOW + """
+local extended = {}
+for i = 2, #ARGV, 2 do
+    if redis.call('HGET', KEYS[2], ARGV[i]) == ARGV[i + 1] then
+        redis.call('ZADD', KEYS[1], 'XX', now + tonumber(ARGV[1]), ARGV[i])
+        table.insert(extended, i / 2)
+    end
+end
+return extended
+"""
+
+
+class RedisWorkQueue:
+    # SqliteWorkQueue와 같은 인터페이스 (redis 패키지 필요)
+    # {prefix}:pending (zset, 다시 빌릴 수 있는 시각. 빌려간 방 포함), :leases (hash, rid -> token),
+    # :attempts, :errors, :done, :dead
+    def __init__(self, url: str, name: str = QUEUE_NAME,
+                 visibility_timeout: float = VISIBILITY_TIMEOUT, max_attempts: int = MAX_ATTEMPTS):
+        try:
+            import redis
+        except ImportError:
+            raise ImportError("RedisWorkQueue를 사용하려면 redis가 필요합니다. (pip install redis)")
+
+        self.name = name
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts
+        self._redis = redis.Redis.from_url(url, decode_responses=True)
+        prefix = "crawler:queue:" + name
+        self.keys = {key: prefix + ":" + key
+                     for key in ('pending', 'leases', 'attempts', 'errors', 'done', 'dead', 'token')}
+        self._put = self._redis.register_script(_REDIS_PUT)
+        self._lease = self._redis.register_script(_REDIS_LEASE)
+        self._ack = self._redis.register_script(_REDIS_ACK)
+        self._requeue = self._redis.register_script(_REDIS_REQUEUE)
+        self._extend = self._redis.register_script(_REDIS_EXTEND)
+
+    def _keys(self, *names):
+        return [self.keys[name] for name in names]
+
+    def put(self, rids):
+        rids = [str(rid) for rid in rids]
+        if not rids:
+            return 0
+        return self._put(keys=self._keys('pending', 'done', 'dead', 'attempts', 'errors'), args=rids)
+
+    def lease(self, n: int = 1, worker: str = None):
+        result = self._lease(keys=self._keys('pending', 'leases', 'attempts', 'dead', 'token'),
+                             args=[n, self.visibility_timeout, self.max_attempts])
+        return [Lease(result[i], result[i + 1], int(result[i + 2])) for i in range(0, len(result), 3)]
+
+    def ack(self, lease: Lease):
+        return self._ack(keys=self._keys('pending', 'leases', 'done'), args=[lease.rid, lease.token]) == 1
+
+    def requeue(self, lease: Lease, delay: float = 0, error: str = None):
+        return self._requeue(keys=self._keys('pending', 'leases', 'errors'),
+                             args=[lease.rid, lease.token, delay, error or '']) == 1
+
+    def extend(self, leases, timeout: float = None):
+        return len(self.hold(leases, timeout))
+
+    def hold(self, leases, timeout: float = None):
+        leases = list(leases)
+        if not leases:
+            return []
+        args = [self.visibility_timeout if timeout is None else timeout]
+        for lease in leases:
+            args += [lease.rid, lease.token]
+        return [leases[int(i) - 1] for i in self._extend(keys=self._keys('pending', 'leases'), args=args)]
+
+    def stats(self):
+        pipeline = self._redis.pipeline()
+        for key in ('pending', 'leases', 'done', 'dead'):
+            (pipeline.zcard if key == 'pending' else pipeline.hlen if key == 'leases' else pipeline.scard)(
+                self.keys[key])
+        queued, leased, done, dead = pipeline.execute()
+        # pending zset에는 빌려간 방도 들어 있음
+        return {PENDING: queued - leased, LEASED: leased, DONE: done, DEAD: dead}
+
+    def remaining(self):
+        return self._redis.zcard(self.keys['pending'])
+
+    def close(self):
+        self._redis.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __str__(self):
+        return "{} : {}".format(self.name, ", ".join("{} {}".format(k, v) for k, v in self.stats().items()))
+
+
+def open_queue(url: str = QUEUE_PATH, **kwargs):
+    # redis://... 이면 redis, sqlite:///경로 또는 파일 경로면 sqlite
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisWorkQueue(url, **kwargs)
+    if url.startswith("sqlite:///"):
+        url = url[len("sqlite:///"):]
+    return SqliteWorkQueue(url, **kwargs)
+
+
+def enqueue(queue, ids, chunk_size: int = 500):
+    # ids(검색 결과, generator도 가능)를 chunk_size개씩 넣음 -> 검색이 끝나기 전에 worker가 시작할 수 있음
+    added = 0
+    chunk = []
+    for rid in ids:
+        chunk.append(rid)
+        if len(chunk) >= chunk_size:
+            added += queue.put(chunk)
+            chunk = []
+    if chunk:
+        added += queue.put(chunk)
+    return added
+
+
+def _crawl_room(rid, **kwargs):
+    from .room import Room
+    return Room(rid, **kwargs)
+
+
+class QueueWorker:
+    # 큐에서 방을 빌려 max_workers개씩 동시에 크롤링
+    # 빈 자리만큼만 빌리므로 빌린 방은 바로 처리가 시작됨 (다른 worker가 가져갈 방을 쌓아두지 않음)
+    # wait=False이면 큐가 비면 끝남, True이면 coordinator가 방을 더 넣을 때까지 기다림
+    # 끝난 방은 모아두었다가 ack_batch개마다 (또는 처리 중인 방이 없을 때) 아직 lease가 있는 방만
+    # sink에 기록하고 flush한 뒤에 ack
+    # kwargs는 Room에 넘김 (duration, exact, tolerance)
+    def __init__(self, queue, sink=None, max_workers: int = 16, worker_id: str = None, wait: bool = False,
+                 poll_interval: float = 1.0, retry_delay: float = 30, ack_batch: int = 100, **kwargs):
+        self.queue = queue
+        self.sink = sink
+        self.max_workers = max_workers
+        self.worker_id = worker_id or default_worker_id()
+        self.wait = wait
+        self.poll_interval = poll_interval
+        self.retry_delay = retry_delay
+        self.ack_batch = ack_batch
+        self.finished = []  # 크롤링했지만 아직 기록/ack하지 않은 (Lease, Room)
+        self.crawl_room = functools.partial(_crawl_room, **kwargs)
+        self.processed = 0
+        self.requeued = 0
+        self.lost = 0
+
+    def run(self):
+        heartbeat = self.queue.visibility_timeout / 3
+        last_heartbeat = time.monotonic()
+        running = {}  # future -> Lease
+        with concurrent.futures.ThreadPoolExecutor(self.max_workers) as executor:
+            while True:
+                free = self.max_workers - len(running)
+                if free > 0:
+                    for lease in self.queue.lease(free, self.worker_id):
+                        running[executor.submit(self.crawl_room, lease.rid)] = lease
+
+                if not running:
+                    self._commit()
+                    # 다른 worker가 빌려간 방이 남아있으면 그 worker가 죽었을 때를 대비해 기다림
+                    if not self.wait and self.queue.remaining() == 0:
+                        break
+                    time.sleep(self.poll_interval)
+                    continue
+
+                done, _ = concurrent.futures.wait(running, timeout=min(heartbeat, self.poll_interval),
+                                                  return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    self._finish(running.pop(future), future)
+                if len(self.finished) >= self.ack_batch:
+                    self._commit()
+
+                if running and time.monotonic() - last_heartbeat >= heartbeat:
+                    self.queue.extend(list(running.values()) + [lease for lease, _ in self.finished])
+                    last_heartbeat = time.monotonic()
+        logger.info("%s", self)
+        return self
+
+    def _finish(self, lease: Lease, future):
+        try:
+            room = future.result()
+        except Exception as e:
+            failure("queue_room_error", "방 %s 을 크롤링하지 못했습니다. (%d번째) %r", lease.rid, lease.attempts, e)
+            self.queue.requeue(lease, self.retry_delay, repr(e))
+            self.requeued += 1
+            return
+
+        self.finished.append((lease, room))
+
+    def _commit(self):
+        # lease가 남아있는 방만 기록하고 flush한 뒤에 ack (flush 전에 죽으면 다른 worker가 다시 크롤링)
+        # hold가 timeout을 늘려두므로 flush가 visibility_timeout 안에 끝나면 다른 worker는 그 방을 빌리지 못함
+        if not self.finished:
+            return
+        held = set(self.queue.hold([lease for lease, _ in self.finished]))
+        written = []
+        for lease, room in self.finished:
+            if lease not in held:
+                failure("queue_lease_lost", "방 %s 의 lease가 만료되어 다른 worker가 가져갔습니다. 결과를 버립니다.", lease.rid)
+                room_done('lost')
+                self.lost += 1
+                continue
+            if self.sink is not None:
+                self.sink.write(room)
+            written.append(lease)
+        self.finished = []
+
+        if self.sink is not None:
+            self.sink.flush()
+        for lease in written:
+            room_done('ok')
+            self.processed += 1
+            if not self.queue.ack(lease):
+                failure("queue_ack_lost", "방 %s 을 기록하는 동안 lease가 만료되었습니다. (두 번 기록될 수 있음)", lease.rid)
+
+    def __str__(self):
+        return "worker {} : 처리 {}개, 다시 넣음 {}개, lease 만료 {}개".format(
+            self.worker_id, self.processed, self.requeued, self.lost)
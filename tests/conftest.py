@@ -0,0 +1,111 @@
+import asyncio
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+import pytest
+from aiohttp import web
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+from mock_server import MockServer
+from crawler import room, async_room, sam_search, vacancy, quotes
+from crawler.http_scheduler import SCHEDULER, RequestScheduler, HostPolicy
+from crawler.spatial import ComparableIndex
+
+# 테스트는 benchmarks/mock_server.py의 가짜 33m2 / 카카오 / 네이버 서버를 상대로 실행
+#   mock_server : 기본 MockServer를 띄우고 크롤러가 그 서버로 요청하게 함
+#   serve       : MockServer를 상속해서 응답을 바꾼 서버를 띄울 때 (serve(BrokenServer()))
+MOCK_POLICY = HostPolicy(rate=1e9, burst=10 ** 9, concurrency=64, max_concurrency=64)
+
+
+class ServerThread:
+    # aiohttp 앱을 별도 쓰레드의 이벤트 루프에서 실행 (동기 크롤러와 asyncio 크롤러 모두 요청할 수 있음)
+    def __init__(self, app):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+
+        async def start():
+            runner = web.AppRunner(app)
+            await runner.setup()
+            await web.TCPSite(runner, '127.0.0.1', 0).start()
+            return runner
+
+        self.runner = asyncio.run_coroutine_threadsafe(start(), self.loop).result()
+        self.base = "http://127.0.0.1:{}".format(self.runner.addresses[0][1])
+
+    def close(self):
+        asyncio.run_coroutine_threadsafe(self.runner.cleanup(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+
+
+@pytest.fixture
+def caches(tmp_path, monkeypatch):
+    # 실행마다 빈 캐시 (파일도 tmp_path에 따로 둠)
+    path = str(tmp_path / "crawler.sqlite3")
+    for cache in (room.GEOCODE_CACHE, room.NAVER_ID_CACHE, room.NAVER_COMPLEX_CACHE, vacancy.SCHEDULE_CACHE):
+        monkeypatch.setattr(cache, 'path', path)
+        monkeypatch.setattr(cache, '_db', None)
+        monkeypatch.setattr(cache, '_memory', OrderedDict())
+        monkeypatch.setattr(cache, '_inflight', {})
+        monkeypatch.setattr(cache, '_ainflight', {})
+        monkeypatch.setattr(cache, '_finflight', {})
+        monkeypatch.setattr(cache, 'hits', 0)
+        monkeypatch.setattr(cache, 'memory_hits', 0)
+        monkeypatch.setattr(cache, 'misses', 0)
+    monkeypatch.setattr(room, 'COMPARABLES', ComparableIndex())
+    monkeypatch.setenv("KAKAO_REST_API_KEY", "test")
+    monkeypatch.setattr(room, 'KAKAO_REST_API_KEY', None)
+
+
+@pytest.fixture
+def scheduler():
+    # 가짜 서버에는 요청 속도 제한을 두지 않고 재시도하지 않음
+    return RequestScheduler(policies={'127.0.0.1': MOCK_POLICY}, retries=0)
+
+
+@pytest.fixture
+def point_to(monkeypatch):
+    # room, async_room, sam_search, quotes의 주소 상수를 가짜 서버(base)로 바꿈
+    def point(base: str):
+        for module in (room, async_room, sam_search):
+            monkeypatch.setattr(module, 'SAM_URL_PREFIX', base + "/room/detail/")
+            monkeypatch.setattr(module, 'KAKAO_ADDRESS_URL', base + "/v2/local/search/address.json")
+            monkeypatch.setattr(module, 'SAM_BOOKING_URL', base + "/webpc/booking/start")
+            monkeypatch.setattr(module, 'SAM_SCHEDULE_URL', base + "/app/room/schedule")
+            monkeypatch.setattr(module, 'NAVER_SEARCH_URL_PREFIX', base + "/search/result/")
+            monkeypatch.setattr(module, 'NAVER_COMPLEX_URL_PREFIX', base + "/complexes/")
+        monkeypatch.setattr(quotes, 'SAM_BOOKING_URL', base + "/webpc/booking/start")
+        monkeypatch.setattr(sam_search, 'SAM_SEARCH_MAP_URL', base + "/app/room/search")
+        monkeypatch.setattr(sam_search, 'SAM_SEARCH_KEYWORD_URL', base + "/webmobile/search/list/more")
+    return point
+
+
+@pytest.fixture
+def serve(caches, point_to, monkeypatch):
+    # server(MockServer)를 띄우고 room 등의 주소와 공용 SCHEDULER를 그 서버에 맞춤
+    started = []
+
+    def start(server: MockServer):
+        thread = ServerThread(server.app())
+        started.append(thread)
+        server.base = thread.base
+        point_to(thread.base)
+        monkeypatch.setattr(SCHEDULER, 'policies', {'127.0.0.1': MOCK_POLICY})
+        monkeypatch.setattr(SCHEDULER, 'hosts', {})
+        monkeypatch.setattr(SCHEDULER, 'retries', 0)
+        return server
+
+    yield start
+    for thread in started:
+        thread.close()
+
+
+@pytest.fixture
+def mock_server(serve):
+    return serve(MockServer())
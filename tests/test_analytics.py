@@ -0,0 +1,73 @@
+import json
+
+import numpy as np
+import pytest
+
+from mock_server import MockServer
+from crawler.analytics import RoomAnalytics, REGION_DONG, DAYS_PER_MONTH, QUOTE_DAYS
+from crawler.records import RoomBatch
+from crawler.room import Room
+from crawler.sink import open_sink
+
+
+class NoKakaoServer(MockServer):
+    # 건물 3의 주소는 카카오에서 찾을 수 없음 (지역과 네이버 가격이 없는 방)
+    async def handle_kakao(self, request):
+        if "테스트3빌딩" in request.query['query']:
+            return await self.respond('kakao', json.dumps({"meta": {"total_count": 0}, "documents": []}),
+                                      'application/json')
+        return await super().handle_kakao(request)
+
+
+@pytest.fixture
+def rooms(serve):
+    serve(NoKakaoServer())
+    return [Room(rid) for rid in ('101', '102', '151', '103')]
+
+
+def expected_net(room):
+    # 임대료 - 장기계약 할인 - 관리비용 - 청소비용 - 계약 수수료 (mock 견적)
+    return (1 - room.vacancy_rate) * (1000000 - 50000 - 100000 - 50000 - 30000) * DAYS_PER_MONTH / QUOTE_DAYS
+
+
+def test_metrics(rooms):
+    analytics = RoomAnalytics.from_rooms(rooms)
+    metrics = analytics.metrics()
+    assert len(analytics) == 4
+
+    assert metrics['short_term_net'] == pytest.approx([expected_net(room) for room in rooms])
+    assert metrics['long_term_rent'][:3].tolist() == [430000] * 3
+    assert metrics['spread'][0] == pytest.approx(expected_net(rooms[0]) - 430000)
+    assert metrics['deposit_yield'][0] == pytest.approx(12 * metrics['spread'][0] / 5000000)
+    # 네이버 가격이 없는 방은 NaN
+    assert np.isnan(metrics['spread'][3]) and np.isnan(metrics['deposit_yield'][3])
+
+    top = analytics.top(2, 'short_term_net')
+    best = sorted(rooms, key=expected_net, reverse=True)[:2]
+    assert top['sam_id'].tolist() == [float(room.sam_id) for room in best]
+
+
+def test_by_region(rooms, tmp_path):
+    path = str(tmp_path / "rooms.jsonl")
+    with open_sink(path) as sink:
+        for room in rooms:
+            sink.write(room)
+
+    analytics = RoomAnalytics.from_jsonl(path)
+    summary = analytics.by_region()
+    # 주소가 없는 방은 빠지고, 강남구 세 방 모두 spread를 계산함
+    assert summary.index.tolist() == ['강남구']
+    assert summary.loc['강남구', 'rooms'] == 3
+    assert summary.loc['강남구', 'compared'] == 3
+    assert summary.loc['강남구', 'short_term_net'] == pytest.approx(np.mean([expected_net(r) for r in rooms[:3]]))
+    assert summary.loc['강남구', 'spread_p50'] == pytest.approx(
+        np.median([expected_net(r) - 430000 for r in rooms[:3]]))
+
+    assert RoomAnalytics.from_rooms(rooms).by_region(REGION_DONG).index.tolist() == [('강남구', '대치동')]
+
+
+def test_from_frame(rooms):
+    frame = RoomBatch.from_rooms(rooms).to_pandas()
+    expected = RoomAnalytics.from_rooms(rooms).metrics()
+    for name, values in RoomAnalytics.from_frame(frame).metrics().items():
+        np.testing.assert_array_equal(values, expected[name])
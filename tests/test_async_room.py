@@ -0,0 +1,70 @@
+import asyncio
+import logging
+
+from aiohttp import web
+
+from mock_server import MockServer
+from crawler import instrumentation
+from crawler.async_room import AsyncRoomCrawler
+
+
+class BrokenDetailServer(MockServer):
+    # rid 13의 상세 페이지만 404
+    async def handle_detail(self, request):
+        if request.match_info['rid'] == '13':
+            raise web.HTTPNotFound()
+        return await super().handle_detail(request)
+
+
+def crawl(ids, scheduler):
+    async def run():
+        async with AsyncRoomCrawler(scheduler=scheduler) as crawler:
+            return await crawler.crawl(ids)
+    return {room.sam_id: room for room in asyncio.run(run())}
+
+
+def test_crawl(mock_server, scheduler):
+    rooms = crawl(['101', '102', '151'], scheduler)
+
+    assert sorted(rooms) == ['101', '102', '151']
+    room = rooms['101']
+    assert room.room_name == '테스트룸 101'
+    assert room.room_size_pyeong_sam == 8
+    assert room.room_type == '오피스텔'
+    assert room.address.building_name == '테스트1빌딩'
+    assert room.prices['임대료'] == 1000000
+    assert 0 <= room.vacancy_rate <= 1
+    assert (room.naver_id, room.deposit, room.monthly_rent) == ('12105', 500, 43)
+
+    # 101과 151은 같은 건물이므로 카카오/네이버 요청은 한 번씩
+    assert mock_server.requests['detail'] == 3
+    assert mock_server.requests['kakao'] == 2
+    assert mock_server.requests['naver_search'] == 2
+
+
+def test_failed_stage_keeps_room(serve, scheduler, caplog):
+    # 상세 페이지를 받지 못한 방은 주소/네이버 단계 없이 나머지 필드만 채워서 돌려줌
+    serve(BrokenDetailServer())
+    rooms = crawl(['12', '13'], scheduler)
+
+    assert sorted(rooms) == ['12', '13']
+    assert rooms['13'].room_name is None
+    assert rooms['13'].address is None
+    assert rooms['13'].deposit is None
+    assert rooms['13'].prices['임대료'] == 1000000
+    assert rooms['12'].deposit == 500
+    assert "33m2에서 응답을 받지 못했습니다. id : 13" in caplog.text
+
+
+def test_failed_room_is_skipped(mock_server, scheduler, monkeypatch, caplog):
+    # 처리 중 예외가 난 방만 버리고 나머지는 계속 크롤링
+    monkeypatch.setattr(instrumentation, '_enabled', True)
+    ok, failed = instrumentation.ROOMS.get(result='ok'), instrumentation.ROOMS.get(result='failed')
+    caplog.set_level(logging.ERROR, logger="crawler")
+
+    rooms = crawl(['101', 'not-a-room', '102'], scheduler)
+
+    assert sorted(rooms) == ['101', '102']
+    assert instrumentation.ROOMS.get(result='ok') - ok == 2
+    assert instrumentation.ROOMS.get(result='failed') - failed == 1
+    assert "not-a-room" in caplog.text
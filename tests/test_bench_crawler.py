@@ -0,0 +1,29 @@
+import pytest
+
+import bench_crawler
+from bench_crawler import StageTimer, percentile
+
+
+def test_stage_summary():
+    timer = StageTimer()
+    for ms in (0.5, 3, 3, 40, 20000):
+        timer.add('detail', ms / 1000)
+
+    summary = timer.summary()['detail']
+    assert summary['count'] == 5
+    assert (summary['p50_ms'], summary['p99_ms'], summary['max_ms']) == pytest.approx((3, 20000, 20000))
+    assert {bound: count for bound, count in summary['histogram'].items() if count} == {'1': 1, '5': 2, '50': 1,
+                                                                                      'inf': 1}
+    assert timer.summary()['room']['p50_ms'] is None
+    assert percentile([1, 2, 3, 4], 50) == 2
+
+
+@pytest.mark.parametrize('mode', sorted(bench_crawler.MODES))
+def test_run_mode(mock_server, mode):
+    # 방마다 모든 단계의 시간을 한 번씩 기록
+    timer = StageTimer()
+    assert bench_crawler.MODES[mode](['101', '102', '151'], 4, timer) == 3
+    assert {stage: len(samples) for stage, samples in timer.samples.items()} == {stage: 3 for stage in
+                                                                                bench_crawler.STAGES}
+    assert mock_server.requests['detail'] == 3
+    assert mock_server.requests['naver_search'] == 2
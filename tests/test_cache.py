@@ -0,0 +1,96 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from mock_server import MockServer
+from crawler import room
+from crawler.cache import PersistentCache, MISSING
+from crawler.room import Room
+
+
+class NoKakaoServer(MockServer):
+    # 건물 3의 주소는 카카오에서 찾을 수 없음
+    async def handle_kakao(self, request):
+        if "테스트3빌딩" in request.query['query']:
+            return await self.respond('kakao', json.dumps({"meta": {"total_count": 0}, "documents": []}),
+                                      'application/json')
+        return await super().handle_kakao(request)
+
+
+def test_ttl_and_negative_ttl(tmp_path):
+    cache = PersistentCache("test", ttl=1.0, negative_ttl=0.2, path=str(tmp_path / "cache.sqlite3"))
+    cache.set("found", {"x": 1})
+    cache.set("not_found", None)
+    assert cache.get("found") == {"x": 1}
+    assert cache.get("not_found") is None
+
+    # 검색 결과 없음(None)은 더 짧게 저장
+    time.sleep(0.4)
+    assert cache.get("not_found") is MISSING
+    assert cache.get("found") == {"x": 1}
+    time.sleep(0.7)
+    assert cache.get("found") is MISSING
+
+
+def test_lru_and_disk(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    cache = PersistentCache("test", ttl=60, maxsize=2, path=path)
+    for key in "abc":
+        cache.set(key, key.upper())
+    # 메모리에는 최근 2개만, 밀려난 값은 파일에서 읽음
+    assert list(cache._memory) == ["b", "c"]
+    assert cache.get("a") == "A"
+    assert cache.stats()['memory_hits'] == 0 and cache.hits == 1
+
+    # 다른 프로세스(새 캐시 객체)도 같은 파일의 값을 사용
+    other = PersistentCache("test", ttl=60, path=path)
+    assert other.get("b") == "B"
+    assert PersistentCache("other", ttl=60, path=path).get("b") is MISSING
+
+
+def test_get_or_compute_coalesces(tmp_path):
+    cache = PersistentCache("test", ttl=60, path=str(tmp_path / "cache.sqlite3"))
+    calls = []
+    started = threading.Event()
+
+    def compute():
+        calls.append(1)
+        started.set()
+        time.sleep(0.1)
+        return "value"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_compute("key", compute)))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == ["value"] * 8
+    assert len(calls) == 1
+
+    # 요청 실패(MISSING)는 저장하지 않음
+    assert cache.get_or_compute("failed", lambda: MISSING) is MISSING
+    assert cache.get("failed") is MISSING
+
+
+def test_geocode_cache(mock_server, monkeypatch):
+    # 같은 건물의 방들은 카카오 요청을 한 번만 하고, 다음 실행에서도 파일의 값을 사용
+    Room('101')
+    Room('151')
+    assert mock_server.requests['kakao'] == 1
+
+    monkeypatch.setattr(room.GEOCODE_CACHE, '_memory', OrderedDict())
+    r = Room('101')
+    assert mock_server.requests['kakao'] == 1
+    assert r.address.doro.road_name == '삼성로'
+
+
+def test_geocode_negative_cache(serve):
+    # 카카오에서 찾지 못한 주소도 저장해서 같은 건물의 다른 방은 다시 요청하지 않음
+    server = serve(NoKakaoServer())
+    Room('103')
+    Room('153')
+    assert server.requests['kakao'] == 1
+    assert room.GEOCODE_CACHE.stats()['hits'] >= 1
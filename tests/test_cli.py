@@ -0,0 +1,59 @@
+import io
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from crawler import cli
+from crawler.instrumentation import logger
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY = ('requests', 'aiohttp', 'bs4', 'lxml', 'selectolax', 'sqlite3', 'crawler.room')
+
+
+def run_python(*args):
+    return subprocess.run([sys.executable, *args], cwd=ROOT, capture_output=True, text=True, timeout=60)
+
+
+@pytest.fixture
+def quiet_logger(monkeypatch):
+    # main()이 추가하는 handler와 level을 테스트가 끝나면 되돌림
+    monkeypatch.setattr(logger, 'handlers', [])
+    monkeypatch.setattr(logger, 'level', logger.level)
+
+
+def test_import_has_no_side_effects():
+    # import crawler 만으로는 무거운 모듈을 불러오지 않고, 이름을 처음 쓸 때 불러옴
+    result = run_python("-c", "import sys, crawler; print([m for m in {!r} if m in sys.modules]); "
+                              "crawler.Room; print('crawler.room' in sys.modules)".format(HEAVY))
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.split("\n")[:2] == ["[]", "True"]
+
+
+def test_help():
+    result = run_python("-m", "crawler", "--help")
+    assert result.returncode == 0, result.stderr
+    for command in ('search-map', 'crawl', 'quote', 'work', 'history'):
+        assert command in result.stdout
+
+
+def test_crawl_command(mock_server, tmp_path, quiet_logger):
+    output = tmp_path / "rooms.jsonl"
+    assert cli.main(['-q', 'crawl', '-o', str(output), '101', '102']) == 0
+    with open(output, encoding='utf-8') as f:
+        rooms = {room['sam_id']: room for room in map(json.loads, f)}
+    assert sorted(rooms) == ['101', '102']
+    assert rooms['101']['deposit'] == 500
+
+
+def test_crawl_without_ids(mock_server, tmp_path, quiet_logger, monkeypatch):
+    monkeypatch.setattr(sys, 'stdin', io.StringIO(""))
+    assert cli.main(['-q', 'crawl', '-o', str(tmp_path / "rooms.jsonl")]) == 2
+    assert sum(mock_server.requests.values()) == 0
+
+
+def test_search_keyword_command(mock_server, capsys, quiet_logger):
+    assert cli.main(['search-keyword', '강남역']) == 0
+    assert capsys.readouterr().out.split() == [str(item['rid']) for item in mock_server.listings]
@@ -0,0 +1,79 @@
+import pytest
+from aiohttp import web
+
+from mock_server import MockServer
+from crawler.crawl_state import CrawlState, IncrementalCrawler
+
+
+class ListSink:
+    def __init__(self, fail_after: int = None):
+        self.rooms = []
+        self.fail_after = fail_after
+
+    def write(self, room):
+        if self.fail_after is not None and len(self.rooms) >= self.fail_after:
+            raise RuntimeError("disk full")
+        self.rooms.append(room.sam_id)
+
+    def flush(self):
+        pass
+
+
+class NoComplexServer(MockServer):
+    async def handle_naver_complex(self, request):
+        raise web.HTTPNotFound()
+
+
+@pytest.fixture
+def state(tmp_path):
+    state = CrawlState(str(tmp_path / "state.sqlite3"))
+    yield state
+    state.close()
+
+
+def test_reuses_fresh_stages(mock_server, state):
+    first = ListSink()
+    IncrementalCrawler(state, run_id='day-1').crawl(['101', '102'], sink=first, max_workers=2)
+    requests = dict(mock_server.requests)
+
+    # 새 run이지만 모든 단계가 아직 유효하므로 다시 요청하지 않음
+    second = ListSink()
+    crawler = IncrementalCrawler(state, run_id='day-2')
+    crawler.crawl(['101', '102'], sink=second, max_workers=2)
+    assert sorted(second.rooms) == ['101', '102']
+    assert mock_server.requests['detail'] == requests['detail']
+    assert mock_server.requests['booking'] == requests['booking']
+    assert crawler.reused['land_price'] == 2
+
+    # 같은 run을 다시 실행하면 끝난 방은 건너뜀
+    again = ListSink()
+    IncrementalCrawler(state, run_id='day-2').crawl(['101', '102', '103'], sink=again)
+    assert again.rooms == ['103']
+
+
+def test_failed_stage_is_not_saved(serve, state):
+    serve(NoComplexServer())
+    sink = ListSink()
+    IncrementalCrawler(state, run_id='day-1').crawl(['101'], sink=sink)
+    assert sink.rooms == ['101']
+    assert state.load_stage('101', 'land_price') is None
+    assert state.load_stage('101', 'rent_fee') is not None
+
+
+def test_failed_room_is_retried_next_run(mock_server, state):
+    sink = ListSink()
+    IncrementalCrawler(state, run_id='day-1').crawl(['101', 'not-a-room', '102'], sink=sink, max_workers=2)
+    assert sorted(sink.rooms) == ['101', '102']
+    assert state.finished('day-1') == {'101', '102'}
+
+
+def test_interrupted_run_marks_written_rooms(mock_server, state):
+    # sink가 세 번째 방에서 실패해도 앞의 두 방은 끝난 것으로 표시되어 다시 기록하지 않음
+    broken = ListSink(fail_after=2)
+    with pytest.raises(RuntimeError):
+        IncrementalCrawler(state, run_id='day-1').crawl(['101', '102', '103', '104'], sink=broken, max_workers=1)
+    assert state.finished('day-1') == set(broken.rooms)
+
+    resumed = ListSink()
+    IncrementalCrawler(state, run_id='day-1').crawl(['101', '102', '103', '104'], sink=resumed)
+    assert sorted(broken.rooms + resumed.rooms) == ['101', '102', '103', '104']
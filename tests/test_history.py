@@ -0,0 +1,67 @@
+import numpy as np
+
+from mock_server import MockServer
+from crawler.history import HistoryStore, HistorySink, DAY
+from crawler.room import Room
+
+T0 = 1790000000
+
+
+class PriceServer(MockServer):
+    # 견적의 임대료를 rent로 바꿔서 돌려줌
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.rent = 1000000
+
+    async def handle_booking(self, request):
+        return await self.respond('booking', self.contract.replace("1,000,000원", "{:,}원".format(self.rent)))
+
+
+def crawl(path, ids, day: int):
+    with HistorySink(path, timestamp=T0 + day * DAY) as sink:
+        for rid in ids:
+            sink.write(Room(rid))
+    return sink.store
+
+
+def test_history(serve, tmp_path):
+    server = serve(PriceServer())
+    path = str(tmp_path / "history")
+
+    crawl(path, ['101', '102', '151'], 0)
+    # 바뀐 방이 없으면 줄을 추가하지 않음
+    crawl(path, ['101', '102', '151'], 1)
+    server.rent = 1200000
+    crawl(path, ['101', '102'], 2)
+
+    store = HistoryStore(path)
+    assert store.crawls == [T0, T0 + DAY, T0 + 2 * DAY]
+    changes = store.changes(fields=('rent', 'deposit'))
+    assert len(changes) == 5
+    assert changes[changes['sam_id'] == 101]['rent'].tolist() == [1000000, 1200000]
+    assert changes['deposit'].tolist() == [500] * 5
+
+    # 마지막 크롤링에서 빠진 151은 값이 없음
+    series = store.series('rent', region='강남구')
+    assert series.columns.tolist() == [101, 102, 151]
+    assert series[101].tolist() == [1000000, 1000000, 1200000]
+    assert np.isnan(series[151].iloc[-1])
+
+    trend = store.trend('rent', region='대치동')
+    assert trend['rooms'].tolist() == [3, 3, 2]
+    assert trend['mean'].tolist() == [1000000, 1000000, 1200000]
+    assert store.trend('rent', region='마포구')['rooms'].tolist() == [0, 0, 0]
+
+
+def test_history_window(serve, tmp_path):
+    server = serve(PriceServer())
+    path = str(tmp_path / "history")
+    for day, rent in enumerate((1000000, 1100000, 1200000)):
+        server.rent = rent
+        crawl(path, ['101'], day)
+
+    # start 이전의 마지막 값도 한 줄 포함
+    store = HistoryStore(path)
+    changes = store.changes(rids=[101], start=T0 + DAY + 1, fields=('rent',))
+    assert changes['rent'].tolist() == [1100000, 1200000]
+    assert store.series('rent', rids=[101], days=1, end=T0 + 2 * DAY)[101].tolist() == [1100000, 1200000]
@@ -0,0 +1,105 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import aiohttp
+import requests
+from aiohttp import web
+
+from mock_server import MockServer
+from crawler.http_scheduler import RequestScheduler, HostPolicy, retry_after
+from crawler.transport import LiveTransport
+
+POLICY = HostPolicy(rate=1e9, burst=10 ** 9, concurrency=16, max_concurrency=16)
+
+
+class ThrottlingServer(MockServer):
+    # 상세 페이지의 처음 throttled번은 429 + Retry-After
+    def __init__(self, throttled: int, delay: str = "0", **kwargs):
+        super().__init__(**kwargs)
+        self.throttled = throttled
+        self.delay = delay
+        self.attempts = 0
+
+    async def handle_detail(self, request):
+        self.attempts += 1
+        if self.attempts <= self.throttled:
+            raise web.HTTPTooManyRequests(headers={'Retry-After': self.delay})
+        return await super().handle_detail(request)
+
+
+def scheduler(retries: int):
+    # backoff가 길어서 Retry-After를 따르지 않으면 테스트가 오래 걸림
+    return RequestScheduler(policies={'127.0.0.1': POLICY}, retries=retries, backoff=30, max_backoff=30)
+
+
+def test_retry_after_and_aimd(serve):
+    server = serve(ThrottlingServer(throttled=2))
+    s = scheduler(retries=3)
+
+    started = time.monotonic()
+    response = s.get(server.base + "/room/detail/101")
+    assert response.status_code == 200
+    assert time.monotonic() - started < 5
+    assert server.attempts == 3
+
+    # 429 두 번에 16 -> 8 -> 4, 성공하면 1/4 증가
+    assert s.stats()['127.0.0.1']['limit'] == 4.25
+    assert s.stats()['127.0.0.1']['in_flight'] == 0
+
+
+def test_retries_exhausted(serve):
+    # 재시도 횟수를 넘으면 마지막 응답을 그대로 돌려줌
+    server = serve(ThrottlingServer(throttled=10))
+    response = scheduler(retries=1).get(server.base + "/room/detail/101")
+    assert response.status_code == 429
+    assert server.attempts == 2
+
+
+def test_async_retry_after(serve):
+    server = serve(ThrottlingServer(throttled=1, delay="0.01"))
+    s = scheduler(retries=2)
+
+    async def read(response):
+        return await response.text()
+
+    async def run():
+        async with aiohttp.ClientSession() as session:
+            return await s.arequest(session, "GET", server.base + "/room/detail/101", read)
+
+    status, body, _ = asyncio.run(run())
+    assert status == 200
+    assert "테스트룸 101" in body
+    assert server.attempts == 2
+    assert s.stats()['127.0.0.1']['limit'] == 8.125
+
+
+class WatchingTransport(LiveTransport):
+    # 요청을 보낼 때마다 진행중인 요청 수를 기록
+    def __init__(self, state):
+        self.state = state
+        self.in_flight = []
+
+    def send(self, session, method: str, url: str, **kwargs):
+        self.in_flight.append(self.state.in_flight)
+        return super().send(session, method, url, **kwargs)
+
+
+def test_concurrency_limit(serve):
+    # 동시 요청은 AIMD 한도를 넘지 않음
+    server = serve(MockServer(latency=0.05))
+    s = RequestScheduler(policies={'127.0.0.1': HostPolicy(rate=1e9, burst=10 ** 9, concurrency=2,
+                                                           max_concurrency=2)}, retries=0)
+    s.transport = transport = WatchingTransport(s.host_state('127.0.0.1'))
+
+    with ThreadPoolExecutor(8) as executor:
+        list(executor.map(lambda rid: s.get(server.base + "/room/detail/{}".format(rid)), range(8)))
+    assert max(transport.in_flight) == 2
+    assert server.requests['detail'] == 8
+
+
+def test_retry_after_header():
+    assert retry_after({'Retry-After': '3'}) == 3.0
+    assert retry_after({'Retry-After': 'Wed, 21 Oct 2015 07:28:00 GMT'}) == 0.0
+    assert retry_after({'Retry-After': 'soon'}) is None
+    assert retry_after(requests.structures.CaseInsensitiveDict()) is None
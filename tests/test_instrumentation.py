@@ -0,0 +1,70 @@
+import json
+import urllib.request
+
+import pytest
+
+from mock_server import MockServer
+from crawler import instrumentation
+from crawler.instrumentation import FAILURES, HTTP_REQUESTS
+from crawler.room import Room
+
+
+class NoKakaoServer(MockServer):
+    # 카카오 검색 결과 없음
+    async def handle_kakao(self, request):
+        return await self.respond('kakao', json.dumps({"meta": {"total_count": 0}, "documents": []}),
+                                  'application/json')
+
+
+@pytest.fixture
+def enabled(monkeypatch):
+    monkeypatch.setattr(instrumentation, '_enabled', True)
+
+
+def test_failure_counters_and_spans(serve, enabled):
+    server = serve(NoKakaoServer())
+    before = FAILURES.get(reason='kakao_no_result')
+    requests_before = HTTP_REQUESTS.get(host='127.0.0.1', status=200)
+    spans, failures = [], []
+    span_hook = instrumentation.add_span_hook(spans.append)
+    failure_hook = instrumentation.add_failure_hook(lambda reason, message: failures.append((reason, message)))
+    try:
+        Room('101')
+    finally:
+        instrumentation.remove_hook(span_hook)
+        instrumentation.remove_hook(failure_hook)
+
+    assert FAILURES.get(reason='kakao_no_result') - before == 1
+    assert failures[0][0] == 'kakao_no_result'
+    assert "테스트1빌딩" in failures[0][1]
+
+    # 요청마다 http span, 단계마다 stage span
+    http = [s for s in spans if s.name == 'http']
+    assert len(http) == sum(server.requests.values())
+    assert all(s.attrs['status'] == 200 and s.duration >= 0 for s in http)
+    assert HTTP_REQUESTS.get(host='127.0.0.1', status=200) - requests_before == len(http)
+    assert {s.attrs['stage'] for s in spans if s.name == 'stage'} >= {'detail', 'address', 'rent_fee', 'vacancy'}
+
+
+def test_disabled_is_noop(mock_server, monkeypatch):
+    monkeypatch.setattr(instrumentation, '_enabled', False)
+    before = FAILURES.get(reason='kakao_no_result')
+    assert instrumentation.span('http') is instrumentation.NOOP_SPAN
+    instrumentation.failure('kakao_no_result', "메시지")
+    assert FAILURES.get(reason='kakao_no_result') == before
+
+
+def test_exporter(mock_server, enabled):
+    Room('101')
+    server = instrumentation.start_http_server(0, '127.0.0.1')
+    try:
+        base = "http://127.0.0.1:{}".format(server.server_address[1])
+        body = urllib.request.urlopen(base + "/metrics").read().decode('utf-8')
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert '# TYPE crawler_http_requests_total counter' in body
+    assert 'crawler_http_requests_total{host="127.0.0.1",status="200"}' in body
+    assert 'crawler_stage_seconds_bucket{stage="detail",le="+Inf"}' in body
+    assert 'crawler_host_concurrency_limit{host="127.0.0.1"}' in body
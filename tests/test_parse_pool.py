@@ -0,0 +1,52 @@
+import concurrent.futures
+import queue
+
+from crawler.parse_pool import ParsePipeline
+from crawler.room import Room
+
+
+class HeldParse:
+    # 파싱 Future를 테스트가 직접 끝낼 때까지 붙잡아 둠
+    def __init__(self):
+        self.pending = queue.Queue()
+
+    def __call__(self, function, text: str):
+        future = concurrent.futures.Future()
+        self.pending.put((function, text, future))
+        return future
+
+    def release(self):
+        function, text, future = self.pending.get(timeout=5)
+        future.set_result(function(text))
+        return function.__name__
+
+
+def test_crawl(mock_server):
+    with ParsePipeline(network_workers=4, parse_workers=1) as pipeline:
+        rooms = {room.sam_id: room for room in pipeline.crawl(['101', '102', '151'])}
+
+    assert sorted(rooms) == ['101', '102', '151']
+    assert rooms['101'].room_name == '테스트룸 101'
+    assert rooms['101'].prices['임대료'] == 1000000
+    assert (rooms['101'].naver_id, rooms['101'].deposit, rooms['101'].monthly_rent) == ('12105', 500, 43)
+    assert mock_server.requests['naver_search'] == 2
+
+
+def test_land_price_does_not_wait_for_parse(mock_server):
+    room = Room('101', fetch=False)
+    room.parseLand(room.fetchDetail())
+    room.updateAddress()
+
+    with ParsePipeline(network_workers=1, parse_workers=1) as pipeline:
+        pipeline.parse = held = HeldParse()
+        # 검색 결과의 파싱을 기다리지 않고 바로 돌아옴
+        found = pipeline.search_land_price(room)
+        assert not found.done()
+
+        assert held.release() == 'parse_naver_search'
+        # 단지 매물 요청은 네트워크 쓰레드에서 보내고, 그 파싱도 기다리지 않음
+        assert held.release() == 'parse_complex_page'
+        assert found.result(timeout=5) is True
+
+    assert (room.naver_id, room.deposit, room.monthly_rent) == ('12105', 500, 43)
+    assert mock_server.requests['naver_complex'] == 1
@@ -0,0 +1,73 @@
+import os
+
+import pytest
+import requests
+
+from mock_server import MockServer
+from crawler import parsers, room
+from crawler.room import Room
+
+FIXTURES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks", "fixtures")
+
+
+def backends():
+    # 설치되지 않은 backend는 건너뜀
+    for name, backend in parsers.BACKENDS.items():
+        try:
+            yield name, backend()
+        except ImportError:
+            continue
+
+
+def article(price: str, *summaries: str):
+    return ('<li class="ComplexArticleItem_item__L5o7k"><a class="ComplexArticleItem_link__c1bI8" href="/article/1">'
+            '<span class="ComplexArticleItem_price__DFeIb">{}</span><ul class="ComplexArticleItem_summary-list__BZR8O">{}'
+            '</ul></a></li>').format(price, "".join('<li class="ComplexArticleItem_item-summary__oHSwl">{}</li>'.format(s)
+                                                    for s in summaries))
+
+
+class BracketComplexServer(MockServer):
+    # 괄호가 있는 요약이 매물마다 여러 개인 단지 페이지
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.naver_complex = "<html><body><ul>{}</ul></body></html>".format("".join([
+            article("월세 300/30", "오피스텔", "복층 (신축)", "11평 (8평)", "3/15층"),
+            article("월세 1,000/50 ~ 월세 1,000/60", "오피스텔 (풀옵션)", "25평 (20평)", "남향"),
+            article("전세 2억", "11평 (8평)"),
+            article("월세 500/43", "오피스텔", "11평 (8평)"),
+        ]))
+
+
+def test_complex_articles_backend_parity(serve):
+    server = serve(BracketComplexServer())
+    text = requests.get(server.base + "/complexes/1").text
+
+    results = {name: parsers.parse_complex_articles(text, backend=backend) for name, backend in backends()}
+    assert 'html.parser' in results
+    # 괄호 안에 숫자가 없는 요약 뒤의 전용면적도 읽음
+    assert results['html.parser'] == [[8, 300, 30], [20, 1000, 50], [8, 500, 43]]
+    for name, articles in results.items():
+        assert articles == results['html.parser'], name
+
+
+@pytest.mark.parametrize('fixture', ['detail.html', 'contract.html', 'naver_search.html', 'naver_noresult.html',
+                                     'naver_complex.html'])
+def test_fixture_backend_parity(fixture):
+    parse = {'detail.html': parsers.parse_room_detail, 'contract.html': parsers.parse_contract_list,
+             'naver_search.html': parsers.parse_naver_search, 'naver_noresult.html': parsers.parse_naver_search,
+             'naver_complex.html': parsers.parse_complex_articles}[fixture]
+    with open(os.path.join(FIXTURES, fixture), encoding="utf-8") as f:
+        text = f.read()
+
+    results = {name: parse(text, backend=backend) for name, backend in backends()}
+    for name, result in results.items():
+        assert result == results['html.parser'], name
+
+
+def test_room_uses_first_matching_article(serve):
+    # 첫 매물의 두 번째 괄호에서 같은 전용면적(8평)을 찾음
+    serve(BracketComplexServer())
+    r = Room('101')
+    assert r.room_size_pyeong_sam == 8
+    assert (r.deposit, r.monthly_rent) == (300, 30)
+    assert len(room.NAVER_COMPLEX_CACHE.get(r.naver_id)) == 3
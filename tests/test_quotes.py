@@ -0,0 +1,52 @@
+import json
+from datetime import date
+
+from mock_server import MockServer
+from crawler.quotes import quote_matrix
+
+START = date(2026, 11, 1)
+
+
+class QuotingServer(MockServer):
+    # 102의 일정은 비어 있음 (101은 11월 3일부터 예약됨)
+    # 견적의 장기계약 할인은 주마다 10,000원
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.quoted = []
+
+    async def handle_schedule(self, request):
+        data = await request.post()
+        if data['rid'] == '102':
+            return await self.respond('schedule', json.dumps({"schedule_list": []}), 'application/json')
+        return await super().handle_schedule(request)
+
+    async def handle_booking(self, request):
+        data = await request.post()
+        self.quoted.append((data['rid'], data['start_date'], int(data['week'])))
+        discount = "-{:,}원".format(10000 * int(data['week']))
+        return await self.respond('booking', self.contract.replace("-50,000원", discount))
+
+
+def test_quote_matrix(serve):
+    server = serve(QuotingServer())
+    matrix = quote_matrix(['101', '102'], starts=[START], weeks=(1, 4), max_rooms=2)
+
+    # 예약된 날이 낀 101의 기간은 요청하지 않음
+    assert sorted(server.quoted) == [('102', '2026-11-01', 1), ('102', '2026-11-01', 4)]
+    assert matrix.skipped == {'101': [(START, 1), (START, 4)]}
+    assert server.requests['schedule'] == 2
+
+    assert matrix.get('102', START, 4)['임대료'] == 1000000
+    assert matrix.discounts('102') == {1: -10000, 4: -40000}
+    rows = list(matrix.rows())
+    assert [(row['sam_id'], row['end_date'], row['weeks']) for row in rows] == [('102', '2026-11-07', 1),
+                                                                                ('102', '2026-11-28', 4)]
+    assert rows[1]['관리비용'] == 100000
+
+
+def test_quote_matrix_without_schedule(serve):
+    server = serve(QuotingServer())
+    matrix = quote_matrix(['101'], starts=[START, date(2026, 12, 1)], weeks=(1, 4, 8), skip_booked=False)
+    assert len(matrix) == len(server.quoted) == 6
+    assert server.requests['schedule'] == 0
+    assert matrix.discounts('101') == {1: -10000, 4: -40000, 8: -80000}
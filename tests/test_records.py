@@ -0,0 +1,54 @@
+import json
+import random
+
+from bench_records import make_room, measure
+from crawler.records import RoomRecord, RoomBatch
+from crawler.room import Room
+from crawler.sink import room_to_record
+
+# 같은 방들을 들고 있을 때 RoomRecord는 dict(jsonl 한 줄)보다, RoomBatch는 RoomRecord보다 작아야 함
+# (benchmarks/bench_records.py와 같은 방법으로 tracemalloc으로 측정)
+N = 2000
+
+
+def make_lines(n: int):
+    rng = random.Random(0)
+    return [json.dumps(room_to_record(make_room(i, rng)), ensure_ascii=False) for i in range(n)]
+
+
+def test_records_are_smaller_than_dicts():
+    lines = make_lines(N)
+    # 처음 한 번만 생기는 할당(intern한 문자열, intern 테이블이 커지는 할당 등)은 빼고 측정
+    RoomBatch().extend(RoomRecord.from_dict(json.loads(line)) for line in lines)
+    dicts, dict_bytes = measure(lambda: [json.loads(line) for line in lines])
+    records, record_bytes = measure(lambda: [RoomRecord.from_dict(json.loads(line)) for line in lines])
+    batch, batch_bytes = measure(lambda: RoomBatch().extend(records))
+
+    assert len(records) == len(batch) == N
+    assert batch[0] == records[0] == RoomRecord.from_dict(dicts[0])
+    assert record_bytes * 2 < dict_bytes
+    assert batch_bytes * 2 < record_bytes
+
+
+def test_records_are_smaller_than_rooms():
+    rng = random.Random(0)
+    rooms, room_bytes = measure(lambda: [make_room(i, rng) for i in range(N)])
+    # intern할 문자열을 미리 만들어 둠 (intern 테이블이 커지는 할당은 빼고 측정)
+    [RoomRecord.from_room(room) for room in rooms]
+    records, record_bytes = measure(lambda: [RoomRecord.from_room(room) for room in rooms])
+
+    assert records[0] == RoomRecord.from_dict(room_to_record(rooms[0]))
+    assert record_bytes * 3 < room_bytes
+
+
+def test_floor(mock_server):
+    room = Room('101')
+    assert RoomRecord.from_room(room).address.floor == int(room.address.floor)
+
+    # 지하층은 음수, 층 번호가 아닌 값은 None으로 저장
+    for floor, expected in [("B1", -1), ("지하2", -2), ("지하 1", -1), ("옥탑", None), ("", None)]:
+        room.address.floor = floor
+        record = RoomRecord.from_room(room)
+        assert record.address.floor == expected
+        assert RoomRecord.from_dict(room_to_record(room)) == record
+        assert RoomBatch().extend([record])[0] == record
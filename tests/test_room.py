@@ -0,0 +1,144 @@
+import json
+
+import requests
+
+from mock_server import MockServer, _fixture, complex_position
+from crawler import instrumentation, parsers, room
+from crawler.room import ComplexIndex, Room
+from crawler.sam_search import process_in_thread_pool
+
+
+class ListSink:
+    def __init__(self):
+        self.rooms = []
+
+    def write(self, room):
+        self.rooms.append(room)
+
+    def flush(self):
+        pass
+
+
+class NoKakaoServer(MockServer):
+    # 건물 3의 주소는 카카오에서 찾을 수 없음
+    async def handle_kakao(self, request):
+        if "테스트3빌딩" in request.query['query']:
+            return await self.respond('kakao', json.dumps({"meta": {"total_count": 0}, "documents": []}),
+                                      'application/json')
+        return await super().handle_kakao(request)
+
+
+def test_room(mock_server):
+    room = Room('101')
+    assert room.room_name == '테스트룸 101'
+    assert room.address.doro.road_name == '삼성로'
+    assert room.prices['임대료'] == 1000000
+    assert (room.naver_id, room.deposit, room.monthly_rent) == ('12105', 500, 43)
+
+
+def test_unresolved_address(serve):
+    # 카카오에서 찾지 못한 주소는 네이버 검색 없이 가격만 비워둠
+    server = serve(NoKakaoServer())
+    room = Room('103')
+    assert room.room_name == '테스트룸 103'
+    assert not hasattr(room.address, 'doro')
+    assert room.deposit is None
+    assert room.prices['임대료'] == 1000000
+    assert server.requests['naver_search'] == 0
+
+
+def test_thread_pool_drops_failed_room(serve, monkeypatch):
+    # 한 방의 오류는 그 방만 실패로 세고 나머지 방은 계속 기록
+    serve(NoKakaoServer())
+    monkeypatch.setattr(instrumentation, '_enabled', True)
+    ok, failed = instrumentation.ROOMS.get(result='ok'), instrumentation.ROOMS.get(result='failed')
+
+    sink = ListSink()
+    process_in_thread_pool(['101', 'not-a-room', '103', '102'], sink=sink, max_workers=4)
+
+    assert sorted(room.sam_id for room in sink.rooms) == ['101', '102', '103']
+    assert instrumentation.ROOMS.get(result='ok') - ok == 3
+    assert instrumentation.ROOMS.get(result='failed') - failed == 1
+
+
+class NoNaverServer(MockServer):
+    # 네이버 검색 결과 없음
+    async def handle_naver_search(self, request):
+        return await self.respond('naver_search', _fixture("naver_noresult.html"))
+
+
+def test_building_shares_naver_lookups(mock_server):
+    # 같은 건물(101, 151)의 방은 네이버 검색과 단지 매물 페이지를 한 번씩만 요청
+    rooms = [Room(rid) for rid in ('101', '151', '102')]
+    assert [r.naver_id for r in rooms[:2]] == ['12105', '12105']
+    assert rooms[0].deposit == rooms[1].deposit == 500
+    assert mock_server.requests['naver_search'] == 2
+    assert mock_server.requests['naver_complex'] == 2
+    assert room.NAVER_ID_CACHE.get(rooms[0].naverIdKey()) == '12105'
+
+
+def test_naver_no_result_is_cached(serve):
+    server = serve(NoNaverServer())
+    rooms = [Room(rid) for rid in ('101', '151')]
+    assert [r.naver_id for r in rooms] == [None, None]
+    assert server.requests['naver_search'] == 1
+    assert server.requests['naver_complex'] == 0
+
+
+def test_complex_index(mock_server):
+    text = requests.get(mock_server.base + "/complexes/12105").text
+    articles, position = parsers.parse_complex_page(text)
+    index = ComplexIndex(articles, position)
+    assert index.position == complex_position(12105)
+
+    # 페이지에서 처음 나온 같은 면적의 매물과 같은 결과
+    for area in {area for area, _, _ in articles}:
+        assert index.find(area) == next(tuple(a) for a in articles if a[0] == area)
+        assert index.prices(area) == [tuple(a) for a in articles if a[0] == area]
+    assert index.find(None) is None
+    assert index.find(1000, tolerance=3) is None
+    assert len(ComplexIndex.from_json(json.loads(json.dumps(index.to_json())))) == len(index)
+
+
+def test_complex_index_tolerance():
+    # 같은 거리면 페이지에서 먼저 나온 면적을 사용
+    index = ComplexIndex([[12, 800, 60], [10, 500, 40], [8, 300, 30], [10, 600, 45]])
+    assert index.find(10) == (10, 500, 40)
+    assert index.find(9) is None
+    assert index.find(9, tolerance=1) == (10, 500, 40)
+    assert index.find(11, tolerance=1) == (12, 800, 60)
+    assert index.find(14, tolerance=1) is None
+    assert index.prices(10, tolerance=2) == [(8, 300, 30), (10, 500, 40), (10, 600, 45), (12, 800, 60)]
+    assert ComplexIndex.from_json([[8, 300, 30]]).find(8) == (8, 300, 30)
+
+
+def test_lazy_room(mock_server):
+    r = Room('101', lazy=True)
+    assert sum(mock_server.requests.values()) == 0
+
+    # 예약 견적만 요청
+    assert r.prices['임대료'] == 1000000
+    assert dict(mock_server.requests) == {'booking': 1}
+    assert r.loaded == {'rent_fee'}
+
+    # 상세 페이지 -> 카카오 -> 네이버 순서로 필요한 단계만 실행 (일정은 요청하지 않음)
+    assert (r.deposit, r.monthly_rent) == (500, 43)
+    assert r.room_name == '테스트룸 101'
+    assert r.loaded == {'rent_fee', 'detail', 'address', 'land_price'}
+    assert mock_server.requests['detail'] == mock_server.requests['kakao'] == 1
+    assert mock_server.requests['schedule'] == 0
+    assert mock_server.requests['booking'] == 1
+
+
+def test_lazy_room_failed_dependency(serve):
+    # 주소를 찾지 못하면 네이버 단계는 실행하지 않고 빈 값으로 둠
+    server = serve(NoKakaoServer())
+    r = Room('103', lazy=True)
+    assert r.deposit is None
+    assert r.naver_id is None
+    assert 'land_price' in r.loaded
+    assert server.requests['naver_search'] == 0
+
+    r.prefetch(['vacancy_rate'])
+    assert 0 <= r.vacancy_rate <= 1
+    assert server.requests['booking'] == 0
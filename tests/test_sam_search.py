@@ -0,0 +1,73 @@
+import pytest
+from aiohttp import web
+
+from mock_server import MockServer
+from crawler import sam_search
+from crawler.http_scheduler import SCHEDULER
+from crawler.sam_search import (sam_search_map, sam_search_map_tiled, sam_search_keyword, iter_sam_search_keyword,
+                                MapSearchError)
+
+SEOUL = (127.18, 37.70, 126.76, 37.43)
+
+
+class FlakyMapServer(MockServer):
+    # 영역마다 처음 failures번의 지도 검색 요청은 500
+    def __init__(self, failures: int, **kwargs):
+        super().__init__(**kwargs)
+        self.failures = failures
+        self.attempts = {}
+
+    async def handle_map_search(self, request):
+        data = await request.post()
+        tile = tuple(data[key] for key in ('north_east_lng', 'north_east_lat', 'south_west_lng', 'south_west_lat'))
+        self.attempts[tile] = self.attempts.get(tile, 0) + 1
+        if self.attempts[tile] <= self.failures:
+            raise web.HTTPInternalServerError()
+        return await super().handle_map_search(request)
+
+
+@pytest.fixture
+def small_cap(monkeypatch):
+    monkeypatch.setattr(sam_search, 'SAM_SEARCH_MAP_CAP', 20)
+    monkeypatch.setattr(SCHEDULER, 'backoff', 0)
+
+
+def test_tiled_search_finds_every_room(mock_server, small_cap):
+    expected = sorted(item['rid'] for item in mock_server.listings)
+
+    # 한 번에는 20개까지만 받으므로 잘림
+    assert len(sam_search_map(*SEOUL, 5)) == 20
+
+    ids, lats, lngs = sam_search_map_tiled(*SEOUL, 5)
+    assert sorted(ids) == expected
+    assert len(lats) == len(lngs) == len(ids)
+    assert mock_server.requests['map_search'] > 4
+
+
+def test_failed_tile_is_retried(serve, small_cap):
+    serve(FlakyMapServer(failures=2))
+    ids, _, _ = sam_search_map_tiled(*SEOUL, 5)
+    assert len(set(ids)) == 200
+
+
+def test_failed_tile_raises(serve, small_cap):
+    # 다시 요청해도 실패하는 영역이 있으면 방이 빠진 결과를 돌려주지 않음
+    serve(FlakyMapServer(failures=10))
+    with pytest.raises(MapSearchError):
+        sam_search_map_tiled(*SEOUL, 5, retries=2)
+
+
+def test_keyword_pages(mock_server):
+    ids = sam_search_keyword("강남역")
+    # data-href의 번호는 방 id가 아님
+    assert ids == [str(item['rid']) for item in mock_server.listings]
+    # 첫 빈 페이지가 들어있는 window까지만 요청 (200개 = 14페이지, window 5)
+    assert mock_server.requests['keyword_search'] <= 15
+
+
+def test_keyword_generator_stops_early(mock_server):
+    ids = iter_sam_search_keyword("강남역", window=2)
+    first = [next(ids) for _ in range(3)]
+    ids.close()
+    assert first == [str(item['rid']) for item in mock_server.listings[:3]]
+    assert mock_server.requests['keyword_search'] <= 2
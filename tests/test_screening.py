@@ -0,0 +1,40 @@
+from crawler.screening import Screening, RoomFilter
+
+
+def screen(ids, filters):
+    screening = Screening(filters)
+    rooms = {room.sam_id: room for room in screening.run([{"rid": rid} for rid in ids], max_workers=4)}
+    return screening, rooms
+
+
+def test_rent_screen_skips_schedule(mock_server):
+    # 공실률 조건이 없으면 임대료에서 떨어진 방은 예약 일정을 요청하지 않음
+    screening, rooms = screen(['101', '102', '103'], RoomFilter(max_rent=500000))
+
+    assert rooms == {}
+    assert screening.passed == {'listing': 3, 'rent_fee': 0, 'detail': 0, 'land_price': 0}
+    assert mock_server.requests['booking'] == 3
+    assert mock_server.requests['schedule'] == 0
+    assert mock_server.requests['detail'] == 0
+
+
+def test_vacancy_screen(mock_server):
+    # 공실률 조건이 있으면 rent_fee 단계에서 예약 일정도 받아서 검사
+    screening, rooms = screen(['101', '102'], RoomFilter(max_rent=500000, max_vacancy_rate=1.0))
+    assert rooms == {}
+    assert mock_server.requests['schedule'] > 0
+
+    screening, rooms = screen(['101', '102'], RoomFilter(min_vacancy_rate=2.0))
+    assert rooms == {}
+    assert screening.passed['rent_fee'] == 0
+    assert mock_server.requests['detail'] == 0
+
+
+def test_passed_room_is_complete(mock_server):
+    screening, rooms = screen(['101', '102'], RoomFilter(min_rent=500000, max_deposit=1000))
+
+    assert sorted(rooms) == ['101', '102']
+    assert screening.passed == {'listing': 2, 'rent_fee': 2, 'detail': 2, 'land_price': 2}
+    # 통과한 방은 조건에 쓰지 않은 공실률까지 채움
+    assert 0 <= rooms['101'].vacancy_rate <= 1
+    assert rooms['101'].deposit == 500
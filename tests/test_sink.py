@@ -0,0 +1,66 @@
+import json
+import os
+import subprocess
+import sys
+
+import pyarrow.parquet as pq
+
+from crawler.sink import JsonlSink, ParquetSink, MultiSink
+from crawler.sam_search import process_in_thread_pool
+
+# 기록하다가 close 없이 죽는 프로세스 (batch_size=10으로 35개를 쓰고 종료)
+CRASH = """
+import os, sys
+sys.path.insert(0, {root!r})
+from crawler.sink import open_sink
+sink = open_sink({path!r}, batch_size=10)
+for i in range(35):
+    sink.write_record({{'sam_id': str(i), 'room_name': 'room {{}}'.format(i), 'prices': None}})
+os._exit(1)
+"""
+
+
+def crash_writer(path: str):
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run([sys.executable, "-c", CRASH.format(root=root, path=path)])
+    assert result.returncode == 1
+
+
+def test_sinks(mock_server, tmp_path):
+    jsonl, parquet = str(tmp_path / "rooms.jsonl"), str(tmp_path / "rooms.parquet")
+    with MultiSink(JsonlSink(jsonl, batch_size=2), ParquetSink(parquet, batch_size=2)) as sink:
+        process_in_thread_pool(['101', '102', '103'], sink=sink, max_workers=2)
+        assert sink.count == 3
+
+    with open(jsonl, encoding='utf-8') as f:
+        records = {record['sam_id']: record for record in map(json.loads, f)}
+    assert sorted(records) == ['101', '102', '103']
+    assert records['101']['building_name'] == '테스트1빌딩'
+    assert records['101']['prices']['임대료'] == 1000000
+    assert records['101']['deposit'] == 500
+
+    # batch_size 2개마다 part 파일 하나
+    assert sorted(os.listdir(parquet)) == ['part-00001.parquet', 'part-00002.parquet']
+    table = pq.read_table(parquet).to_pylist()
+    assert sorted(row['sam_id'] for row in table) == ['101', '102', '103']
+    assert {row['sam_id']: row['monthly_rent'] for row in table}['102'] == 43
+
+
+def test_parquet_survives_crash(tmp_path):
+    # close 없이 죽어도 flush한 batch(30개)는 모두 읽을 수 있음
+    path = str(tmp_path / "rooms.parquet")
+    crash_writer(path)
+    assert sorted(int(row['sam_id']) for row in pq.read_table(path).to_pylist()) == list(range(30))
+
+    # 다시 열면 다음 part 번호부터 이어 씀
+    with ParquetSink(path, batch_size=10) as sink:
+        sink.write_record({'sam_id': '35'})
+    assert pq.read_table(path).num_rows == 31
+    assert len(os.listdir(path)) == 4
+
+
+def test_jsonl_survives_crash(tmp_path):
+    path = str(tmp_path / "rooms.jsonl")
+    crash_writer(path)
+    with open(path, encoding='utf-8') as f:
+        assert [json.loads(line)['sam_id'] for line in f] == [str(i) for i in range(30)]
@@ -0,0 +1,72 @@
+import sys
+import threading
+
+from mock_server import MockServer, complex_position
+from crawler import room
+from crawler.room import Room
+from crawler.spatial import ComparableIndex, NAVER
+
+
+class NoPositionServer(MockServer):
+    # 좌표가 없는 단지 페이지
+    async def handle_naver_complex(self, request):
+        return await self.respond('naver_complex', self.naver_complex)
+
+
+def complexes(index):
+    return {(c.key, c.longitude, c.latitude) for cells in index.cells[NAVER].values()
+            for group in cells.values() for c in group}
+
+
+def test_complex_is_registered_at_naver_position(mock_server):
+    r = Room('101')
+    position = complex_position(int(r.naver_id))
+    assert (float(r.address.longitude), float(r.address.latitude)) != position
+
+    assert complexes(room.COMPARABLES) == {(r.naver_id,) + position}
+    # 단지 좌표에서 찾으면 거리 0
+    nearest = room.COMPARABLES.nearest(*position, size=r.room_size_pyeong_sam)
+    assert nearest[0][0] == 0
+    assert (nearest[0][1].deposit, nearest[0][1].monthly_rent) == (500, 43)
+    # 캐시에 저장한 단지 색인도 좌표를 가짐
+    assert room.NAVER_COMPLEX_CACHE.get(r.naver_id).position == position
+
+
+def test_complex_without_position_uses_room(serve):
+    serve(NoPositionServer())
+    r = Room('101')
+    assert complexes(room.COMPARABLES) == {(r.naver_id, float(r.address.longitude), float(r.address.latitude))}
+
+
+def test_within_while_adding():
+    # 다른 쓰레드가 등록하는 동안 size 없이 조회해도 오류 없이 등록된 것만 돌려줌
+    # (쓰레드 전환을 자주 일으켜서 격자를 훑는 중에 등록되도록 함)
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    index = ComparableIndex()
+    errors = []
+    done = threading.Event()
+
+    def add():
+        for i in range(3000):
+            index.add_complex(i, 127.06, 37.50, [[i, 100, 10]])
+        done.set()
+
+    def query():
+        try:
+            while not done.is_set():
+                index.within(127.06, 37.50)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=add)] + [threading.Thread(target=query) for _ in range(2)]
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(interval)
+
+    assert errors == []
+    assert len(index.within(127.06, 37.50)) == len(index) == 3000
@@ -0,0 +1,94 @@
+import concurrent.futures
+import threading
+
+import pytest
+from aiohttp import web
+
+from mock_server import MockServer
+from crawler.room import Room
+from crawler.stages import run_stages, submit_stages, toposort, imap_unordered
+
+
+class NoDetailServer(MockServer):
+    async def handle_detail(self, request):
+        raise web.HTTPNotFound()
+
+
+@pytest.fixture
+def executor():
+    with concurrent.futures.ThreadPoolExecutor(4) as executor:
+        yield executor
+
+
+def test_independent_stages_overlap(executor):
+    # a와 b는 서로를 기다리므로 동시에 실행될 때만 끝남
+    barrier = threading.Barrier(2, timeout=5)
+    order = []
+
+    def stage(name):
+        def run():
+            if name in ('a', 'b'):
+                barrier.wait()
+            order.append(name)
+            return name
+        return run
+
+    stages = {'a': ((), stage('a')), 'b': ((), stage('b')), 'c': (('a', 'b'), stage('c'))}
+    assert run_stages(stages, executor) == {'a': 'a', 'b': 'b', 'c': 'c'}
+    assert order[-1] == 'c'
+
+
+def test_false_skips_dependents(executor):
+    ran = []
+    stages = {
+        'detail': ((), lambda: False),
+        'address': (('detail',), lambda: ran.append('address')),
+        'land_price': (('address',), lambda: ran.append('land_price')),
+        'rent_fee': ((), lambda: ran.append('rent_fee')),
+    }
+    results = run_stages(stages, executor)
+    assert results == {'detail': False, 'address': False, 'land_price': False, 'rent_fee': None}
+    assert ran == ['rent_fee']
+
+
+def test_future_stage_and_errors(executor):
+    parsed = concurrent.futures.Future()
+    stages = {'fetch': ((), lambda: parsed), 'use': (('fetch',), lambda: 'used')}
+    finished = submit_stages(stages, executor)
+    assert not finished.done()
+    parsed.set_result('parsed')
+    assert finished.result(timeout=5) == {'fetch': 'parsed', 'use': 'used'}
+
+    def boom():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        run_stages({'a': ((), boom), 'b': (('a',), lambda: None)}, executor)
+    with pytest.raises(ValueError):
+        toposort({'a': (('b',), None), 'b': (('a',), None)})
+
+
+def test_imap_unordered_bounds_pending(executor):
+    submitted = []
+
+    def ids():
+        for i in range(20):
+            submitted.append(i)
+            yield i
+
+    results = imap_unordered(executor, lambda i: i * 2, ids(), max_pending=3)
+    first = next(results)
+    # 결과 하나를 받을 때까지 max_pending개만 제출
+    assert len(submitted) == 3
+    assert sorted([first] + list(results)) == [i * 2 for i in range(20)]
+
+
+def test_room_without_detail(serve):
+    # 상세 페이지가 없으면 주소/네이버 단계는 건너뛰고 견적/일정 단계는 그대로 실행
+    server = serve(NoDetailServer())
+    room = Room('101')
+    assert room.room_name is None and room.address is None and room.deposit is None
+    assert room.prices['임대료'] == 1000000
+    assert 0 <= room.vacancy_rate <= 1
+    assert server.requests['kakao'] == server.requests['naver_search'] == 0
+    assert room.loaded == {'detail', 'address', 'rent_fee', 'vacancy', 'land_price'}
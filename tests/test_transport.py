@@ -0,0 +1,70 @@
+from datetime import date
+
+import pytest
+
+from crawler import room, transport, vacancy
+from crawler.http_scheduler import SCHEDULER
+from crawler.room import Room
+from crawler.transport import CassetteStore, RecordingTransport, ReplayTransport, request_key
+
+
+def on(monkeypatch, today: date):
+    # room, vacancy, transport의 date.today()를 today로 고정
+    class Today(date):
+        @classmethod
+        def today(cls):
+            return today
+
+    for module in (room, vacancy, transport):
+        monkeypatch.setattr(module, 'date', Today)
+
+
+def clear_caches():
+    for cache in (room.GEOCODE_CACHE, room.NAVER_ID_CACHE, room.NAVER_COMPLEX_CACHE, vacancy.SCHEDULE_CACHE):
+        cache.clear()
+
+
+def test_request_key_uses_relative_dates():
+    october = {'rid': 101, 'start_date': '2026-11-01', 'end_date': '2026-12-26', 'week': '8'}
+    november = {'rid': 101, 'start_date': '2026-12-01', 'end_date': '2027-01-25', 'week': '8'}
+    url = "https://33m2.co.kr/webpc/booking/start"
+    assert request_key('POST', url, data=october, today=date(2026, 10, 18)) == \
+        request_key('POST', url, data=november, today=date(2026, 11, 3))
+    # 같은 날 다른 기간을 요청하면 다른 키
+    assert request_key('POST', url, data=october, today=date(2026, 10, 18)) != \
+        request_key('POST', url, data=november, today=date(2026, 10, 18))
+
+    schedule = "https://33m2.co.kr/app/room/schedule"
+    assert request_key('POST', schedule, data={'rid': 101, 'year': 2026, 'month': 12}, today=date(2026, 10, 18)) == \
+        request_key('POST', schedule, data={'rid': 101, 'year': 2027, 'month': 1}, today=date(2026, 11, 3))
+
+
+def test_replay_on_another_day(mock_server, monkeypatch, tmp_path):
+    store = CassetteStore(str(tmp_path / "cassettes.sqlite3"))
+
+    on(monkeypatch, date(2026, 10, 18))
+    monkeypatch.setattr(SCHEDULER, '_transport', RecordingTransport(store))
+    recorded = Room('101')
+    requests = sum(mock_server.requests.values())
+
+    # 다음 달에 네트워크 없이 재생해도 카세트에 없는 요청이 없음
+    clear_caches()
+    on(monkeypatch, date(2026, 11, 3))
+    replay = ReplayTransport(store, strict=True)
+    monkeypatch.setattr(SCHEDULER, '_transport', replay)
+    replayed = Room('101')
+
+    assert replay.misses == 0 and replay.hits > 0
+    assert sum(mock_server.requests.values()) == requests
+    assert replayed.prices == recorded.prices
+    assert (replayed.naver_id, replayed.deposit, replayed.monthly_rent) == ('12105', 500, 43)
+    assert 0 <= replayed.vacancy_rate <= 1
+    store.close()
+
+
+def test_replay_miss_is_strict(mock_server, monkeypatch, tmp_path):
+    store = CassetteStore(str(tmp_path / "cassettes.sqlite3"))
+    monkeypatch.setattr(SCHEDULER, '_transport', ReplayTransport(store, strict=True))
+    with pytest.raises(transport.CassetteMiss):
+        Room('101')
+    store.close()
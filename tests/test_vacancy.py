@@ -0,0 +1,58 @@
+from datetime import date, timedelta
+
+from crawler import vacancy
+from crawler.room import Room
+
+
+def status(rid: int, day: date):
+    # mock_server의 일정과 같은 규칙 (None이면 예약 가능)
+    if day.day <= 28 and (rid * 7 + day.day * day.month) % 5 == 0:
+        return "booking" if (rid + day.day) % 3 else "disable"
+    return None
+
+
+def expected_rate(rid: int, days: int, start: date):
+    # disable이 아닌 날 days일 중 예약 가능한 날의 비율
+    num_day = num_vacant = 0
+    day = start
+    while num_day < days:
+        s = status(rid, day)
+        if s != "disable":
+            num_day += 1
+            num_vacant += s is None
+        day += timedelta(days=1)
+    return num_vacant / num_day
+
+
+def months(start: date, end: date):
+    return len({(d.year, d.month) for d in (start + timedelta(days=i) for i in range((end - start).days))})
+
+
+def test_vacancy_windows(mock_server):
+    start = vacancy.tomorrow()
+    room = Room('101', lazy=True)
+    assert room.vacancy_rate == expected_rate(101, 28, start)
+    first = mock_server.requests['schedule']
+
+    # 긴 기간은 이미 받은 달은 다시 요청하지 않고 부족한 달만 요청
+    rates = room.vacancyRates()
+    assert rates == {days: expected_rate(101, days, start) for days in vacancy.VACANCY_WINDOWS}
+    assert mock_server.requests['schedule'] == len(room.vacancy_calendar.months)
+    assert mock_server.requests['schedule'] > first
+
+    # 같은 방의 다른 Room은 달 단위 캐시를 사용
+    assert Room('101', lazy=True).vacancyRates() == rates
+    assert mock_server.requests['schedule'] == len(room.vacancy_calendar.months)
+
+
+def test_vacancy_between(mock_server):
+    start = vacancy.tomorrow() + timedelta(days=40)
+    end = start + timedelta(days=10)
+    room = Room('102', lazy=True)
+    rate = room.vacancyRateBetween(start, end)
+
+    days = [start + timedelta(days=i) for i in range(10)]
+    statuses = [status(102, day) for day in days if status(102, day) != "disable"]
+    assert rate == statuses.count(None) / len(statuses)
+    # 기간에 걸친 달만 요청
+    assert mock_server.requests['schedule'] == months(start, end)
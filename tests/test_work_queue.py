@@ -0,0 +1,131 @@
+import threading
+import time
+
+import pytest
+
+from crawler.work_queue import SqliteWorkQueue, QueueWorker, PENDING, LEASED, DONE, DEAD
+
+TIMEOUT = 0.2
+
+
+class ListSink:
+    def __init__(self):
+        self.rooms = []
+        self.flushed = []
+
+    def write(self, room):
+        self.rooms.append(room)
+
+    def flush(self):
+        self.flushed = list(self.rooms)
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "queue.sqlite3")
+
+
+@pytest.fixture
+def queue(path):
+    with SqliteWorkQueue(path, visibility_timeout=TIMEOUT, max_attempts=2) as queue:
+        yield queue
+
+
+def test_lease_expires(queue, path):
+    queue.put(['1'])
+    first, = queue.lease(1, 'a')
+    # timeout 전에는 다른 worker가 빌리지 못함
+    with SqliteWorkQueue(path, visibility_timeout=TIMEOUT) as other:
+        assert other.lease(1, 'b') == []
+        time.sleep(TIMEOUT * 1.5)
+        second, = other.lease(1, 'b')
+
+    assert second.rid == '1' and second.token != first.token
+    # lease를 잃은 worker는 ack/hold하지 못함
+    assert queue.hold([first, second]) == [second]
+    assert not queue.ack(first)
+    assert queue.ack(second)
+    assert queue.stats() == {PENDING: 0, LEASED: 0, DONE: 1, DEAD: 0}
+
+
+def test_no_double_claim(path):
+    # 여러 연결(프로세스)이 동시에 빌려도 같은 방을 두 번 빌려주지 않음
+    with SqliteWorkQueue(path) as queue:
+        queue.put(str(i) for i in range(200))
+
+    leased = []
+    lock = threading.Lock()
+
+    def worker():
+        with SqliteWorkQueue(path) as queue:
+            while True:
+                leases = queue.lease(7)
+                if not leases:
+                    return
+                with lock:
+                    leased.extend(lease.rid for lease in leases)
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(leased) == sorted(str(i) for i in range(200))
+
+
+def test_dead_letter(queue):
+    queue.put(['1'])
+    for _ in range(2):
+        lease, = queue.lease(1)
+        assert queue.requeue(lease, error="boom")
+    # max_attempts번 실패한 방은 더 이상 빌려주지 않음
+    assert queue.lease(1) == []
+    assert queue.stats()[DEAD] == 1
+    assert queue.remaining() == 0
+
+
+def test_put_again(queue):
+    assert queue.put(['1', '2']) == 2
+    # 끝나지 않은 방은 다시 넣어도 무시
+    assert queue.put(['1']) == 0
+    lease, = queue.lease(1)
+    assert queue.put([lease.rid]) == 0
+
+    # 끝난 방과 dead 방은 다음 갱신 때 다시 넣을 수 있음
+    queue.ack(lease)
+    for _ in range(2):
+        queue.requeue(*queue.lease(1))
+    assert queue.lease(1) == []
+    assert queue.stats() == {PENDING: 0, LEASED: 0, DONE: 1, DEAD: 1}
+    assert queue.put(['1', '2']) == 2
+    assert sorted(lease.rid for lease in queue.lease(2)) == ['1', '2']
+
+
+def test_worker_drops_lost_lease(mock_server, queue, path):
+    queue.put(['101', '102'])
+    sink = ListSink()
+    worker = QueueWorker(queue, sink=sink, max_workers=2)
+
+    leases = {lease.rid: lease for lease in queue.lease(2, worker.worker_id)}
+    for lease in leases.values():
+        worker.finished.append((lease, worker.crawl_room(lease.rid)))
+    # 기록하기 전에 101의 lease가 만료되어 다른 worker가 가져감
+    queue.extend([leases['102']], timeout=60)
+    time.sleep(TIMEOUT * 1.5)
+    with SqliteWorkQueue(path, visibility_timeout=60) as other:
+        assert [lease.rid for lease in other.lease(2, 'other')] == ['101']
+
+    worker._commit()
+    assert [room.sam_id for room in sink.flushed] == ['102']
+    assert (worker.processed, worker.lost) == (1, 1)
+
+
+def test_worker_run(mock_server, path):
+    with SqliteWorkQueue(path, max_attempts=2) as queue:
+        queue.put(['101', 'not-a-room', '102'])
+        sink = ListSink()
+        worker = QueueWorker(queue, sink=sink, max_workers=2, poll_interval=0.01, retry_delay=0).run()
+
+        assert sorted(room.sam_id for room in sink.flushed) == ['101', '102']
+        assert (worker.processed, worker.requeued, worker.lost) == (2, 2, 0)
+        assert queue.stats() == {PENDING: 0, LEASED: 0, DONE: 2, DEAD: 1}